@@ -0,0 +1 @@
+"""Local benchmarks and load-test tooling — not shipped with the package."""
@@ -0,0 +1,145 @@
+"""Micro-benchmarks for the response pipeline: _slim_response, JSON encoding, body decoding, HTML to text.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_response                  # print a table
+    python -m benchmarks.bench_response --save base.json # record a baseline
+    python -m benchmarks.bench_response --compare base.json --threshold 0.2
+
+``--compare`` exits non-zero when any case is slower (median time) or uses
+more peak memory than the baseline by more than ``--threshold``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from gmail_sdk.convenience import ConvenienceMixin
+
+from gmail_mcp.bodies import html_to_text, text_body
+from gmail_mcp.server import _slim_response
+
+from . import fixtures
+
+
+def _decode_all_parts(payload: dict[str, Any]) -> int:
+    """Decode every inline base64url body in a MIME tree; return decoded bytes."""
+    total = 0
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        data = part.get("body", {}).get("data")
+        if data:
+            total += len(base64.urlsafe_b64decode(data))
+        stack.extend(part.get("parts", []))
+    return total
+
+
+def build_cases(scale: float = 1.0) -> dict[str, Callable[[], Any]]:
+    """Return benchmark name -> zero-argument callable. ``scale`` shrinks fixtures for smoke runs."""
+    n = lambda value: max(1, int(value * scale))  # noqa: E731
+    thread = fixtures.make_thread(n(100))
+    heavy = fixtures.make_mime_heavy_message(n(30))
+    list_page = fixtures.make_list_page(n(500))
+    history = fixtures.make_history_page(n(500))
+    slim_thread = _slim_response(thread)
+    newsletter = fixtures.make_newsletter(n(60))
+    newsletter_html = ConvenienceMixin._extract_body(newsletter["payload"], mime_type="text/html")
+
+    return {
+        "slim/thread_100": lambda: _slim_response(thread),
+        "slim/message_30_parts": lambda: _slim_response(heavy),
+        "slim/list_500": lambda: _slim_response(list_page),
+        "slim/history_500": lambda: _slim_response(history),
+        "json/thread_100": lambda: json.dumps(slim_thread, indent=2),
+        "json/list_500": lambda: json.dumps(_slim_response(list_page), indent=2),
+        "pipeline/thread_100": lambda: json.dumps(_slim_response(thread), indent=2),
+        "decode/thread_100_all_parts": lambda: [_decode_all_parts(m["payload"]) for m in thread["messages"]],
+        "decode/thread_100_text_plain": lambda: [ConvenienceMixin._extract_body(m["payload"]) for m in thread["messages"]],
+        "decode/message_30_parts_html": lambda: ConvenienceMixin._extract_body(heavy["payload"], mime_type="text/html"),
+        "html/newsletter_60_to_text": lambda: html_to_text(newsletter_html),
+        # the warm-up run converts once; timed runs are cache hits
+        "html/newsletter_60_text_body_cached": lambda: text_body(newsletter["payload"], "bench", newsletter["id"]),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Time ``fn`` ``repeat`` times, then measure its peak traced memory in one extra run."""
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run(repeat: int = 5, scale: float = 1.0, only: str | None = None) -> dict[str, dict[str, float]]:
+    """Run every case (optionally filtered by substring) and return the results."""
+    return {
+        name: measure(fn, repeat)
+        for name, fn in build_cases(scale).items()
+        if only is None or only in name
+    }
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> list[str]:
+    """Return a description of every case that regressed beyond ``threshold``."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ("median_ms", "peak_kib"):
+            if base[metric] > 0 and current[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {base[metric]:.2f} -> {current[metric]:.2f}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case (default 5)")
+    parser.add_argument("--scale", type=float, default=1.0, help="fixture size multiplier (default 1.0)")
+    parser.add_argument("--only", help="run only cases whose name contains this substring")
+    parser.add_argument("--save", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    args = parser.parse_args(argv)
+
+    results = run(repeat=args.repeat, scale=args.scale, only=args.only)
+    width = max(len(name) for name in results) if results else 10
+    print(f"{'case':<{width}}  {'median ms':>10}  {'min ms':>10}  {'peak KiB':>10}")
+    for name, r in results.items():
+        print(f"{name:<{width}}  {r['median_ms']:>10.2f}  {r['min_ms']:>10.2f}  {r['peak_kib']:>10.0f}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
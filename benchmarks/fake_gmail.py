@@ -0,0 +1,658 @@
+"""Local stand-in for the Gmail REST API, seeded with a synthetic mailbox.
+
+Supports the endpoints the server uses on its hot paths — profile, messages
+list/get/send/modify/trash/untrash/batchModify, threads list/get/modify,
+labels list/get/create, history list, watch/stop — plus the ``/batch/gmail/v1``
+multipart batch endpoint and ``/upload`` media uploads (simple, multipart and
+resumable) for messages.send, messages.import and drafts.create. Imported
+messages keep their own headers and body, so ``rfc822msgid:`` searches find
+them. Every response can be delayed (``--latency-ms``/``--jitter-ms``) and
+a fraction of requests (or batch items) answered with 429 (``--error-rate``).
+
+Run it standalone and point the server at it::
+
+    python -m benchmarks.fake_gmail --port 8765 --threads 500
+    GMAIL_API_ROOT=http://127.0.0.1:8765 gmail-mcp-ldraney
+
+``GET /_stats`` returns request, throttling and quota-unit counters;
+``POST /_stats`` returns them and resets them to zero.
+
+``--upload-drop-every N`` makes every Nth resumable chunk fail with a 503
+after only half of it was stored, to exercise resuming an upload.
+
+With ``--push-endpoint URL``, the fake also stands in for Pub/Sub: after
+``users.watch``, every mailbox change is POSTed to URL as a push delivery
+(``{"message": {"data": base64({"emailAddress", "historyId"})}}``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from email.message import EmailMessage
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from gmail_mcp.quota import api_method, quota_units
+
+from . import fixtures
+
+SYSTEM_LABELS = ["INBOX", "UNREAD", "STARRED", "IMPORTANT", "SENT", "DRAFT", "TRASH", "SPAM", "CATEGORY_UPDATES"]
+USER_LABELS = {"Label_12": "Receipts", "Label_3": "Projects"}
+_YEAR_START_MS = 1_704_067_200_000  # 2024-01-01T00:00:00Z
+
+
+class FakeMailbox:
+    """In-memory mailbox with Gmail-shaped resources and a history log."""
+
+    def __init__(self, threads: int = 200, messages_per_thread: int = 5, *, mime_parts: int = 4, seed: int = 7) -> None:
+        rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.messages: dict[str, dict[str, Any]] = {}
+        self.threads: dict[str, list[str]] = {}
+        self.history: list[dict[str, Any]] = []
+        self.history_id = 1_000
+        self.email = "loadtest@example.com"
+        self.user_labels = dict(USER_LABELS)
+        for t in range(threads):
+            thread_id = f"{rng.getrandbits(64):016x}"
+            self.threads[thread_id] = []
+            for m in range(messages_per_thread):
+                msg = fixtures.make_message(rng, f"{rng.getrandbits(64):016x}", thread_id, msg_index=m, mime_parts=mime_parts, paragraphs=3)
+                msg["internalDate"] = str(_YEAR_START_MS + rng.randrange(365 * 86_400) * 1000)
+                msg["historyId"] = str(self.history_id)
+                self.messages[msg["id"]] = msg
+                self.threads[thread_id].append(msg["id"])
+        self._order = sorted(self.messages, key=lambda mid: -int(self.messages[mid]["internalDate"]))
+
+    # ---- helpers -----------------------------------------------------------
+
+    @staticmethod
+    def header(msg: dict[str, Any], name: str) -> str:
+        for h in msg.get("payload", {}).get("headers", []):
+            if h["name"].lower() == name.lower():
+                return h["value"]
+        return ""
+
+    def _matches(self, msg: dict[str, Any], query: str | None, label_ids: list[str]) -> bool:
+        labels = set(msg["labelIds"])
+        if not set(label_ids) <= labels:
+            return False
+        if "TRASH" in labels and "TRASH" not in label_ids:
+            return False
+        for token in (query or "").split():
+            key, _, value = token.partition(":")
+            if not value:
+                if token.lower() not in msg["snippet"].lower():
+                    return False
+            elif key in ("is", "in", "label"):
+                if value.upper() not in labels and value not in labels:
+                    return False
+            elif key in ("from", "to", "subject"):
+                if value.lower() not in self.header(msg, key).lower():
+                    return False
+            elif key == "rfc822msgid":
+                if value.strip("<>") != self.header(msg, "Message-ID").strip("<>"):
+                    return False
+            elif key in ("after", "before"):
+                bound = datetime.strptime(value, "%Y/%m/%d").replace(tzinfo=timezone.utc).timestamp() * 1000
+                date = int(msg["internalDate"])
+                if (key == "after" and date < bound) or (key == "before" and date >= bound):
+                    return False
+        return True
+
+    def _record(self, kind: str, msg: dict[str, Any], labels: list[str] | None = None) -> None:
+        self.history_id += 1
+        msg["historyId"] = str(self.history_id)
+        stub = {"id": msg["id"], "threadId": msg["threadId"], "labelIds": list(msg["labelIds"])}
+        entry: dict[str, Any] = {"message": stub}
+        if labels is not None:
+            entry["labelIds"] = labels
+        self.history.append({"id": str(self.history_id), "messages": [stub], kind: [entry]})
+
+    def format_message(self, msg: dict[str, Any], fmt: str, metadata_headers: list[str] | None = None) -> dict[str, Any]:
+        base = {k: msg[k] for k in ("id", "threadId", "labelIds", "snippet", "sizeEstimate", "historyId", "internalDate")}
+        if fmt == "minimal":
+            return base
+        if fmt == "metadata":
+            wanted = {h.lower() for h in metadata_headers or []}
+            headers = [h for h in msg["payload"]["headers"] if not wanted or h["name"].lower() in wanted]
+            return {**base, "payload": {"mimeType": msg["payload"]["mimeType"], "headers": headers}}
+        if fmt == "raw":
+            return {**base, "raw": base64.urlsafe_b64encode(self.rfc822(msg)).decode("ascii")}
+        return {**base, "payload": msg["payload"]}
+
+    def rfc822(self, msg: dict[str, Any]) -> bytes:
+        email = EmailMessage()
+        for h in msg["payload"]["headers"]:
+            if h["name"] not in ("Content-Type", "MIME-Version"):
+                email[h["name"]] = h["value"]
+        text_part = msg["payload"]["parts"][0]["parts"][0] if msg["payload"].get("parts") else msg["payload"]
+        email.set_content(base64.urlsafe_b64decode(text_part["body"].get("data", "")).decode("utf-8"))
+        return email.as_bytes()
+
+    # ---- resources ---------------------------------------------------------
+
+    def profile(self) -> dict[str, Any]:
+        return {
+            "emailAddress": self.email,
+            "messagesTotal": len(self.messages),
+            "threadsTotal": len(self.threads),
+            "historyId": str(self.history_id),
+        }
+
+    def list_messages(self, query: str | None, label_ids: list[str], max_results: int, page_token: str | None) -> dict[str, Any]:
+        matched = [mid for mid in self._order if self._matches(self.messages[mid], query, label_ids)]
+        start = int(page_token or 0)
+        page = matched[start:start + max_results]
+        result: dict[str, Any] = {"resultSizeEstimate": len(matched)}
+        if page:
+            result["messages"] = [{"id": mid, "threadId": self.messages[mid]["threadId"]} for mid in page]
+        if start + max_results < len(matched):
+            result["nextPageToken"] = str(start + max_results)
+        return result
+
+    def list_threads(self, query: str | None, label_ids: list[str], max_results: int, page_token: str | None) -> dict[str, Any]:
+        seen: dict[str, None] = {}
+        for mid in self._order:
+            msg = self.messages[mid]
+            if self._matches(msg, query, label_ids):
+                seen.setdefault(msg["threadId"], None)
+        matched = list(seen)
+        start = int(page_token or 0)
+        result: dict[str, Any] = {"resultSizeEstimate": len(matched)}
+        page = matched[start:start + max_results]
+        if page:
+            result["threads"] = [{"id": tid, "snippet": self.messages[self.threads[tid][-1]]["snippet"], "historyId": str(self.history_id)} for tid in page]
+        if start + max_results < len(matched):
+            result["nextPageToken"] = str(start + max_results)
+        return result
+
+    def get_thread(self, thread_id: str, fmt: str, metadata_headers: list[str] | None) -> dict[str, Any] | None:
+        ids = self.threads.get(thread_id)
+        if ids is None:
+            return None
+        messages = [self.format_message(self.messages[mid], fmt, metadata_headers) for mid in ids]
+        return {"id": thread_id, "historyId": max(m["historyId"] for m in messages), "messages": messages}
+
+    def modify(self, msg: dict[str, Any], add: list[str], remove: list[str]) -> None:
+        added = [lid for lid in add if lid not in msg["labelIds"]]
+        removed = [lid for lid in remove if lid in msg["labelIds"]]
+        msg["labelIds"] = [lid for lid in msg["labelIds"] if lid not in removed] + added
+        if added:
+            self._record("labelsAdded", msg, added)
+        if removed:
+            self._record("labelsRemoved", msg, removed)
+
+    def delete(self, msg: dict[str, Any]) -> None:
+        self._record("messagesDeleted", msg)
+        del self.messages[msg["id"]]
+        thread = self.threads[msg["threadId"]]
+        thread.remove(msg["id"])
+        if not thread:
+            del self.threads[msg["threadId"]]
+
+    def send(self, raw: str, thread_id: str | None, label: str = "SENT") -> dict[str, Any]:
+        rng = random.Random(len(self.messages))
+        thread_id = thread_id if thread_id in self.threads else f"{rng.getrandbits(64):016x}"
+        msg = fixtures.make_message(rng, f"{rng.getrandbits(64):016x}", thread_id, paragraphs=1, mime_parts=2)
+        msg["labelIds"] = [label]
+        msg["internalDate"] = str(int(time.time() * 1000))
+        msg["sizeEstimate"] = len(raw) * 3 // 4
+        self.messages[msg["id"]] = msg
+        self.threads.setdefault(thread_id, []).append(msg["id"])
+        self._order.insert(0, msg["id"])
+        self._record("messagesAdded", msg)
+        return {"id": msg["id"], "threadId": thread_id, "labelIds": [label]}
+
+    def import_message(self, raw: bytes, label_ids: list[str]) -> dict[str, Any]:
+        """messages.import: store ``raw`` as-is (headers, text body, Date as internalDate)."""
+        parsed = BytesParser(policy=default_policy).parsebytes(raw)
+        rng = random.Random(len(self.messages))
+        body = parsed.get_body(("plain",))
+        text = body.get_content() if body is not None else ""
+        try:
+            internal = int(parsedate_to_datetime(parsed["Date"]).timestamp() * 1000)
+        except (TypeError, ValueError):
+            internal = int(time.time() * 1000)
+        msg = {
+            "id": f"{rng.getrandbits(64):016x}",
+            "threadId": f"{rng.getrandbits(64):016x}",
+            "labelIds": list(label_ids),
+            "snippet": " ".join(text.split())[:100],
+            "sizeEstimate": len(raw),
+            "internalDate": str(internal),
+            "payload": {
+                "mimeType": "text/plain",
+                "headers": [{"name": name, "value": str(value)} for name, value in parsed.items()],
+                "body": {"size": len(text), "data": base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")},
+            },
+        }
+        self.messages[msg["id"]] = msg
+        self.threads[msg["threadId"]] = [msg["id"]]
+        self._order.insert(0, msg["id"])
+        self._record("messagesAdded", msg)
+        return {"id": msg["id"], "threadId": msg["threadId"], "labelIds": msg["labelIds"]}
+
+    def labels(self) -> list[dict[str, Any]]:
+        labels = [{"id": lid, "name": lid, "type": "system"} for lid in SYSTEM_LABELS]
+        labels += [{"id": lid, "name": name, "type": "user"} for lid, name in self.user_labels.items()]
+        return labels
+
+    def get_label(self, label_id: str) -> dict[str, Any] | None:
+        label = next((lab for lab in self.labels() if lab["id"] == label_id), None)
+        if label is None:
+            return None
+        tagged = [m for m in self.messages.values() if label_id in m["labelIds"]]
+        unread = [m for m in tagged if "UNREAD" in m["labelIds"]]
+        return {
+            **label,
+            "messagesTotal": len(tagged),
+            "messagesUnread": len(unread),
+            "threadsTotal": len({m["threadId"] for m in tagged}),
+            "threadsUnread": len({m["threadId"] for m in unread}),
+        }
+
+    def list_history(self, start: int, max_results: int, page_token: str | None, label_id: str | None, types: list[str]) -> dict[str, Any]:
+        wanted = {t.replace("message", "messages", 1).replace("label", "labels", 1) for t in types}  # messageAdded -> messagesAdded
+        records = [
+            r for r in self.history
+            if int(r["id"]) > start
+            and (not label_id or any(label_id in m["labelIds"] for m in r["messages"]))
+            and (not wanted or wanted & set(r))
+        ]
+        offset = int(page_token or 0)
+        result: dict[str, Any] = {"historyId": str(self.history_id)}
+        if records[offset:offset + max_results]:
+            result["history"] = records[offset:offset + max_results]
+        if offset + max_results < len(records):
+            result["nextPageToken"] = str(offset + max_results)
+        return result
+
+
+def _error(status: int, message: str) -> tuple[int, dict[str, Any]]:
+    return status, {"error": {"code": status, "message": message}}
+
+
+class FakeGmailApp:
+    """Routes REST calls to a FakeMailbox and injects latency and throttling."""
+
+    def __init__(
+        self,
+        mailbox: FakeMailbox,
+        *,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        push_endpoint: str | None = None,
+        upload_drop_every: int = 0,
+        seed: int = 11,
+    ) -> None:
+        self.mailbox = mailbox
+        self.upload_drop_every = upload_drop_every
+        self.uploads: dict[str, dict[str, Any]] = {}
+        self.received: dict[str, bytes] = {}  # message ID -> uploaded RFC 822 bytes
+        self._chunks = 0
+        self.push_endpoint = push_endpoint
+        self.watch: dict[str, Any] | None = None
+        self._published = 0
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.stats: Counter[str] = Counter()
+        self._stats_lock = threading.Lock()
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def delay(self) -> None:
+        delay = self.latency_ms + (self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def throttled(self) -> bool:
+        return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def handle(self, method: str, target: str, body: bytes) -> tuple[int, dict[str, Any]]:
+        """Serve one (non-batch) API call, counting it toward the stats."""
+        parts = urlsplit(target)
+        path = parts.path
+        self.count("requests")
+        self.count(f"method:{api_method(method, path)}")
+        self.count("quota_units", quota_units(method, path))
+        if self.throttled():
+            self.count("throttled")
+            return _error(429, "Rate Limit Exceeded")
+        params = {k: v for k, v in parse_qs(parts.query).items()}
+        payload = json.loads(body) if body else {}
+        return self._locked(self._route, method, path, params, payload)
+
+    def _locked(self, fn: Any, *args: Any) -> Any:
+        """Run ``fn`` under the mailbox lock, publishing a push delivery if history moved."""
+        with self.mailbox.lock:
+            before = self.mailbox.history_id
+            result = fn(*args)
+            after = self.mailbox.history_id
+        if after != before and self.watch and self.push_endpoint:
+            threading.Thread(target=self.publish, args=(after,), daemon=True).start()
+        return result
+
+    def handle_upload(self, method: str, target: str, headers: Any, body: bytes, host: str) -> tuple[int, dict[str, str], dict[str, Any]]:
+        """Serve ``/upload/gmail/v1/...``; returns (status, extra headers, JSON payload)."""
+        parts = urlsplit(target)
+        params = parse_qs(parts.query)
+        self.count("requests")
+        route = re.fullmatch(r"/upload/gmail/v1/users/me/(messages/send|messages/import|drafts)", parts.path)
+        if route is None:
+            status, payload = _error(404, f"Unknown path {parts.path}")
+            return status, {}, payload
+        upload_type = params.get("uploadType", [""])[0]
+        upload_id = params.get("upload_id", [None])[0]
+        if method == "POST" and upload_id is None:
+            self.count(f"method:{api_method(method, parts.path)}")
+            self.count("quota_units", quota_units(method, parts.path))
+            if upload_type == "media":
+                self.count("upload_bytes", len(body))
+                return 200, {}, self._finish_upload(route.group(1), body, {})
+            if upload_type == "multipart":
+                boundary = re.search(r'boundary="?([^";]+)"?', headers.get("Content-Type", ""))
+                sections = body.split(b"--" + boundary.group(1).encode("ascii")) if boundary else []
+                if len(sections) < 3:
+                    status, payload = _error(400, "Bad multipart upload")
+                    return status, {}, payload
+                metadata, raw = (section.split(b"\r\n\r\n", 1)[1][:-2] for section in sections[1:3])
+                self.count("upload_bytes", len(raw))
+                return 200, {}, self._finish_upload(route.group(1), raw, json.loads(metadata or b"{}"))
+            if upload_type == "resumable":
+                upload_id = uuid.uuid4().hex
+                self.uploads[upload_id] = {
+                    "route": route.group(1),
+                    "metadata": json.loads(body) if body else {},
+                    "total": int(headers.get("X-Upload-Content-Length", 0) or 0),
+                    "data": bytearray(),
+                }
+                location = f"http://{host}{parts.path}?uploadType=resumable&upload_id={upload_id}"
+                return 200, {"Location": location}, {}
+            status, payload = _error(400, f"Unsupported uploadType {upload_type!r}")
+            return status, {}, payload
+        session = self.uploads.get(upload_id or "")
+        if method != "PUT" or session is None:
+            status, payload = _error(404, "No such upload session")
+            return status, {}, payload
+        match = re.fullmatch(r"bytes (?:(\d+)-(\d+)|\*)/(\d+)", headers.get("Content-Range", ""))
+        if match is None:
+            status, payload = _error(400, "Bad Content-Range")
+            return status, {}, payload
+        data = session["data"]
+        if match.group(1) is not None:
+            self.count("upload_chunks")
+            start = int(match.group(1))
+            if start != len(data):
+                status, payload = _error(400, f"Chunk starts at {start}, expected {len(data)}")
+                return status, {}, payload
+            self._chunks += 1
+            if self.upload_drop_every and self._chunks % self.upload_drop_every == 0:
+                data.extend(body[: len(body) // 2])
+                self.count("upload_bytes", len(body) // 2)
+                self.count("upload_dropped")
+                status, payload = _error(503, "Backend Error")
+                return status, {}, payload
+            data.extend(body)
+            self.count("upload_bytes", len(body))
+        else:
+            self.count("upload_queries")
+        if len(data) >= session["total"]:
+            del self.uploads[upload_id]
+            return 200, {}, self._finish_upload(session["route"], bytes(data), session["metadata"])
+        return 308, {"Range": f"bytes=0-{len(data) - 1}"} if data else {}, {}
+
+    def _finish_upload(self, route: str, raw: bytes, metadata: dict[str, Any]) -> dict[str, Any]:
+        if route == "messages/import":
+            message = self._locked(self.mailbox.import_message, raw, metadata.get("labelIds", []))
+            self.received[message["id"]] = raw
+            return message
+        encoded = base64.urlsafe_b64encode(raw).decode("ascii")
+        if route == "drafts":
+            thread_id = metadata.get("message", {}).get("threadId")
+            message = self._locked(self.mailbox.send, encoded, thread_id, "DRAFT")
+            self.received[message["id"]] = raw
+            return {"id": f"r{message['id']}", "message": message}
+        message = self._locked(self.mailbox.send, encoded, metadata.get("threadId"))
+        self.received[message["id"]] = raw
+        return message
+
+    def publish(self, history_id: int) -> None:
+        """POST a Pub/Sub-style push delivery for ``history_id`` to the push endpoint."""
+        self._published += 1
+        data = json.dumps({"emailAddress": self.mailbox.email, "historyId": history_id}).encode("utf-8")
+        envelope = {
+            "message": {
+                "data": base64.b64encode(data).decode("ascii"),
+                "messageId": str(self._published),
+                "publishTime": datetime.now(timezone.utc).isoformat(),
+            },
+            "subscription": "projects/fake/subscriptions/gmail-push",
+        }
+        request = urllib.request.Request(
+            self.push_endpoint, json.dumps(envelope).encode("utf-8"), {"Content-Type": "application/json"},
+        )
+        try:
+            urllib.request.urlopen(request, timeout=10).close()
+            self.count("pushed")
+        except OSError:
+            self.count("push_failed")
+
+    def _route(self, method: str, path: str, params: dict[str, list[str]], payload: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        box = self.mailbox
+        one = lambda key, default=None: params.get(key, [default])[0]  # noqa: E731
+        match = re.fullmatch(r"/gmail/v1/users/me/(.*)", path)
+        if not match:
+            return _error(404, f"Unknown path {path}")
+        route = match.group(1)
+
+        if method == "GET" and route == "profile":
+            return 200, box.profile()
+        if method == "GET" and route in ("messages", "threads"):
+            lister = box.list_messages if route == "messages" else box.list_threads
+            return 200, lister(one("q"), params.get("labelIds", []), int(one("maxResults", 100)), one("pageToken"))
+        if method == "POST" and route == "messages/send":
+            return 200, box.send(payload.get("raw", ""), payload.get("threadId"))
+        if method == "POST" and route == "messages/batchModify":
+            for mid in payload.get("ids", []):
+                if mid in box.messages:
+                    box.modify(box.messages[mid], payload.get("addLabelIds", []), payload.get("removeLabelIds", []))
+            return 204, {}
+        if method == "POST" and route == "watch":
+            self.watch = payload
+            expiration = int(time.time() * 1000) + 7 * 86_400_000
+            return 200, {"historyId": str(box.history_id), "expiration": str(expiration)}
+        if method == "POST" and route == "stop":
+            self.watch = None
+            return 204, {}
+        if method == "GET" and route == "labels":
+            return 200, {"labels": box.labels()}
+        if method == "POST" and route == "labels":
+            if any(lab["name"].lower() == payload.get("name", "").lower() for lab in box.labels()):
+                return _error(409, "Label name exists or conflicts")
+            label_id = f"Label_{100 + len(box.user_labels)}"
+            box.user_labels[label_id] = payload["name"]
+            return 200, {"id": label_id, "name": payload["name"], "type": "user"}
+        if method == "GET" and route == "history":
+            return 200, box.list_history(
+                int(one("startHistoryId", 0)), int(one("maxResults", 100)), one("pageToken"),
+                one("labelId"), params.get("historyTypes", []),
+            )
+
+        m = re.fullmatch(r"labels/([^/]+)", route)
+        if m and method == "GET":
+            label = box.get_label(m.group(1))
+            return (200, label) if label else _error(404, "Label not found")
+
+        m = re.fullmatch(r"threads/([^/]+)(?:/(modify|trash|untrash))?", route)
+        if m:
+            thread_id, action = m.groups()
+            if thread_id not in box.threads:
+                return _error(404, "Requested entity was not found.")
+            if method == "GET" and action is None:
+                return 200, box.get_thread(thread_id, one("format", "full"), params.get("metadataHeaders"))
+            if method == "POST" and action:
+                add, remove = payload.get("addLabelIds", []), payload.get("removeLabelIds", [])
+                if action == "trash":
+                    add, remove = ["TRASH"], []
+                elif action == "untrash":
+                    add, remove = [], ["TRASH"]
+                for mid in box.threads[thread_id]:
+                    box.modify(box.messages[mid], add, remove)
+                return 200, box.get_thread(thread_id, "minimal", None)
+
+        m = re.fullmatch(r"messages/([^/]+)(?:/(modify|trash|untrash))?", route)
+        if m:
+            message_id, action = m.groups()
+            msg = box.messages.get(message_id)
+            if msg is None:
+                return _error(404, "Requested entity was not found.")
+            if method == "GET" and action is None:
+                return 200, box.format_message(msg, one("format", "full"), params.get("metadataHeaders"))
+            if method == "DELETE" and action is None:
+                box.delete(msg)
+                return 204, {}
+            if method == "POST" and action == "modify":
+                box.modify(msg, payload.get("addLabelIds", []), payload.get("removeLabelIds", []))
+                return 200, box.format_message(msg, "minimal")
+            if method == "POST" and action in ("trash", "untrash"):
+                box.modify(msg, *((["TRASH"], []) if action == "trash" else ([], ["TRASH"])))
+                return 200, box.format_message(msg, "minimal")
+
+        return _error(404, f"Unsupported {method} {path}")
+
+    def handle_batch(self, content_type: str, body: bytes) -> tuple[int, str, bytes]:
+        """Serve a multipart/mixed batch; returns (status, content type, body)."""
+        match = re.search(r'boundary="?([^";]+)"?', content_type)
+        if not match:
+            return 400, "application/json", b'{"error": {"code": 400, "message": "Missing boundary"}}'
+        boundary = match.group(1)
+        text = body.decode("utf-8").replace("\r\n", "\n")
+        items = [p for p in text.split(f"--{boundary}") if p.strip() and p.strip() != "--"]
+        if len(items) > 100:
+            return 400, "application/json", b'{"error": {"code": 400, "message": "Too many requests in batch"}}'
+        self.count("batches")
+        out_boundary = "batch_fake_response"
+        chunks = []
+        for item in items:
+            outer, _, inner = item.strip("\n").partition("\n\n")
+            cid = re.search(r"(?im)^content-id:\s*<?([^>\n]+)>?", outer)
+            head, _, inner_body = inner.partition("\n\n")
+            method, target, _ = head.splitlines()[0].split(" ", 2)
+            status, payload = self.handle(method, target, inner_body.strip().encode("utf-8"))
+            text = json.dumps(payload) if payload else ""
+            chunks.append(
+                f"--{out_boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{cid.group(1) if cid else ''}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{text}\r\n"
+            )
+        chunks.append(f"--{out_boundary}--\r\n")
+        return 200, f"multipart/mixed; boundary={out_boundary}", "".join(chunks).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeGmailServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def _send(self, status: int, content_type: str, body: bytes, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self) -> None:
+        app = self.server.app
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        path = urlsplit(self.path).path
+        if path == "/_stats":
+            with app._stats_lock:
+                snapshot = dict(app.stats)
+                if self.command == "POST":
+                    app.stats.clear()
+            self._send(200, "application/json", json.dumps(snapshot).encode("utf-8"))
+            return
+        app.delay()
+        if path == "/batch/gmail/v1" and self.command == "POST":
+            self._send(*app.handle_batch(self.headers.get("Content-Type", ""), body))
+            return
+        if path.startswith("/upload/"):
+            status, headers, payload = app.handle_upload(self.command, self.path, self.headers, body, self.headers.get("Host", ""))
+            self._send(status, "application/json", json.dumps(payload).encode("utf-8") if payload else b"", headers)
+            return
+        status, payload = app.handle(self.command, self.path, body)
+        self._send(status, "application/json", json.dumps(payload).encode("utf-8") if status != 204 else b"")
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+
+class FakeGmailServer(ThreadingHTTPServer):
+    """Threaded HTTP server bound to a FakeGmailApp. Use ``start()`` to serve in the background."""
+
+    daemon_threads = True
+
+    def __init__(self, app: FakeGmailApp, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.app = app
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, name="fake-gmail", daemon=True)
+        thread.start()
+        return thread
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--threads", type=int, default=200, help="threads in the seeded mailbox")
+    parser.add_argument("--messages-per-thread", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="mean injected latency per HTTP request")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 429")
+    parser.add_argument("--push-endpoint", help="POST Pub/Sub-style push deliveries here after users.watch")
+    parser.add_argument("--upload-drop-every", type=int, default=0, help="fail every Nth resumable upload chunk halfway")
+    args = parser.parse_args(argv)
+
+    mailbox = FakeMailbox(args.threads, args.messages_per_thread)
+    app = FakeGmailApp(
+        mailbox, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        push_endpoint=args.push_endpoint, upload_drop_every=args.upload_drop_every,
+    )
+    server = FakeGmailServer(app, args.host, args.port)
+    print(f"fake Gmail API serving {len(mailbox.messages)} messages at {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""Synthetic but realistically shaped Gmail API payloads for benchmarks and load tests.
+
+Everything is generated from a seeded ``random.Random`` so runs are
+reproducible. Shapes follow what ``users.messages.get`` / ``threads.get`` /
+``messages.list`` / ``history.list`` return with ``format=full``: deep MIME
+trees, 20+ headers per message, base64url bodies, empty ``filename`` values
+and attachment stubs.
+"""
+
+from __future__ import annotations
+
+import base64
+import random
+from typing import Any
+
+_WORDS = (
+    "meeting project update deadline review invoice budget quarterly team offsite "
+    "schedule proposal draft feedback launch release customer contract renewal "
+    "agenda notes action items follow up thanks regards please confirm attached"
+).split()
+_NAMES = ["Alice Smith", "Bob Jones", "Carol White", "Dan Brown", "Eve Black", "Frank Green"]
+_DOMAINS = ["example.com", "corp.example.org", "mail.example.net"]
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii")
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "\n\n".join(_sentence(rng, rng.randint(12, 40)) for _ in range(count))
+
+
+def _address(rng: random.Random) -> str:
+    name = rng.choice(_NAMES)
+    local = name.lower().replace(" ", ".")
+    return f"{name} <{local}@{rng.choice(_DOMAINS)}>"
+
+
+def _headers(rng: random.Random, msg_index: int, subject: str) -> list[dict[str, str]]:
+    headers = [
+        {"name": "Delivered-To", "value": "me@example.com"},
+        *(
+            {"name": "Received", "value": f"by 10.0.{rng.randint(0, 255)}.{hop} with SMTP id {rng.getrandbits(64):x}; Mon, 6 Jan 2025 10:{hop:02d}:00 -0800"}
+            for hop in range(4)
+        ),
+        {"name": "ARC-Seal", "value": "i=1; a=rsa-sha256; t=1736186400; cv=none; d=google.com; s=arc-20160816; b=" + _b64(rng.randbytes(96))},
+        {"name": "DKIM-Signature", "value": "v=1; a=rsa-sha256; c=relaxed/relaxed; d=example.com; s=s1; b=" + _b64(rng.randbytes(128))},
+        {"name": "MIME-Version", "value": "1.0"},
+        {"name": "From", "value": _address(rng)},
+        {"name": "To", "value": ", ".join(_address(rng) for _ in range(rng.randint(1, 4)))},
+        {"name": "Cc", "value": ", ".join(_address(rng) for _ in range(rng.randint(0, 3)))},
+        {"name": "Date", "value": f"Mon, {1 + msg_index % 28} Jan 2025 10:{msg_index % 60:02d}:00 -0800"},
+        {"name": "Subject", "value": subject},
+        {"name": "Message-ID", "value": f"<{rng.getrandbits(96):x}@example.com>"},
+        {"name": "References", "value": " ".join(f"<{rng.getrandbits(64):x}@example.com>" for _ in range(min(msg_index, 10)))},
+        {"name": "Content-Type", "value": 'multipart/mixed; boundary="000000000000abcdef"'},
+    ]
+    return headers
+
+
+def _text_part(part_id: str, mime_type: str, text: str) -> dict[str, Any]:
+    data = text.encode("utf-8")
+    return {
+        "partId": part_id,
+        "mimeType": mime_type,
+        "filename": "",
+        "headers": [{"name": "Content-Type", "value": f'{mime_type}; charset="UTF-8"'}],
+        "body": {"size": len(data), "data": _b64(data)},
+    }
+
+
+def _html(text: str) -> str:
+    paragraphs = "".join(f"<tr><td style=\"padding:8px;font-family:Arial\"><p>{p}</p></td></tr>" for p in text.split("\n\n"))
+    return f"<html><head><style>p{{margin:0}}</style></head><body><table width=\"600\">{paragraphs}</table></body></html>"
+
+
+def _image_part(rng: random.Random, part_id: str, index: int, inline: bool) -> dict[str, Any]:
+    size = rng.randint(2_000, 80_000)
+    headers = [
+        {"name": "Content-Type", "value": f'image/png; name="image{index}.png"'},
+        {"name": "Content-Disposition", "value": f'{"inline" if inline else "attachment"}; filename="image{index}.png"'},
+        {"name": "Content-Transfer-Encoding", "value": "base64"},
+    ]
+    if inline:
+        headers.append({"name": "Content-ID", "value": f"<ii_{rng.getrandbits(48):x}>"})
+    return {
+        "partId": part_id,
+        "mimeType": "image/png",
+        "filename": f"image{index}.png",
+        "headers": headers,
+        "body": {"attachmentId": "ANGjdJ" + _b64(rng.randbytes(180)), "size": size},
+    }
+
+
+def make_message(
+    rng: random.Random,
+    message_id: str,
+    thread_id: str,
+    *,
+    msg_index: int = 0,
+    mime_parts: int = 4,
+    paragraphs: int = 6,
+    quoted: str = "",
+) -> dict[str, Any]:
+    """Build a ``format=full`` message with roughly ``mime_parts`` leaf parts.
+
+    The first two leaves are text/plain and text/html alternatives; the rest
+    are inline images (in a multipart/related) and image attachments.
+    """
+    subject = "Re: " + _sentence(rng, 5)[:-1]
+    text = _paragraphs(rng, paragraphs)
+    if quoted:
+        text += "\n\nOn Mon, Jan 6, 2025 someone wrote:\n" + "\n".join("> " + line for line in quoted.splitlines())
+    alternative = {
+        "partId": "0",
+        "mimeType": "multipart/alternative",
+        "filename": "",
+        "headers": [{"name": "Content-Type", "value": 'multipart/alternative; boundary="alt"'}],
+        "body": {"size": 0},
+        "parts": [_text_part("0.0", "text/plain", text), _text_part("0.1", "text/html", _html(text))],
+    }
+    images = max(mime_parts - 2, 0)
+    inline_count = images // 2
+    related = {
+        "partId": "1",
+        "mimeType": "multipart/related",
+        "filename": "",
+        "headers": [{"name": "Content-Type", "value": 'multipart/related; boundary="rel"'}],
+        "body": {"size": 0},
+        "parts": [_image_part(rng, f"1.{i}", i, inline=True) for i in range(inline_count)],
+    }
+    attachments = [_image_part(rng, str(2 + i), inline_count + i, inline=False) for i in range(images - inline_count)]
+    parts = [alternative] + ([related] if inline_count else []) + attachments
+    size_estimate = sum(p["body"]["size"] for p in alternative["parts"]) + sum(
+        p["body"]["size"] for p in related["parts"] + attachments
+    )
+    return {
+        "id": message_id,
+        "threadId": thread_id,
+        "labelIds": rng.sample(["INBOX", "UNREAD", "IMPORTANT", "CATEGORY_UPDATES", "Label_12", "STARRED"], 3),
+        "snippet": text[:160],
+        "sizeEstimate": size_estimate,
+        "historyId": str(9_000_000 + msg_index),
+        "internalDate": str(1_736_186_400_000 + msg_index * 60_000),
+        "payload": {
+            "partId": "",
+            "mimeType": "multipart/mixed",
+            "filename": "",
+            "headers": _headers(rng, msg_index, subject),
+            "body": {"size": 0},
+            "parts": parts,
+        },
+    }
+
+
+def make_thread(messages: int = 100, *, seed: int = 1, mime_parts: int = 4, quote_history: bool = True) -> dict[str, Any]:
+    """Build a ``threads.get`` response; later messages quote the previous body like real reply chains."""
+    rng = random.Random(seed)
+    thread_id = f"{rng.getrandbits(64):016x}"
+    items: list[dict[str, Any]] = []
+    previous = ""
+    for i in range(messages):
+        msg = make_message(
+            rng,
+            f"{rng.getrandbits(64):016x}",
+            thread_id,
+            msg_index=i,
+            mime_parts=mime_parts,
+            paragraphs=3,
+            quoted=previous if quote_history else "",
+        )
+        if quote_history:
+            plain = msg["payload"]["parts"][0]["parts"][0]["body"]["data"]
+            previous = base64.urlsafe_b64decode(plain).decode("utf-8")[-20_000:]
+        items.append(msg)
+    return {"id": thread_id, "historyId": items[-1]["historyId"], "messages": items}
+
+
+def make_mime_heavy_message(parts: int = 30, *, seed: int = 2) -> dict[str, Any]:
+    """Build one message with ``parts`` leaf MIME parts, mostly inline images."""
+    rng = random.Random(seed)
+    return make_message(rng, f"{rng.getrandbits(64):016x}", f"{rng.getrandbits(64):016x}", mime_parts=parts, paragraphs=20)
+
+
+def _newsletter_html(rng: random.Random, stories: int) -> str:
+    blocks = []
+    for i in range(stories):
+        url = f"https://news.example.com/story/{i}?utm_source=newsletter&amp;utm_medium=email&amp;id={rng.getrandbits(32):x}"
+        blocks.append(
+            '<tr><td style="padding:0 24px"><table role="presentation" width="100%" cellpadding="0" cellspacing="0"><tr>'
+            f'<td width="120"><a href="{url}"><img src="https://cdn.example.com/{i}.jpg" width="120" alt="Story {i}"></a></td>'
+            f'<td style="font-family:Helvetica,Arial;font-size:15px;line-height:22px"><h2 style="margin:0">{_sentence(rng, 6)}</h2>'
+            f'<p>{_sentence(rng, rng.randint(30, 60))} <a href="{url}" style="color:#1a73e8">Read more &rarr;</a></p></td>'
+            '</tr></table></td></tr>'
+        )
+    style = "".join(f".c{i}{{color:#{rng.getrandbits(24):06x};padding:{i}px}}" for i in range(200))
+    return (
+        f'<!DOCTYPE html><html><head><meta charset="utf-8"><style>{style}</style>'
+        '<!--[if mso]><style>table{border-collapse:collapse}</style><![endif]--></head><body>'
+        f'<div style="display:none;max-height:0;overflow:hidden">{_sentence(rng, 20)}&zwnj;&nbsp;&zwnj;&nbsp;</div>'
+        '<center><table role="presentation" width="600" cellpadding="0" cellspacing="0">'
+        + "".join(blocks)
+        + '<tr><td style="font-size:11px"><a href="https://news.example.com/unsubscribe?u=1">Unsubscribe</a> | '
+        '<a href="https://news.example.com/prefs">Preferences</a></td></tr></table></center>'
+        f'<img src="https://t.example.com/open/{rng.getrandbits(64):x}.gif" width="1" height="1" alt="">'
+        '<script>window.track && track()</script></body></html>'
+    )
+
+
+def make_newsletter(stories: int = 60, *, seed: int = 5) -> dict[str, Any]:
+    """Build an HTML-only newsletter: nested layout tables, inline styles, tracking pixel, many links."""
+    rng = random.Random(seed)
+    headers = _headers(rng, 0, "Your weekly digest")
+    headers[-1] = {"name": "Content-Type", "value": 'text/html; charset="UTF-8"'}
+    html = _text_part("0", "text/html", _newsletter_html(rng, stories))
+    return {
+        "id": f"{rng.getrandbits(64):016x}",
+        "threadId": f"{rng.getrandbits(64):016x}",
+        "labelIds": ["INBOX", "CATEGORY_PROMOTIONS"],
+        "snippet": _sentence(rng, 20)[:200],
+        "sizeEstimate": html["body"]["size"] + 4000,
+        "internalDate": "1736186400000",
+        "payload": {**html, "headers": headers},
+    }
+
+
+def make_list_page(items: int = 500, *, seed: int = 3) -> dict[str, Any]:
+    """Build a ``messages.list`` page with ``items`` id/threadId pairs."""
+    rng = random.Random(seed)
+    return {
+        "messages": [{"id": f"{rng.getrandbits(64):016x}", "threadId": f"{rng.getrandbits(64):016x}"} for _ in range(items)],
+        "nextPageToken": f"{rng.getrandbits(80):020d}",
+        "resultSizeEstimate": items * 7,
+    }
+
+
+def make_history_page(records: int = 500, *, seed: int = 4) -> dict[str, Any]:
+    """Build a full ``history.list`` page mixing added/deleted/label-change records."""
+    rng = random.Random(seed)
+    history: list[dict[str, Any]] = []
+    for i in range(records):
+        message = {
+            "id": f"{rng.getrandbits(64):016x}",
+            "threadId": f"{rng.getrandbits(64):016x}",
+            "labelIds": rng.sample(["INBOX", "UNREAD", "IMPORTANT", "SENT", "Label_3"], 2),
+        }
+        record: dict[str, Any] = {"id": str(8_000_000 + i), "messages": [message]}
+        kind = rng.choice(["messagesAdded", "messagesDeleted", "labelsAdded", "labelsRemoved"])
+        if kind in ("messagesAdded", "messagesDeleted"):
+            record[kind] = [{"message": message}]
+        else:
+            record[kind] = [{"message": message, "labelIds": [rng.choice(["UNREAD", "STARRED", "Label_3"])]}]
+        history.append(record)
+    return {"history": history, "nextPageToken": "next", "historyId": str(8_000_000 + records)}
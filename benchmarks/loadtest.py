@@ -0,0 +1,273 @@
+"""End-to-end load test: fake Gmail API + gmail_mcp + concurrent MCP tool calls.
+
+By default this starts ``benchmarks.fake_gmail`` in-process, writes a fake
+token into a temporary ``SECRETS_DIR``, launches ``python -m gmail_mcp`` over
+stdio pointed at the fake (via ``GMAIL_API_ROOT``), and fires a weighted mix
+of tool calls from ``--concurrency`` workers. Message and thread ids are
+drawn from a skewed distribution so hot items repeat, as they do when agents
+fan out. It reports p50/p95/p99 latency per tool, throughput, and the fake
+server's request/quota/429 counters::
+
+    python -m benchmarks.loadtest --concurrency 16 --requests 1000 --latency-ms 40
+    python -m benchmarks.loadtest --error-rate 0.05 --json results.json
+
+To drive a server in ``--transport http`` mode, start the fake and the
+server yourself — the server with ``SECRETS_DIR`` set to the
+``--secrets-dir`` used by ``--write-token-only`` and ``GMAIL_API_ROOT`` set to
+the fake's URL — then pass ``--url``. ``--sessions`` spreads the workers
+over that many concurrent MCP sessions::
+
+    python -m benchmarks.fake_gmail --port 8765 &
+    python -m benchmarks.loadtest --secrets-dir /tmp/lt --write-token-only
+    SECRETS_DIR=/tmp/lt GMAIL_API_ROOT=http://127.0.0.1:8765 python -m gmail_mcp --transport http &
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000/mcp --gmail-url http://127.0.0.1:8765 --sessions 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Any
+
+import httpx
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from .fake_gmail import FakeGmailApp, FakeGmailServer, FakeMailbox
+
+DEFAULT_MIX = {
+    "gmail_message_get:metadata": 30,
+    "gmail_message_get:full": 15,
+    "gmail_thread_get": 15,
+    "gmail_messages_list": 10,
+    "gmail_labels_list": 10,
+    "gmail_message_modify": 10,
+    "gmail_history_list": 10,
+}
+
+
+def write_token(secrets_dir: Path, account: str) -> None:
+    """Write a non-expiring fake token so the SDK never tries to refresh."""
+    secrets_dir.mkdir(parents=True, exist_ok=True)
+    token = {"access_token": "loadtest", "refresh_token": "loadtest", "expires_at": time.time() + 10 * 365 * 86_400}
+    (secrets_dir / f"gmail-{account}.json").write_text(json.dumps(token))
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def parse_mix(spec: str | None) -> dict[str, float]:
+    """Parse ``name=weight,name=weight`` into a mix dict (default mix when empty)."""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Workload:
+    """Generates tool calls from a weighted mix over a skewed id population."""
+
+    def __init__(self, mix: dict[str, float], account: str, message_ids: list[str], thread_ids: list[str], start_history_id: str, seed: int = 5) -> None:
+        self.rng = random.Random(seed)
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.account = account
+        self.message_ids = message_ids
+        self.thread_ids = thread_ids
+        self.start_history_id = start_history_id
+        self._skew = lambda n: [1 / (i + 1) for i in range(n)]  # noqa: E731
+
+    def _pick(self, ids: list[str]) -> str:
+        return self.rng.choices(ids, weights=self._skew(len(ids)))[0]
+
+    def next_call(self) -> tuple[str, str, dict[str, Any]]:
+        """Return (label, tool name, arguments) for the next call."""
+        label = self.rng.choices(self.names, weights=self.weights)[0]
+        tool, _, variant = label.partition(":")
+        args: dict[str, Any] = {"account": self.account}
+        if tool == "gmail_message_get":
+            args.update(message_id=self._pick(self.message_ids), response_format=variant or "full")
+        elif tool == "gmail_thread_get":
+            args.update(thread_id=self._pick(self.thread_ids))
+        elif tool == "gmail_messages_list":
+            args.update(query="is:unread", max_results=50)
+        elif tool == "gmail_message_modify":
+            key = "add_label_ids" if self.rng.random() < 0.5 else "remove_label_ids"
+            args.update(message_id=self._pick(self.message_ids), **{key: "STARRED"})
+        elif tool == "gmail_history_list":
+            args.update(start_history_id=self.start_history_id)
+        return label, tool, args
+
+
+def _is_error(result: Any) -> bool:
+    if result.isError:
+        return True
+    text = result.content[0].text if result.content else ""
+    return text.startswith("{") and '"error": true' in text[:64]
+
+
+async def _call_json(session: ClientSession, tool: str, args: dict[str, Any]) -> dict[str, Any]:
+    result = await session.call_tool(tool, args)
+    return json.loads(result.content[0].text)
+
+
+async def run_load(sessions: list[ClientSession], workload: Workload, requests: int, concurrency: int) -> tuple[dict[str, list[float]], dict[str, int], float]:
+    """Issue ``requests`` calls from ``concurrency`` workers spread over ``sessions``.
+
+    Returns latencies, errors and wall time.
+    """
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    remaining = requests
+
+    async def worker(session: ClientSession) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            label, tool, args = workload.next_call()
+            start = time.perf_counter()
+            try:
+                failed = _is_error(await session.call_tool(tool, args))
+            except Exception:
+                failed = True
+            latencies[label].append(time.perf_counter() - start)
+            if failed:
+                errors[label] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(sessions[i % len(sessions)]) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def report(latencies: dict[str, list[float]], errors: dict[str, int], wall: float, gmail_stats: dict[str, Any] | None) -> dict[str, Any]:
+    """Print a latency table and return the same numbers as a dict."""
+    rows: dict[str, dict[str, float]] = {}
+    everything = [v for values in latencies.values() for v in values]
+    for label, values in sorted(latencies.items()) + [("ALL", everything)]:
+        rows[label] = {
+            "count": len(values),
+            "errors": sum(errors.values()) if label == "ALL" else errors.get(label, 0),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+        }
+    width = max(len(label) for label in rows)
+    print(f"{'tool':<{width}}  {'count':>6}  {'errors':>6}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}")
+    for label, r in rows.items():
+        print(f"{label:<{width}}  {r['count']:>6}  {r['errors']:>6}  {r['p50_ms']:>8.1f}  {r['p95_ms']:>8.1f}  {r['p99_ms']:>8.1f}")
+    throughput = len(everything) / wall if wall else 0.0
+    print(f"\n{len(everything)} calls in {wall:.2f}s — {throughput:.1f} calls/s")
+    if gmail_stats:
+        print(
+            f"fake Gmail: {gmail_stats.get('requests', 0)} API calls, {gmail_stats.get('batches', 0)} batches, "
+            f"{gmail_stats.get('quota_units', 0)} quota units, {gmail_stats.get('throttled', 0)} throttled (429)"
+        )
+    return {"tools": rows, "wall_s": wall, "throughput": throughput, "gmail": gmail_stats}
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    secrets_dir = Path(args.secrets_dir or tempfile.mkdtemp(prefix="gmail-mcp-loadtest-"))
+    write_token(secrets_dir, args.account)
+
+    fake: FakeGmailServer | None = None
+    gmail_url = args.gmail_url
+    if gmail_url is None and args.url is None:
+        mailbox = FakeMailbox(args.threads, args.messages_per_thread)
+        app = FakeGmailApp(mailbox, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+        fake = FakeGmailServer(app)
+        fake.start()
+        gmail_url = fake.url
+
+    async with AsyncExitStack() as stack:
+        sessions: list[ClientSession] = []
+        if args.url:
+            from mcp.client.streamable_http import streamable_http_client
+
+            for _ in range(args.sessions):
+                read, write, _ = await stack.enter_async_context(streamable_http_client(args.url))
+                sessions.append(await stack.enter_async_context(ClientSession(read, write)))
+        else:
+            params = StdioServerParameters(
+                command=sys.executable,
+                args=["-m", "gmail_mcp"],
+                env={**os.environ, "SECRETS_DIR": str(secrets_dir), "GMAIL_API_ROOT": gmail_url or ""},
+            )
+            errlog = sys.stderr if args.verbose else open(os.devnull, "w")
+            read, write = await stack.enter_async_context(stdio_client(params, errlog=errlog))
+            sessions.append(await stack.enter_async_context(ClientSession(read, write)))
+        for session in sessions:
+            await session.initialize()
+        session = sessions[0]
+
+        listing = await _call_json(session, "gmail_messages_list", {"account": args.account, "max_results": 500})
+        profile = await _call_json(session, "gmail_get_profile", {"account": args.account})
+        messages = listing.get("messages", [])
+        if not messages:
+            raise SystemExit(f"No messages visible to account {args.account!r}: {listing}")
+        workload = Workload(
+            parse_mix(args.mix),
+            args.account,
+            [m["id"] for m in messages],
+            list(dict.fromkeys(m["threadId"] for m in messages)),
+            profile.get("historyId", "1"),
+        )
+        if gmail_url:
+            httpx.post(f"{gmail_url}/_stats")
+        latencies, errors, wall = await run_load(sessions, workload, args.requests, args.concurrency)
+
+    stats = httpx.get(f"{gmail_url}/_stats").json() if gmail_url else None
+    if fake is not None:
+        fake.shutdown()
+    return report(latencies, errors, wall, stats)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="total tool calls (default 500)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent in-flight calls (default 8)")
+    parser.add_argument("--mix", help="tool=weight list, e.g. 'gmail_thread_get=3,gmail_labels_list=1'")
+    parser.add_argument("--account", default="loadtest")
+    parser.add_argument("--url", help="MCP streamable-HTTP endpoint of an already running server")
+    parser.add_argument("--sessions", type=int, default=1, help="concurrent MCP sessions to open with --url (default 1)")
+    parser.add_argument("--gmail-url", help="use an already running fake Gmail server (for stats)")
+    parser.add_argument("--secrets-dir", help="where to write the fake token (default: temp dir)")
+    parser.add_argument("--write-token-only", action="store_true", help="write the fake token and exit")
+    parser.add_argument("--threads", type=int, default=200, help="threads in the seeded mailbox")
+    parser.add_argument("--messages-per-thread", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of Gmail calls answered with 429")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show the server's stderr")
+    args = parser.parse_args(argv)
+
+    if args.write_token_only:
+        if not args.secrets_dir:
+            parser.error("--write-token-only requires --secrets-dir")
+        write_token(Path(args.secrets_dir), args.account)
+        return
+    results = asyncio.run(main_async(args))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 """Allow running as `python -m gmail_mcp`."""
 
-from .server import mcp
+from .server import main
 
-mcp.run()
+main()
@@ -0,0 +1,199 @@
+"""Gmail batch endpoint — many REST calls in one multipart/mixed HTTP request.
+
+Each call becomes an ``application/http`` part of a POST to
+``/batch/gmail/v1``; the response carries one HTTP response per part,
+matched back by Content-ID. Gmail accepts up to ``MAX_BATCH_SIZE`` calls per
+batch and may run the calls of one batch in any order. Each call still
+costs its normal quota units, and parts answered with 429 or 5xx are
+retried in a follow-up batch.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import secrets
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+from urllib.parse import urlencode
+
+from gmail_sdk import GmailAPIError
+
+from .quota import QUOTA_UNITS, USER_UNITS_PER_SECOND, bucket, quota_units
+
+MAX_BATCH_SIZE = 100
+# messages.get calls per batch that one full units bucket can pay for (50 at the default 250/s)
+GET_BATCH_SIZE = max(1, min(MAX_BATCH_SIZE, int(USER_UNITS_PER_SECOND // QUOTA_UNITS["messages.get"])))
+BATCH_RETRIES = 3
+_API_PREFIX = "/gmail/v1"
+
+
+@dataclass
+class BatchRequest:
+    """One REST call, with ``path`` relative to ``/gmail/v1`` (e.g. ``/users/me/messages/abc``)."""
+
+    method: str
+    path: str
+    params: dict[str, Any] = field(default_factory=dict)
+    body: dict[str, Any] | None = None
+
+    def target(self) -> str:
+        params = {k: v for k, v in self.params.items() if v is not None}
+        query = urlencode(params, doseq=True)
+        return f"{_API_PREFIX}{self.path}{'?' + query if query else ''}"
+
+
+def _encode(requests: list[BatchRequest], boundary: str) -> bytes:
+    parts = []
+    for index, request in enumerate(requests):
+        body = json.dumps(request.body) if request.body is not None else ""
+        parts.append(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item{index}>\r\n\r\n"
+            f"{request.method} {request.target()} HTTP/1.1\r\n"
+            + ("Content-Type: application/json\r\n" if body else "")
+            + f"\r\n{body}\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return "".join(parts).encode("utf-8")
+
+
+def _parse(content_type: str, body: bytes) -> dict[int, tuple[int, Any]]:
+    """Map item index -> (HTTP status, decoded JSON body) for each part of a batch response."""
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if match is None:
+        raise GmailAPIError(502, f"Batch response is not multipart: {content_type!r}")
+    results: dict[int, tuple[int, Any]] = {}
+    for part in body.decode("utf-8").split(f"--{match.group(1)}"):
+        part = part.replace("\r\n", "\n").strip("\n")
+        if not part or part == "--":
+            continue
+        outer, _, inner = part.partition("\n\n")
+        item = re.search(r"(?im)^content-id:\s*<?response-item(\d+)>?", outer)
+        status = re.match(r"HTTP/\S+\s+(\d{3})", inner)
+        if item is None or status is None:
+            continue
+        payload = inner.partition("\n\n")[2].strip()
+        try:
+            decoded = json.loads(payload) if payload else {}
+        except ValueError:
+            decoded = {"error": {"message": payload}}
+        results[int(item.group(1))] = (int(status.group(1)), decoded)
+    return results
+
+
+def _error(status: int, payload: Any) -> GmailAPIError:
+    message = payload.get("error", {}).get("message", "") if isinstance(payload, dict) else str(payload)
+    return GmailAPIError(status, message or f"HTTP {status}")
+
+
+def _retryable(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def execute(client: Any, requests: list[BatchRequest]) -> list[Any]:
+    """Run ``requests`` through the batch endpoint, ``MAX_BATCH_SIZE`` at a time.
+
+    Returns one entry per request, in order: the decoded JSON body on
+    success (``{}`` for empty bodies) or a GmailAPIError.
+    """
+    http = client._http
+    url = str(http.base_url.copy_with(path="/batch/gmail/v1", query=None))
+    results: list[Any] = [None] * len(requests)
+    pending = list(range(len(requests)))
+    for attempt in range(BATCH_RETRIES + 1):
+        retry: list[int] = []
+        for start in range(0, len(pending), MAX_BATCH_SIZE):
+            chunk = pending[start:start + MAX_BATCH_SIZE]
+            boundary = f"batch_{secrets.token_hex(12)}"
+            response = http.post(
+                url,
+                content=_encode([requests[i] for i in chunk], boundary),
+                headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+            )
+            if response.status_code >= 400:
+                try:
+                    payload = response.json()
+                except ValueError:
+                    payload = {"error": {"message": response.text}}
+                if not _retryable(response.status_code) or attempt == BATCH_RETRIES:
+                    raise _error(response.status_code, payload)
+                retry.extend(chunk)
+                continue
+            parsed = _parse(response.headers.get("Content-Type", ""), response.content)
+            for position, index in enumerate(chunk):
+                status, payload = parsed.get(position, (502, {"error": {"message": "Missing from batch response"}}))
+                if status < 300:
+                    results[index] = payload
+                elif _retryable(status) and attempt < BATCH_RETRIES:
+                    retry.append(index)
+                else:
+                    results[index] = _error(status, payload)
+        if not retry:
+            break
+        pending = retry
+        time.sleep(0.5 * 2 ** attempt)
+    return results
+
+
+def execute_metered(client: Any, account: str, requests: list[BatchRequest]) -> list[Any]:
+    """``execute`` within the account's quota-unit bucket.
+
+    Requests are grouped into batches that one full bucket can pay for,
+    and each batch waits for its units before it is sent.
+    """
+    units = bucket(account, "units", USER_UNITS_PER_SECOND, USER_UNITS_PER_SECOND)
+    results: list[Any] = []
+    chunk: list[BatchRequest] = []
+    cost = 0
+    for request in requests:
+        price = quota_units(request.method, request.path)
+        if chunk and (len(chunk) == MAX_BATCH_SIZE or cost + price > units.capacity):
+            units.acquire(cost)
+            results += execute(client, chunk)
+            chunk, cost = [], 0
+        chunk.append(request)
+        cost += price
+    if chunk:
+        units.acquire(cost)
+        results += execute(client, chunk)
+    return results
+
+
+def get_messages(client: Any, account: str, message_ids: list[str], params: dict[str, Any]) -> list[dict[str, Any] | None]:
+    """``messages.get`` for each ID in one batch, within the account's quota-unit bucket.
+
+    Messages deleted since they were listed (404) come back as None; any
+    other error is raised.
+    """
+    bucket(account, "units", USER_UNITS_PER_SECOND, USER_UNITS_PER_SECOND).acquire(
+        QUOTA_UNITS["messages.get"] * len(message_ids)
+    )
+    fetched: list[dict[str, Any] | None] = []
+    for result in execute(client, [BatchRequest("GET", f"/users/me/messages/{i}", params) for i in message_ids]):
+        if isinstance(result, GmailAPIError):
+            if result.status_code != 404:
+                raise result
+            fetched.append(None)
+        else:
+            fetched.append(result)
+    return fetched
+
+
+def stream_messages(
+    client: Any,
+    account: str,
+    message_ids: list[str],
+    params: dict[str, Any],
+    pool: Executor,
+    batch_size: int = GET_BATCH_SIZE,
+    parallel: int = 4,
+) -> Iterator[dict[str, Any] | None]:
+    """Yield ``get_messages`` results in order, ``parallel`` batches in flight at a time."""
+    chunks = [message_ids[start:start + batch_size] for start in range(0, len(message_ids), batch_size)]
+    for window in range(0, len(chunks), parallel):
+        for fetched in pool.map(lambda chunk: get_messages(client, account, chunk, params), chunks[window:window + parallel]):
+            yield from fetched
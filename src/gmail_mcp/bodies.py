@@ -0,0 +1,277 @@
+"""Message body helpers — decode MIME payloads and strip quoted history.
+
+Gmail returns bodies as base64url inside a MIME tree. ``text_body`` decodes
+the text/plain part, falling back to text/html converted by ``html_to_text``:
+scripts, styles, hidden elements and tracking pixels are dropped, layout
+tables are flattened into lines and links become numbered footnotes. HTML
+conversions are kept in the content cache by (message ID, part ID), so
+re-reading a newsletter skips the parse.
+``QuoteTracker`` walks the messages of a thread in order and drops the quoted
+blocks each reply repeats, so a digest costs O(n) bytes instead of O(n²).
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import re
+from html.parser import HTMLParser
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .cache import content_cache
+
+_QUOTE_PREFIX = re.compile(r"^\s*((?:>\s?)+)")
+_ATTRIBUTION = re.compile(r"^\s*(On .+wrote:|.+ <[^>]+> wrote:|.+ schrieb:)\s*$", re.IGNORECASE)
+_FORWARD_MARKER = re.compile(r"^\s*(-{2,}\s*(Original Message|Forwarded message)\s*-{2,}|_{10,})\s*$", re.IGNORECASE)
+_SKIPPED_TAGS = {"script", "style", "head", "title", "noscript", "template", "svg"}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_HEAD_TAGS = {"title", "meta", "link", "style", "script", "base", "noscript", "template"}  # any other tag ends an unclosed <head>
+_BLOCK_TAGS = {
+    "p", "div", "tr", "table", "ul", "ol", "blockquote", "pre", "hr", "section", "article",
+    "header", "footer", "center", "h1", "h2", "h3", "h4", "h5", "h6",
+}
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden|max-height\s*:\s*0|font-size\s*:\s*0", re.IGNORECASE)
+_TRACKING_PARAM = re.compile(r"^(utm_|mc_|_hs|mkt_tok$|trk$)", re.IGNORECASE)
+_SPACE = re.compile(r"[ \t\r\f\v\u00a0\u200b\u200c\u034f]+")
+
+# Unquoted paragraphs shorter than this ("Thanks!", "Bob") are never treated
+# as repeats; Outlook-style quoting has no ">" markers to go on.
+MIN_REPEAT_CHARS = 40
+
+
+def decode_data(data: str) -> bytes:
+    """Decode a base64url body, tolerating missing padding."""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def find_part(payload: dict[str, Any], mime_type: str) -> dict[str, Any] | None:
+    """Return the first part of ``mime_type`` with inline data, depth-first."""
+    if payload.get("mimeType") == mime_type and payload.get("body", {}).get("data"):
+        return payload
+    for part in payload.get("parts", []):
+        found = find_part(part, mime_type)
+        if found is not None:
+            return found
+    return None
+
+
+def _clean_url(url: str) -> str:
+    """Drop campaign-tracking query parameters (utm_*, mc_*, ...)."""
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _TRACKING_PARAM.match(k)]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _is_pixel(attrs: dict[str, str | None]) -> bool:
+    for name in ("width", "height"):
+        value = (attrs.get(name) or "").strip().removesuffix("px")
+        if value.isdigit() and int(value) <= 2:
+            return True
+    return bool(_HIDDEN_STYLE.search(attrs.get("style") or ""))
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.out: list[str] = []
+        self.links: list[str] = []
+        self._link_index: dict[str, int] = {}
+        self._open: list[str] = []  # open non-void elements, outermost first
+        self._hidden_at: int | None = None  # index in _open of the element whose content is dropped
+        self._href: str | None = None
+        self._link_start = 0
+        self._link_alt = ""
+        self._pre = 0
+
+    def _close(self, depth: int) -> bool:
+        """Close the open elements from ``depth`` on; True if that ends the hidden element itself."""
+        del self._open[depth:]
+        if self._hidden_at is None or depth > self._hidden_at:
+            return False
+        ended, self._hidden_at = depth == self._hidden_at, None
+        return ended
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if "head" in self._open and tag not in _HEAD_TAGS:
+            self._close(self._open.index("head"))
+        if tag not in _VOID_TAGS:
+            self._open.append(tag)
+        if self._hidden_at is not None:
+            return
+        attributes = dict(attrs)
+        if tag not in _VOID_TAGS and (tag in _SKIPPED_TAGS or _HIDDEN_STYLE.search(attributes.get("style") or "")):
+            self._hidden_at = len(self._open) - 1
+            return
+        if tag in ("br", *_BLOCK_TAGS):
+            self.out.append("\n")
+        elif tag == "li":
+            self.out.append("\n- ")
+        elif tag in ("td", "th"):
+            self.out.append(" ")
+        elif tag == "pre":
+            self._pre += 1
+        elif tag == "img" and self._href is not None and not _is_pixel(attributes):
+            self._link_alt = self._link_alt or (attributes.get("alt") or "").strip()
+        elif tag == "a":
+            href = (attributes.get("href") or "").strip()
+            if href.lower().startswith(("http://", "https://")):
+                self._href, self._link_start, self._link_alt = _clean_url(href), len(self.out), ""
+
+    def handle_endtag(self, tag: str) -> None:
+        # An end tag also closes anything left open inside it, so an unclosed
+        # hidden element hides no more than the rest of its parent.
+        if tag in self._open:
+            if self._close(len(self._open) - 1 - self._open[::-1].index(tag)):
+                return
+        if self._hidden_at is not None:
+            return
+        if tag in _BLOCK_TAGS:
+            self.out.append("\n")
+        elif tag == "pre":
+            self._pre = max(0, self._pre - 1)
+        elif tag == "a" and self._href is not None:
+            href, self._href = self._href, None
+            text = "".join(self.out[self._link_start:]).strip()
+            if not text and self._link_alt:
+                self.out.append(self._link_alt)
+                text = self._link_alt
+            if text and text.rstrip("/") != href.rstrip("/"):
+                if href not in self._link_index:
+                    self.links.append(href)
+                    self._link_index[href] = len(self.links)
+                self.out.append(f" [{self._link_index[href]}]")
+            elif not text:
+                self.out.append(href)
+
+    def handle_data(self, data: str) -> None:
+        if self._hidden_at is None:
+            self.out.append(data if self._pre else _SPACE.sub(" ", data.replace("\n", " ")))
+
+    def text(self) -> str:
+        lines = (_SPACE.sub(" ", line).strip() for line in "".join(self.out).split("\n"))
+        text = "\n".join(line for line in lines if line)
+        if self.links:
+            text += "\n\nLinks:\n" + "\n".join(f"[{n}] {url}" for n, url in enumerate(self.links, 1))
+        return text
+
+
+def html_to_text(markup: str) -> str:
+    """HTML to readable text: drop scripts, styles, hidden elements and tracking pixels; links as footnotes."""
+    parser = _TextExtractor()
+    parser.feed(markup)
+    parser.close()
+    return parser.text()
+
+
+def text_body(payload: dict[str, Any], account: str = "", message_id: str | None = None) -> str:
+    """Return the message text: text/plain if present, else text/html as text, else ''.
+
+    With ``message_id``, HTML conversions are cached by (account, message ID, part ID).
+    """
+    part = find_part(payload, "text/plain")
+    if part is not None:
+        return decode_data(part["body"]["data"]).decode("utf-8", errors="replace")
+    part = find_part(payload, "text/html")
+    if part is None:
+        return ""
+    key = ("html_text", account, message_id, part.get("partId", "")) if message_id else None
+    text = content_cache.get(key) if key else None
+    if text is None:
+        text = html_to_text(decode_data(part["body"]["data"]).decode("utf-8", errors="replace"))
+        if key:
+            content_cache.put(key, text, len(text))
+    return text
+
+
+def header_map(payload: dict[str, Any]) -> dict[str, str]:
+    """Top-level headers keyed by lowercase name (first occurrence wins)."""
+    headers: dict[str, str] = {}
+    for header in payload.get("headers", []):
+        headers.setdefault(header.get("name", "").lower(), header.get("value", ""))
+    return headers
+
+
+def attachments(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    """Filename, type, size and attachment ID of each named attachment part."""
+    found, stack = [], [payload]
+    while stack:
+        part = stack.pop()
+        body = part.get("body", {})
+        if part.get("filename") and body.get("attachmentId"):
+            found.append({
+                "filename": part["filename"], "mimeType": part.get("mimeType"),
+                "size": body.get("size", 0), "attachmentId": body["attachmentId"],
+            })
+        stack.extend(reversed(part.get("parts", [])))
+    return found
+
+
+def text_view(message: dict[str, Any], account: str = "") -> dict[str, Any]:
+    """A ``format=full`` message reduced to headers, body text and an attachment list."""
+    payload = message.get("payload", {})
+    headers = header_map(payload)
+    return {
+        "id": message.get("id"),
+        "threadId": message.get("threadId"),
+        "labelIds": message.get("labelIds", []),
+        **{name: headers.get(name) for name in ("from", "to", "cc", "subject", "date")},
+        "text": text_body(payload, account, message.get("id")),
+        "attachments": attachments(payload),
+    }
+
+
+def _blocks(text: str) -> list[tuple[int, list[str]]]:
+    """Split text into (quote depth, lines) paragraphs."""
+    blocks: list[tuple[int, list[str]]] = []
+    depth, lines = 0, []
+    for raw in text.splitlines():
+        match = _QUOTE_PREFIX.match(raw)
+        line_depth = match.group(1).count(">") if match else 0
+        line = raw[match.end():] if match else raw
+        if not line.strip() or line_depth != depth:
+            if lines:
+                blocks.append((depth, lines))
+            depth, lines = line_depth, []
+        if line.strip():
+            lines.append(line.rstrip())
+    if lines:
+        blocks.append((depth, lines))
+    return blocks
+
+
+def _fingerprint(lines: list[str]) -> str:
+    normalized = " ".join(" ".join(lines).split()).lower()
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=12).hexdigest()
+
+
+class QuoteTracker:
+    """Remembers every paragraph seen so far in a thread and strips repeats."""
+
+    def __init__(self) -> None:
+        self._seen: set[str] = set()
+
+    def new_content(self, text: str) -> tuple[str, int]:
+        """Return (text without previously seen quoted blocks, characters dropped)."""
+        kept: list[str] = []
+        dropped = 0
+        pending: list[str] = []  # attribution / forward marker awaiting its quote
+        for depth, lines in _blocks(text):
+            fingerprint = _fingerprint(lines)
+            block = "\n".join(("> " * depth) + line for line in lines)
+            repeat = fingerprint in self._seen and (depth > 0 or sum(map(len, lines)) >= MIN_REPEAT_CHARS)
+            self._seen.add(fingerprint)
+            if depth == 0 and len(lines) == 1 and (_ATTRIBUTION.match(lines[0]) or _FORWARD_MARKER.match(lines[0])):
+                pending.append(block)
+                continue
+            if repeat:
+                dropped += len(block) + sum(map(len, pending))
+                pending = []
+                continue
+            kept.extend(pending)
+            pending = []
+            kept.append(block)
+        kept.extend(pending)
+        return "\n\n".join(kept), dropped
@@ -0,0 +1,233 @@
+"""Response size budgets — cap tool output at ``max_bytes`` and resume via opaque cursors.
+
+A response over budget is cut in one of two ways:
+
+- List responses (messages, threads, history, ...) keep as many whole items
+  as fit; the rest are held server-side.
+- Single resources keep their structure but have their largest string values
+  (``raw``, ``body.data``) cut short; the remaining text is held server-side.
+
+Either way the response gains a ``truncated`` object describing what was
+omitted and a ``cursor``. ``continue_response(cursor)`` serves the held
+remainder in budget-sized pieces, so nothing is fetched from Gmail again.
+Held remainders live in memory, bounded by count, total size and age.
+"""
+
+from __future__ import annotations
+
+import json
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+PAGED_KEYS = ("messages", "threads", "history", "drafts", "labels", "filter")
+
+CURSOR_TTL = 15 * 60
+# Set in worker processes so the front process can route gmail_continue back
+# to the worker holding the remainder (see workers.py).
+CURSOR_PREFIX = ""
+MAX_CURSORS = 128
+MAX_HELD_BYTES = 64 * 1024 * 1024
+
+# Room left for the "truncated" object itself.
+_RESERVE = 320
+_MIN_BUDGET = 1024
+
+
+@dataclass
+class _Held:
+    """Remainder of a truncated response: text leaves first, then list items."""
+
+    key: str | None
+    items: list[Any]
+    leaves: list[dict[str, Any]]
+    start: int = 0
+    size: int = 0
+    expires: float = field(default_factory=lambda: time.monotonic() + CURSOR_TTL)
+
+
+_held: OrderedDict[str, _Held] = OrderedDict()
+_lock = threading.Lock()
+
+
+def _size(data: Any, indent_level: int = 0) -> int:
+    """Bytes ``data`` occupies in ``json.dumps(..., indent=2)`` output nested ``indent_level`` deep.
+
+    Non-ASCII text is escaped as in ``_json_response``, so characters and
+    bytes only differ if that setting changes; the text is encoded anyway.
+    """
+    text = json.dumps(data, indent=2)
+    return len(text.encode()) + text.count("\n") * 2 * indent_level
+
+
+def _text_size(text: str) -> int:
+    """Bytes ``text`` occupies as a JSON string value, without the quotes (``é`` is ``\\u00e9``)."""
+    return len(json.dumps(text).encode()) - 2
+
+
+def _fit(text: str, limit: int) -> int:
+    """Length of the longest prefix of ``text`` that takes at most ``limit`` bytes as JSON."""
+    if _text_size(text) <= limit:
+        return len(text)
+    low, high = 0, min(len(text), max(0, limit))  # every character takes at least one byte
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _text_size(text[:mid]) <= limit:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _format_path(path: list[str | int]) -> str:
+    out = ""
+    for part in path:
+        out += f"[{part}]" if isinstance(part, int) else (f".{part}" if out else part)
+    return out
+
+
+def _string_leaves(data: Any, path: list[str | int]) -> list[tuple[list[str | int], str]]:
+    if isinstance(data, str):
+        return [(path, data)]
+    if isinstance(data, dict):
+        return [leaf for k, v in data.items() for leaf in _string_leaves(v, path + [k])]
+    if isinstance(data, list):
+        return [leaf for i, v in enumerate(data) for leaf in _string_leaves(v, path + [i])]
+    return []
+
+
+def _set_path(data: Any, path: list[str | int], value: Any) -> None:
+    for part in path[:-1]:
+        data = data[part]
+    data[path[-1]] = value
+
+
+def _cut_leaves(data: Any, budget: int, prefix: list[str | int]) -> tuple[Any, list[dict[str, Any]]]:
+    """Shorten the largest string values of ``data`` until it fits ``budget``.
+
+    Returns a copy of ``data`` and the removed tails as
+    ``{"path", "offset", "text"}`` records (offset = where the tail starts).
+    """
+    data = json.loads(json.dumps(data))
+    overflow = _size(data) - budget
+    tails: list[dict[str, Any]] = []
+    for path, text in sorted(_string_leaves(data, []), key=lambda leaf: -len(leaf[1])):
+        if overflow <= 0:
+            break
+        size = _text_size(text)
+        keep = _fit(text, size - overflow)
+        _set_path(data, path, text[:keep])
+        tails.append({"path": _format_path(prefix + path), "offset": keep, "text": text[keep:]})
+        overflow -= size - _text_size(text[:keep])
+    return data, tails
+
+
+def _take_items(items: list[Any], budget: int) -> int:
+    """Return how many leading items fit in ``budget`` bytes inside a response list."""
+    used = 0
+    for count, item in enumerate(items):
+        used += _size(item, indent_level=2) + 6
+        if used > budget:
+            return count
+    return len(items)
+
+
+def _store(held: _Held) -> str:
+    cursor = CURSOR_PREFIX + secrets.token_urlsafe(16)
+    with _lock:
+        now = time.monotonic()
+        for key in [k for k, v in _held.items() if v.expires < now]:
+            del _held[key]
+        _held[cursor] = held
+        while len(_held) > MAX_CURSORS or (len(_held) > 1 and sum(h.size for h in _held.values()) > MAX_HELD_BYTES):
+            _held.popitem(last=False)
+    return cursor
+
+
+def _truncation(held: _Held, returned: int | None = None) -> dict[str, Any]:
+    info: dict[str, Any] = {"omitted_bytes": held.size, "cursor": _store(held)}
+    if held.leaves:
+        info["cut_fields"] = [leaf["path"] for leaf in held.leaves]
+    if held.key and held.items:
+        info["field"] = held.key
+        if returned is not None:
+            info["returned"] = returned
+        info["omitted"] = len(held.items)
+    info["hint"] = "Call gmail_continue with this cursor for the rest."
+    return info
+
+
+def _hold(key: str | None, items: list[Any], leaves: list[dict[str, Any]], start: int = 0) -> _Held:
+    size = sum(_text_size(leaf["text"]) for leaf in leaves) + (_size(items) if items else 0)
+    return _Held(key, items, leaves, start, size)
+
+
+def apply_budget(data: Any, max_bytes: int | None) -> Any:
+    """Return ``data`` unchanged if it fits ``max_bytes``, else a truncated copy with a cursor."""
+    if not max_bytes or not isinstance(data, dict) or _size(data) <= max_bytes:
+        return data
+    budget = max(max_bytes, _MIN_BUDGET) - _RESERVE
+    key = next((k for k in PAGED_KEYS if isinstance(data.get(k), list) and data[k]), None)
+
+    if key is None:
+        cut, leaves = _cut_leaves(data, budget, [])
+        return {**cut, "truncated": _truncation(_hold(None, [], leaves))}
+
+    head = {k: v for k, v in data.items() if k != key}
+    items = data[key]
+    count = _take_items(items, budget - _size(head))
+    if count:
+        held = _hold(key, items[count:], [], start=count)
+        return {**head, key: items[:count], "truncated": _truncation(held, returned=count)}
+
+    # Even the first item is over budget: keep it with its strings cut short.
+    first, leaves = _cut_leaves(items[0], budget - _size(head), [key, 0])
+    held = _hold(key, items[1:], leaves, start=1)
+    return {**head, key: [first], "truncated": _truncation(held, returned=1)}
+
+
+def continue_response(cursor: str, max_bytes: int) -> dict[str, Any]:
+    """Serve the next ``max_bytes`` of a held remainder. Raises ValueError for unknown cursors."""
+    with _lock:
+        held = _held.pop(cursor, None)
+    if held is None or held.expires < time.monotonic():
+        raise ValueError("Unknown or expired cursor. Re-run the original request.")
+
+    budget = max(max_bytes, _MIN_BUDGET) - _RESERVE
+    result: dict[str, Any] = {}
+    chunks: list[dict[str, Any]] = []
+    leaves = list(held.leaves)
+    while leaves and budget > 0:
+        leaf = leaves[0]
+        take = _fit(leaf["text"], budget - len(leaf["path"]) - 64)
+        if take == 0:
+            break
+        piece = leaf["text"][:take]
+        chunks.append({"path": leaf["path"], "offset": leaf["offset"], "data": piece})
+        budget -= _text_size(piece) + len(leaf["path"]) + 64
+        if take >= len(leaf["text"]):
+            leaves.pop(0)
+        else:
+            leaves[0] = {**leaf, "offset": leaf["offset"] + take, "text": leaf["text"][take:]}
+    if chunks:
+        result["fields"] = chunks
+
+    items, start, returned = held.items, held.start, None
+    if items and not leaves:
+        count = _take_items(items, budget)
+        if count:
+            result[held.key] = items[:count]
+        elif not chunks:
+            # A single item is over budget: send it with its strings cut short.
+            first, leaves = _cut_leaves(items[0], budget, [held.key, start])
+            result[held.key] = [first]
+            count = 1
+        returned = count or None
+        items, start = items[count:], start + count
+
+    if leaves or items:
+        result["truncated"] = _truncation(_hold(held.key, items, leaves, start), returned=returned)
+    return result
@@ -0,0 +1,399 @@
+"""In-process content cache — immutable message content apart from mutable label state.
+
+A message's payload never changes after delivery; only its ``labelIds`` do.
+So the two are kept apart:
+
+- ``ContentCache`` is a byte-bounded LRU of message content (full, metadata
+  or raw) keyed by (account, message_id, format, headers). Entries are shared
+  between callers and must be treated as read-only.
+- ``LabelOverlay`` holds each message's current labels with the time they
+  were learned. It is refreshed by every read and by the responses of label
+  writes (modify, archive, mark read/unread, trash, thread modify).
+
+``CachingClient`` wraps a GmailClient with both: a cached message whose
+labels are fresh costs no request; one whose labels are older than
+``GMAIL_MCP_LABEL_TTL`` seconds (default 60) costs a ``format=minimal`` get.
+A thread read again costs a ``minimal`` thread get plus any new messages.
+
+The content budget is ``GMAIL_MCP_CACHE_MB`` megabytes (default 64); 0 disables caching.
+Message entries are sized from the lengths of their header and body strings
+rather than by serializing them. Deleting a message or thread evicts its
+content.
+
+``LabelCounts`` keeps each account's label list with per-label counts and
+the history ID they reflect. Entries are served as-is for
+``GMAIL_MCP_LABEL_COUNTS_TTL`` seconds (default 30) unless a label write
+through the client marks them stale; after that they are re-checked against
+``history.list`` rather than refetched.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+CONTENT_FORMATS = ("full", "metadata", "raw")
+MAX_OVERLAY_ENTRIES = 200_000
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate JSON size of ``value``; message resources are measured by their strings, not serialized."""
+    if not isinstance(value, dict) or ("payload" not in value and "raw" not in value):
+        return len(json.dumps(value, separators=(",", ":"), default=str))
+    size = 256 + len(value.get("raw", "")) + len(value.get("snippet", ""))
+    parts = [value["payload"]] if "payload" in value else []
+    while parts:
+        part = parts.pop()
+        size += 128 + sum(32 + len(header.get("name", "")) + len(header.get("value", "")) for header in part.get("headers", []))
+        body = part.get("body", {})
+        size += len(body.get("data", "")) + len(body.get("attachmentId", ""))
+        parts.extend(part.get("parts", []))
+    return size
+
+
+class ContentCache:
+    """Thread-safe LRU cache evicting least recently used entries past ``max_bytes``."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for ``key`` (marking it recently used), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int | None = None) -> None:
+        """Store ``value``; ``size`` defaults to ``estimate_size(value)``."""
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+
+    def pop(self, key: Hashable) -> Any | None:
+        """Remove and return the value for ``key``, or None."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self._size -= entry[1]
+            return entry[0]
+
+    def forget(self, account: str, message_ids: list[str] = (), thread_id: str | None = None) -> None:
+        """Drop every entry for ``message_ids``, or for the thread ``thread_id`` and its cached messages."""
+        with self._lock:
+            ids = set(message_ids)
+            if thread_id is not None:
+                ids.update(
+                    key[2] for key, (value, _) in self._entries.items()
+                    if key[:2] == ("message", account) and isinstance(value, dict) and value.get("threadId") == thread_id
+                )
+            doomed = [
+                key for key in self._entries
+                if isinstance(key, tuple) and len(key) > 2 and key[1] == account
+                and (key[2] in ids or (key[0] == "thread" and key[2] == thread_id))
+            ]
+            for key in doomed:
+                self._size -= self._entries.pop(key)[1]
+
+    def items(self) -> list[tuple[Hashable, Any]]:
+        """Snapshot of (key, value) pairs, without touching recency."""
+        with self._lock:
+            return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """Total bytes currently held."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LabelOverlay:
+    """Current ``labelIds`` per (account, message_id), with the time they were learned."""
+
+    def __init__(self, ttl: float, max_entries: int = MAX_OVERLAY_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._labels: OrderedDict[tuple[str, str], tuple[list[str], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, account: str, message_id: str) -> list[str] | None:
+        """Return the labels if learned within ``ttl`` seconds, else None."""
+        with self._lock:
+            entry = self._labels.get((account, message_id))
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def set(self, account: str, message_id: str, labels: list[str]) -> None:
+        with self._lock:
+            self._labels.pop((account, message_id), None)
+            self._labels[(account, message_id)] = (list(labels), time.monotonic())
+            while len(self._labels) > self.max_entries:
+                self._labels.popitem(last=False)
+
+    def note(self, account: str, messages: list[dict[str, Any]] | None) -> None:
+        """Record labels from message resources that carry ``labelIds``."""
+        for message in messages or []:
+            if isinstance(message, dict) and "id" in message and "labelIds" in message:
+                self.set(account, message["id"], message["labelIds"])
+
+    def apply(self, account: str, message_ids: list[str], add: list[str] | None, remove: list[str] | None) -> None:
+        """Apply a label delta to known messages, keeping their original timestamps."""
+        with self._lock:
+            for message_id in message_ids:
+                entry = self._labels.get((account, message_id))
+                if entry is not None:
+                    labels = [label for label in entry[0] if label not in (remove or [])]
+                    labels += [label for label in add or [] if label not in labels]
+                    self._labels[(account, message_id)] = (labels, entry[1])
+
+    def drop(self, account: str, message_ids: list[str]) -> None:
+        with self._lock:
+            for message_id in message_ids:
+                self._labels.pop((account, message_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._labels.clear()
+
+
+class LabelCounts:
+    """Per-account labels with counts, the history ID they reflect, and when they were last verified."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: dict[str, tuple[list[dict[str, Any]], int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, account: str) -> tuple[list[dict[str, Any]], int, bool] | None:
+        """Return (labels, history_id, fresh) or None if nothing is held."""
+        with self._lock:
+            entry = self._entries.get(account)
+        if entry is None:
+            return None
+        labels, history_id, verified = entry
+        return labels, history_id, time.monotonic() - verified <= self.ttl
+
+    def put(self, account: str, labels: list[dict[str, Any]], history_id: int) -> None:
+        with self._lock:
+            self._entries[account] = (labels, history_id, time.monotonic())
+
+    def mark_stale(self, account: str) -> None:
+        """Re-check against history on the next read (after a label write)."""
+        with self._lock:
+            entry = self._entries.get(account)
+            if entry is not None:
+                self._entries[account] = (entry[0], entry[1], float("-inf"))
+
+    def drop(self, account: str) -> None:
+        with self._lock:
+            self._entries.pop(account, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def message_key(account: str, message_id: str, format_: str, metadata_headers: list[str] | None = None) -> tuple:
+    """Content cache key for a message in a given format."""
+    return ("message", account, message_id, format_, tuple(metadata_headers or ()))
+
+
+def _thread_key(account: str, thread_id: str, format_: str, metadata_headers: list[str] | None) -> tuple:
+    return ("thread", account, thread_id, format_, tuple(metadata_headers or ()))
+
+
+def _headers_kwarg(metadata_headers: list[str] | None) -> dict[str, Any]:
+    return {"metadata_headers": metadata_headers} if metadata_headers else {}
+
+
+class CachingClient:
+    """Proxy for a GmailClient that serves message content from the cache.
+
+    Reads fill the content cache and label overlay; label writes update the
+    overlay from their responses. Everything else passes straight through.
+    """
+
+    def __init__(self, client: Any, cache: ContentCache, overlay: LabelOverlay, counts: LabelCounts | None = None) -> None:
+        self._client = client
+        self._cache = cache
+        self._overlay = overlay
+        self._counts = counts
+
+    @property
+    def wrapped(self) -> Any:
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    @property
+    def _account(self) -> str:
+        return self._client.account
+
+    def _store(self, message: Any, format_: str, metadata_headers: list[str] | None) -> None:
+        if isinstance(message, dict) and "id" in message:
+            self._cache.put(message_key(self._account, message["id"], format_, metadata_headers), message)
+            self._overlay.note(self._account, [message])
+
+    # -- reads --------------------------------------------------------------
+
+    def get_message(self, message_id: str, format_: str = "full", metadata_headers: list[str] | None = None) -> dict[str, Any]:
+        if format_ not in CONTENT_FORMATS:
+            result = self._client.get_message(message_id, format_=format_, **_headers_kwarg(metadata_headers))
+            self._overlay.note(self._account, [result])
+            return result
+        content = self._cache.get(message_key(self._account, message_id, format_, metadata_headers))
+        if content is None:
+            result = self._client.get_message(message_id, format_=format_, **_headers_kwarg(metadata_headers))
+            self._store(result, format_, metadata_headers)
+            return result
+        labels = self._overlay.get(self._account, message_id)
+        if labels is None:
+            labels = self._client.get_message(message_id, format_="minimal").get("labelIds", [])
+            self._overlay.set(self._account, message_id, labels)
+        return {**content, "labelIds": labels}
+
+    def get_thread(self, thread_id: str, format_: str = "full", metadata_headers: list[str] | None = None) -> dict[str, Any]:
+        if format_ not in CONTENT_FORMATS:
+            result = self._client.get_thread(thread_id, format_=format_, **_headers_kwarg(metadata_headers))
+            self._overlay.note(self._account, result.get("messages"))
+            return result
+        thread_key = _thread_key(self._account, thread_id, format_, metadata_headers)
+        if self._cache.get(thread_key) is not None:
+            skeleton = self._client.get_thread(thread_id, format_="minimal")
+            stubs = skeleton.get("messages", [])
+            self._overlay.note(self._account, stubs)
+            content = {
+                stub["id"]: self._cache.get(message_key(self._account, stub["id"], format_, metadata_headers))
+                for stub in stubs
+            }
+            missing = [message_id for message_id, message in content.items() if message is None]
+            if len(missing) * 2 <= len(stubs):
+                for message_id in missing:
+                    content[message_id] = self.get_message(message_id, format_, metadata_headers)
+                messages = [{**content[stub["id"]], "labelIds": stub.get("labelIds", [])} for stub in stubs]
+                return {**skeleton, "messages": messages}
+        result = self._client.get_thread(thread_id, format_=format_, **_headers_kwarg(metadata_headers))
+        if isinstance(result, dict):
+            for message in result.get("messages", []):
+                self._store(message, format_, metadata_headers)
+            self._cache.put(thread_key, True, size=64)
+        return result
+
+    # -- label writes -------------------------------------------------------
+
+    def _stale_counts(self) -> None:
+        if self._counts is not None:
+            self._counts.mark_stale(self._account)
+
+    def _labelled(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        result = getattr(self._client, name)(*args, **kwargs)
+        if isinstance(result, dict):
+            self._overlay.note(self._account, [result] + list(result.get("messages", [])))
+        self._stale_counts()
+        return result
+
+    def modify_message(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("modify_message", *args, **kwargs)
+
+    def mark_as_read(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("mark_as_read", *args, **kwargs)
+
+    def mark_as_unread(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("mark_as_unread", *args, **kwargs)
+
+    def archive(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("archive", *args, **kwargs)
+
+    def trash_message(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("trash_message", *args, **kwargs)
+
+    def untrash_message(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("untrash_message", *args, **kwargs)
+
+    def modify_thread(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("modify_thread", *args, **kwargs)
+
+    def trash_thread(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("trash_thread", *args, **kwargs)
+
+    def untrash_thread(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._labelled("untrash_thread", *args, **kwargs)
+
+    def batch_modify_messages(
+        self, message_ids: list[str], add_label_ids: list[str] | None = None, remove_label_ids: list[str] | None = None,
+    ) -> None:
+        result = self._client.batch_modify_messages(message_ids, add_label_ids=add_label_ids, remove_label_ids=remove_label_ids)
+        self._overlay.apply(self._account, message_ids, add_label_ids, remove_label_ids)
+        self._stale_counts()
+        return result
+
+    def delete_message(self, message_id: str) -> int:
+        result = self._client.delete_message(message_id)
+        self._cache.forget(self._account, [message_id])
+        self._overlay.drop(self._account, [message_id])
+        self._stale_counts()
+        return result
+
+    def batch_delete_messages(self, message_ids: list[str]) -> None:
+        result = self._client.batch_delete_messages(message_ids)
+        self._cache.forget(self._account, message_ids)
+        self._overlay.drop(self._account, message_ids)
+        self._stale_counts()
+        return result
+
+    def delete_thread(self, thread_id: str) -> Any:
+        result = self._client.delete_thread(thread_id)
+        self._cache.forget(self._account, thread_id=thread_id)
+        self._stale_counts()
+        return result
+
+    # -- label resources ------------------------------------------------------
+
+    def _relabel(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        result = getattr(self._client, method)(*args, **kwargs)
+        if self._counts is not None:
+            self._counts.drop(self._account)  # label set changed: history does not record it
+        return result
+
+    def create_label(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._relabel("create_label", *args, **kwargs)
+
+    def update_label(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self._relabel("update_label", *args, **kwargs)
+
+    def delete_label(self, *args: Any, **kwargs: Any) -> Any:
+        return self._relabel("delete_label", *args, **kwargs)
+
+
+content_cache = ContentCache(int(float(os.environ.get("GMAIL_MCP_CACHE_MB", "64")) * 1024 * 1024))
+label_overlay = LabelOverlay(float(os.environ.get("GMAIL_MCP_LABEL_TTL", "60")))
+label_counts = LabelCounts(float(os.environ.get("GMAIL_MCP_LABEL_COUNTS_TTL", "30")))
@@ -0,0 +1,109 @@
+"""Single-flight coalescing — concurrent identical Gmail reads share one HTTP request.
+
+When parallel tool calls (or several sessions) ask for the same message,
+thread or label list at the same moment, only the first caller goes to
+Gmail; the others wait for its result. Nothing is cached once the request
+completes — this only removes duplicates that are in flight together.
+
+Results are shared between callers and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import threading
+from typing import Any, Callable, Hashable
+
+# GmailClient methods that only read, so identical concurrent calls can share a result.
+COALESCED_METHODS = frozenset({
+    "get_profile",
+    "get_message",
+    "list_messages",
+    "get_thread",
+    "list_threads",
+    "list_labels",
+    "get_label",
+    "list_drafts",
+    "get_draft",
+    "list_history",
+    "get_attachment",
+    "list_filters",
+    "get_filter",
+    "get_vacation_settings",
+})
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers get the same outcome."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.shared = 0  # calls served by another caller's request
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class CoalescingClient:
+    """Proxy for a GmailClient that routes read methods through a SingleFlight.
+
+    Keys are (account, method, arguments); every other attribute passes
+    straight through to the wrapped client.
+    """
+
+    def __init__(self, client: Any, flight: SingleFlight) -> None:
+        self._client = client
+        self._flight = flight
+
+    @property
+    def wrapped(self) -> Any:
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name not in COALESCED_METHODS:
+            return attr
+
+        @functools.wraps(attr)
+        def coalesced(*args: Any, **kwargs: Any) -> Any:
+            key = (self._client.account, name, json.dumps([args, kwargs], sort_keys=True, default=str))
+            return self._flight.do(key, lambda: attr(*args, **kwargs))
+
+        return coalesced
+
+
+flight = SingleFlight()
@@ -0,0 +1,275 @@
+"""Address book — a prefix index of the names and addresses seen in From, To and Cc.
+
+A harvest lists the newest messages and reads their ``From``, ``To`` and
+``Cc`` headers (``metadata`` format, through the batch endpoint). Every
+address becomes a contact with a display name, a use count and the time it
+was last seen; addresses on messages you sent count ``SENT_WEIGHT`` times,
+since people you write to are the likeliest recipients. Your own address
+and automated senders (no-reply, mailer-daemon, ...) are left out.
+
+Lookups bisect a sorted array of ``(term, address)`` pairs, where the terms
+are the address, its domain, and the words of the display name and local
+part. So "ali", "smith" and "alice.smith@exa" all find
+``alice.smith@example.com``, and a lookup costs microseconds. Matches are
+ranked by use count, halved for every ``HALF_LIFE_DAYS`` since last seen.
+That order does not depend on the current time, so each contact's rank is
+computed once, when it changes, rather than on every lookup.
+
+The index is saved to ``GMAIL_MCP_CONTACTS_DIR/<account>.json`` (default
+``~/.cache/gmail-mcp/contacts``) and survives restarts. After a restart, or
+once it is ``GMAIL_MCP_CONTACTS_TTL`` seconds old, the index replays
+``history.list`` for messages added since it was built. A history ID too
+old for ``history.list`` triggers a fresh harvest.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import getaddresses
+from pathlib import Path
+from typing import Any
+
+from gmail_sdk import GmailAPIError
+
+from .batch import stream_messages
+from .bodies import header_map
+from .mbox import Checkpoint
+
+CONTACTS_DIR = Path(os.environ.get("GMAIL_MCP_CONTACTS_DIR") or os.path.expanduser("~/.cache/gmail-mcp/contacts"))
+REFRESH_SECONDS = float(os.environ.get("GMAIL_MCP_CONTACTS_TTL", "300"))
+CONTACT_HEADERS = ["From", "To", "Cc"]
+PAGE_SIZE = 500
+MAX_PARALLEL = 4
+MAX_HISTORY_RECORDS = 10_000  # beyond this a fresh harvest is about as cheap
+HALF_LIFE_DAYS = 90.0
+SENT_WEIGHT = 3
+MAX_SUGGESTIONS = 100
+_DAY_MS = 86_400_000
+_WORD = re.compile(r"[^\w]+")
+_AUTOMATED = re.compile(r"^(no-?reply|do-?not-?reply|mailer-daemon|postmaster|bounces?)([+._-]|$)", re.IGNORECASE)
+
+
+@dataclass
+class Contact:
+    address: str
+    name: str
+    count: int
+    last_ms: int
+
+    @property
+    def rank(self) -> float:
+        """log2 of count * 0.5 ** (age / half-life), less a term shared by every contact at a given time."""
+        return math.log2(self.count) + self.last_ms / _DAY_MS / HALF_LIFE_DAYS
+
+    def terms(self) -> set[str]:
+        local, _, domain = self.address.partition("@")
+        return {self.address, domain, *_WORD.split(local), *_WORD.split(self.name.lower())} - {""}
+
+
+class ContactIndex:
+    """Contacts by address plus the sorted (term, address) array that prefix lookups bisect."""
+
+    def __init__(self, history_id: int, me: str, limit: int) -> None:
+        self.history_id = history_id
+        self.me = me.lower()
+        self.limit = limit
+        self.scanned = 0
+        self.complete = False
+        self.refreshed = time.monotonic()
+        self.contacts: dict[str, Contact] = {}
+        self._rank: dict[str, float] = {}
+        self._terms: list[tuple[str, str]] = []
+        self._contact_terms: dict[str, tuple[str, ...]] = {}
+        self._top: list[str] | None = None  # best MAX_SUGGESTIONS overall, for empty queries
+
+    def __len__(self) -> int:
+        return len(self.contacts)
+
+    def _link(self, address: str, terms: set[str], add: bool) -> None:
+        for term in terms:
+            entry = (term, address)
+            i = bisect_left(self._terms, entry)
+            present = i < len(self._terms) and self._terms[i] == entry
+            if add and not present:
+                self._terms.insert(i, entry)
+            elif not add and present:
+                del self._terms[i]
+
+    def note(self, address: str, name: str, when_ms: int, weight: int = 1) -> None:
+        address = address.lower()
+        contact = self.contacts.get(address)
+        if contact is None:
+            contact = self.contacts[address] = Contact(address, name, 0, when_ms)
+            self._contact_terms[address] = tuple(contact.terms())
+            self._link(address, contact.terms(), True)
+        elif name and name != contact.name and (not contact.name or when_ms >= contact.last_ms):
+            old = contact.terms()
+            contact.name = name  # the most recent display name wins
+            new = contact.terms()
+            self._link(address, old - new, False)
+            self._link(address, new - old, True)
+            self._contact_terms[address] = tuple(new)
+        contact.count += weight
+        contact.last_ms = max(contact.last_ms, when_ms)
+        self._rank[address] = contact.rank
+        self._top = None
+
+    def add_message(self, message: dict[str, Any]) -> None:
+        labels = message.get("labelIds", [])
+        self.scanned += 1
+        if "DRAFT" in labels or "SPAM" in labels:
+            return
+        headers = header_map(message.get("payload", {}))
+        weight = SENT_WEIGHT if "SENT" in labels else 1
+        when_ms = int(message.get("internalDate", 0))
+        for name, address in getaddresses([headers.get(field, "") for field in ("from", "to", "cc")]):
+            if "@" not in address or address.lower() == self.me or _AUTOMATED.match(address.partition("@")[0]):
+                continue
+            self.note(address, name.strip(), when_ms, weight)
+
+    def search(self, query: str, limit: int = 10) -> list[Contact]:
+        """Contacts with a term starting with each word of ``query``, best first."""
+        words = query.lower().split()
+        if not words:
+            if self._top is None:
+                self._top = heapq.nlargest(MAX_SUGGESTIONS, self._rank, key=self._rank.__getitem__)
+            return [self.contacts[a] for a in self._top[:limit]]
+        ranges = []
+        for word in words:
+            lo = bisect_left(self._terms, (word,))
+            ranges.append((bisect_left(self._terms, (word + "\U0010ffff",), lo) - lo, lo, word))
+        ranges.sort()  # narrowest first; wide ranges are filtered per candidate instead of collected
+        size, lo, _ = ranges[0]
+        found = {address for _, address in self._terms[lo:lo + size]}
+        for size, lo, word in ranges[1:]:
+            if size <= 4 * len(found):
+                found &= {address for _, address in self._terms[lo:lo + size]}
+            else:
+                found = {a for a in found if any(t.startswith(word) for t in self._contact_terms[a])}
+        return [self.contacts[a] for a in heapq.nlargest(limit, found, key=self._rank.__getitem__)]
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "history_id": self.history_id,
+            "me": self.me,
+            "limit": self.limit,
+            "scanned": self.scanned,
+            "complete": self.complete,
+            "contacts": [[c.address, c.name, c.count, c.last_ms] for c in self.contacts.values()],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> ContactIndex:
+        index = cls(int(state["history_id"]), state["me"], int(state["limit"]))
+        index.scanned = state["scanned"]
+        index.complete = state["complete"]
+        index.refreshed = float("-inf")  # catch up on history before the first answer
+        index.contacts = {address: Contact(address, name, count, last_ms) for address, name, count, last_ms in state["contacts"]}
+        index._rank = {address: contact.rank for address, contact in index.contacts.items()}
+        index._contact_terms = {address: tuple(contact.terms()) for address, contact in index.contacts.items()}
+        index._terms = sorted((term, address) for address, terms in index._contact_terms.items() for term in terms)
+        return index
+
+
+def _harvest(client: Any, account: str, index: ContactIndex, message_ids: list[str]) -> None:
+    params = {"format": "metadata", "metadataHeaders": CONTACT_HEADERS}
+    with ThreadPoolExecutor(MAX_PARALLEL) as pool:
+        for message in stream_messages(client, account, message_ids, params, pool, parallel=MAX_PARALLEL):
+            if message is not None:  # deleted since it was listed
+                index.add_message(message)
+
+
+def scan(client: Any, account: str, limit: int) -> ContactIndex:
+    """Build an index from the newest ``limit`` messages of the mailbox."""
+    profile = client.get_profile()
+    index = ContactIndex(int(profile.get("historyId", 0)), profile.get("emailAddress", ""), limit)
+    page_token = None
+    listed = 0
+    while listed < limit:
+        result = client.list_messages(max_results=min(PAGE_SIZE, limit - listed), page_token=page_token)
+        ids = [m["id"] for m in result.get("messages", [])]
+        listed += len(ids)
+        _harvest(client, account, index, ids)
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            index.complete = True
+            break
+    return index
+
+
+def update(client: Any, account: str, index: ContactIndex) -> bool:
+    """Add messages delivered or sent since ``index.history_id``; False if a fresh harvest is needed instead."""
+    added: dict[str, None] = {}
+    page_token = None
+    try:
+        while True:
+            result = client.list_history(
+                start_history_id=str(index.history_id), max_results=500, page_token=page_token, history_types=["messageAdded"],
+            )
+            for record in result.get("history", []):
+                for change in record.get("messagesAdded", []):
+                    added[change["message"]["id"]] = None
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+            if len(added) > MAX_HISTORY_RECORDS:
+                return False
+    except GmailAPIError as exc:
+        if exc.status_code == 404:
+            return False
+        raise
+    _harvest(client, account, index, list(added))
+    index.history_id = int(result.get("historyId", index.history_id))
+    index.refreshed = time.monotonic()
+    return True
+
+
+class ContactStore:
+    """Each account's ``ContactIndex``: loaded from disk, refreshed from history, saved after changes."""
+
+    def __init__(self) -> None:
+        self._indexes: dict[str, ContactIndex] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def path(account: str) -> Path:
+        return CONTACTS_DIR / f"{account}.json"
+
+    def get(self, client: Any, account: str, limit: int, refresh: bool = False) -> ContactIndex:
+        with self._lock:
+            lock = self._locks.setdefault(account, threading.Lock())
+        with lock:
+            checkpoint = Checkpoint(self.path(account))
+            index = self._indexes.get(account)
+            if index is None:
+                state = checkpoint.load()
+                index = ContactIndex.from_state(state) if state else None
+            if index is not None and not index.complete and index.limit < limit:
+                index = None  # asked for more than was harvested
+            if index is not None and not refresh and time.monotonic() - index.refreshed < REFRESH_SECONDS:
+                self._indexes[account] = index
+                return index
+            history_id = index.history_id if index is not None else None
+            if index is None or not update(client, account, index):
+                index = scan(client, account, limit)
+            self._indexes[account] = index
+            if index.history_id != history_id:
+                checkpoint.path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+                checkpoint.save(index.to_state())
+            return index
+
+    def clear(self) -> None:
+        with self._lock:
+            self._indexes.clear()
+
+
+contact_index = ContactStore()
@@ -0,0 +1,119 @@
+"""Gmail filter criteria — translate to a search query, or match against cached headers.
+
+A filter's ``criteria`` object (``from``, ``to``, ``subject``, ``query``,
+``negatedQuery``, ``hasAttachment``, ``size`` + ``sizeComparison``) selects
+the same mail as the equivalent search, so a dry run is a counted
+``messages.list`` over that query. ``matches`` evaluates the same criteria
+locally against a message resource's headers, size and parts, for answering
+from the content cache without any request. Free-form ``query`` and
+``negatedQuery`` need Gmail's search engine and are only evaluated remotely.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from .bodies import header_map
+
+CRITERIA_KEYS = ("from", "to", "subject", "query", "negatedQuery", "hasAttachment", "excludeChats", "size", "sizeComparison")
+_TERM_SPLIT = re.compile(r"\s+OR\s+|\s*[|,{}]\s*")
+_WORDS = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def _validate(criteria: Any) -> dict[str, Any]:
+    if not isinstance(criteria, dict):
+        raise ValueError("criteria must be a JSON object")
+    unknown = sorted(set(criteria) - set(CRITERIA_KEYS))
+    if unknown:
+        raise ValueError(f"Unknown criteria keys: {', '.join(unknown)} (supported: {', '.join(CRITERIA_KEYS)})")
+    if not any(criteria.get(k) for k in ("from", "to", "subject", "query", "negatedQuery", "hasAttachment", "size")):
+        raise ValueError("criteria must set at least one of from, to, subject, query, negatedQuery, hasAttachment, size")
+    if criteria.get("size") and criteria.get("sizeComparison") not in ("larger", "smaller"):
+        raise ValueError("size needs sizeComparison 'larger' or 'smaller'")
+    return criteria
+
+
+def _group(value: Any) -> str:
+    value = str(value).strip()
+    return value if re.fullmatch(r'[^\s()]+|"[^"]*"', value) else f"({value})"
+
+
+def to_query(criteria: Any) -> str:
+    """The Gmail search query that selects the same messages as ``criteria``."""
+    criteria = _validate(criteria)
+    terms = []
+    for key in ("from", "to", "subject"):
+        if criteria.get(key):
+            terms.append(f"{key}:{_group(criteria[key])}")
+    if criteria.get("query"):
+        terms.append(_group(criteria["query"]))
+    if criteria.get("negatedQuery"):
+        terms.append(f"-{_group(criteria['negatedQuery'])}")
+    if criteria.get("hasAttachment"):
+        terms.append("has:attachment")
+    if criteria.get("size"):
+        terms.append(f"{criteria['sizeComparison']}:{int(criteria['size'])}")
+    return " ".join(terms)
+
+
+def _any_term(pattern: str, value: str) -> bool:
+    """Address-style match: any of the OR/comma-separated terms is a substring."""
+    value = value.lower()
+    return any(term and term.strip('"').lower() in value for term in _TERM_SPLIT.split(pattern.strip("()")))
+
+
+def _all_words(pattern: str, value: str) -> bool:
+    """Subject-style match: every word (or quoted phrase) appears."""
+    value = value.lower()
+    return all((phrase or word).lower() in value for phrase, word in _WORDS.findall(pattern))
+
+
+def has_attachment(message: dict[str, Any]) -> bool:
+    """Whether any MIME part is a named attachment (for ``metadata``, a multipart/mixed top level)."""
+    payload = message.get("payload", {})
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        if part.get("filename") and part.get("body", {}).get("attachmentId"):
+            return True
+        stack.extend(part.get("parts", []))
+    return "parts" not in payload and payload.get("mimeType") == "multipart/mixed"
+
+
+def locally_decidable(criteria: Any) -> bool:
+    """Whether ``matches`` can evaluate ``criteria`` (no free-form search terms)."""
+    criteria = _validate(criteria)
+    return not criteria.get("query") and not criteria.get("negatedQuery")
+
+
+def required_headers(criteria: dict[str, Any]) -> set[str]:
+    """Lowercase header names a cached message must carry for ``matches`` to judge it fairly.
+
+    ``to`` also matches Cc, so a message cached with To but not Cc could be
+    a false negative.
+    """
+    needed = set()
+    for key, headers in (("from", {"from"}), ("to", {"to", "cc"}), ("subject", {"subject"})):
+        if criteria.get(key):
+            needed |= headers
+    return needed
+
+
+def matches(criteria: dict[str, Any], message: dict[str, Any]) -> bool:
+    """Evaluate locally decidable ``criteria`` against a message resource (metadata or full)."""
+    headers = header_map(message.get("payload", {}))
+    if criteria.get("from") and not _any_term(criteria["from"], headers.get("from", "")):
+        return False
+    recipients = " ".join(headers.get(h, "") for h in ("to", "cc", "bcc", "delivered-to"))
+    if criteria.get("to") and not _any_term(criteria["to"], recipients):
+        return False
+    if criteria.get("subject") and not _all_words(criteria["subject"], headers.get("subject", "")):
+        return False
+    if criteria.get("hasAttachment") and not has_attachment(message):
+        return False
+    if criteria.get("size"):
+        size, limit = int(message.get("sizeEstimate", 0)), int(criteria["size"])
+        if (size <= limit) if criteria["sizeComparison"] == "larger" else (size >= limit):
+            return False
+    return True
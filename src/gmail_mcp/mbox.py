@@ -0,0 +1,368 @@
+"""mbox archives — stream messages between Gmail and an mbox file, resumably.
+
+Export lists a query page by page and fetches each page's messages in
+``format=raw`` through the batch endpoint, ``RAW_BATCH_SIZE`` per request
+and ``MAX_PARALLEL`` requests at a time, drawing quota units from the
+account's shared bucket. Each message is decoded and appended to the file
+straight away, so memory holds at most one window of messages.
+
+Messages are written in mboxrd form: a ``From`` separator line, CRLF line
+ends turned into LF and body lines starting with ``From `` (after any
+``>``) quoted with one more ``>``. As in Google Takeout, each message gets
+``X-GM-THRID`` and ``X-Gmail-Labels`` headers so an import can restore its
+labels.
+
+A checkpoint (``<path>.checkpoint``) is written when the file is created
+and, after every page, once the file is flushed; it records the byte
+offset and the next page token. An interrupted export, or
+one stopped by ``max_messages``, resumes from the checkpoint: the file is
+truncated back to the recorded offset and listing continues from the saved
+page. The checkpoint is removed once the export completes.
+
+Import reads an mbox one message at a time and uploads each with
+``messages.import`` (``uploadType=multipart``, date taken from the Date
+header), ``MAX_PARALLEL`` at a time within the quota-unit bucket.
+``X-Gmail-Labels`` names are mapped to label IDs, creating missing user
+labels, and the Takeout headers are removed before upload. With dedupe on,
+messages whose Message-ID was already seen in this import, or is found by
+an ``rfc822msgid:`` search (one batch request per window), are skipped.
+Uploads answered with 429 or 5xx, or cut off by a network error, are
+retried with backoff. Progress is checkpointed in ``<path>.import-checkpoint``
+after every window of ``IMPORT_WINDOW`` messages, as the byte offset where
+the next one starts plus the offsets of messages that still failed; a
+resumed import retries those first, and the import is complete only once
+none remain.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+import httpx
+from gmail_sdk import GmailAPIError
+
+from .batch import BatchRequest, execute_metered, stream_messages
+from .quota import QUOTA_UNITS, USER_UNITS_PER_SECOND, bucket
+from .uploads import upload_content
+
+PAGE_SIZE = 500
+RAW_BATCH_SIZE = 25  # raw messages can be large; keep each batch response modest
+MAX_PARALLEL = 4
+SYSTEM_LABEL_NAMES = {
+    "INBOX": "Inbox", "SENT": "Sent", "DRAFT": "Drafts", "TRASH": "Trash", "SPAM": "Spam",
+    "STARRED": "Starred", "UNREAD": "Unread", "IMPORTANT": "Important", "CHAT": "Chat",
+}
+IMPORT_WINDOW = 50
+IMPORT_RETRIES = 3
+MAX_REPORTED_ERRORS = 20
+IMPORT_PARAMS = {"internalDateSource": "dateHeader", "neverMarkSpam": "true"}
+_FROM_LINE = re.compile(rb"^(>*From )", re.MULTILINE)
+_QUOTED_FROM = re.compile(rb"^>(>*From )")
+_TAKEOUT_HEADERS = re.compile(rb"^(X-Gmail-Labels|X-GM-THRID):.*\r\n(?:[ \t].*\r\n)*", re.IGNORECASE | re.MULTILINE)
+_PSEUDO_LABELS = {"opened", "archived"}  # Takeout markers, not labels
+_UNSETTABLE = {"DRAFT", "CHAT"}  # rejected by messages.import
+
+
+def label_name(label_id: str, names: dict[str, str]) -> str:
+    """Takeout-style display name for a label ID (``CATEGORY_UPDATES`` -> ``Category Updates``)."""
+    if label_id in names:
+        return names[label_id]
+    if label_id in SYSTEM_LABEL_NAMES:
+        return SYSTEM_LABEL_NAMES[label_id]
+    if label_id.startswith("CATEGORY_"):
+        return "Category " + label_id[len("CATEGORY_"):].title()
+    return label_id
+
+
+def write_message(out: IO[bytes], raw: bytes, internal_date_ms: int, extra_headers: dict[str, str] | None = None) -> None:
+    """Append one RFC 822 message to an mbox stream (mboxrd quoting)."""
+    stamp = time.asctime(time.gmtime(internal_date_ms / 1000))
+    out.write(f"From MAILER-DAEMON {stamp}\n".encode("ascii"))
+    for name, value in (extra_headers or {}).items():
+        out.write(f"{name}: {value}\n".encode("utf-8"))
+    body = _FROM_LINE.sub(rb">\1", raw.replace(b"\r\n", b"\n"))
+    out.write(body)
+    out.write(b"\n" if body.endswith(b"\n") else b"\n\n")
+
+
+class Checkpoint:
+    """A small JSON state file, replaced atomically on every save."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def load(self) -> dict[str, Any] | None:
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+
+    def save(self, state: dict[str, Any]) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, self.path)
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def export_mbox(
+    client: Any,
+    account: str,
+    path: str,
+    query: str | None = None,
+    max_messages: int = 10_000,
+    overwrite: bool = False,
+    include_spam_trash: bool = False,
+) -> dict[str, Any]:
+    """Export messages matching ``query`` to ``path``, resuming from its checkpoint if one exists."""
+    target = Path(path).expanduser()
+    checkpoint = Checkpoint(target.with_name(target.name + ".checkpoint"))
+    state = checkpoint.load()
+    if state is not None:
+        if state["query"] != query:
+            raise ValueError(f"{checkpoint.path} belongs to an export of query {state['query']!r}; delete it to start over")
+    elif target.exists() and not overwrite:
+        raise ValueError(f"{target} already exists; pass overwrite=true to replace it")
+    else:
+        state = {"query": query, "page_token": None, "offset": 0, "exported": 0, "skipped": 0}
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(b"")
+        checkpoint.save(state)  # so a failure before the first page still resumes
+    names = {label["id"]: label["name"] for label in client.list_labels().get("labels", []) if label.get("type") == "user"}
+    exported = 0
+    complete = False
+    with open(target, "r+b") as out, ThreadPoolExecutor(MAX_PARALLEL) as pool:
+        out.truncate(state["offset"])
+        out.seek(state["offset"])
+        while exported < max_messages:
+            page = client.list_messages(
+                query=query, max_results=min(PAGE_SIZE, max_messages - exported),
+                page_token=state["page_token"], include_spam_trash=include_spam_trash,
+            )
+            ids = [message["id"] for message in page.get("messages", [])]
+            written = 0
+            for message in stream_messages(client, account, ids, {"format": "raw"}, pool, RAW_BATCH_SIZE, MAX_PARALLEL):
+                if message is None:  # deleted since it was listed
+                    state["skipped"] += 1
+                    continue
+                raw = base64.urlsafe_b64decode(message["raw"] + "=" * (-len(message["raw"]) % 4))
+                write_message(out, raw, int(message.get("internalDate", 0)), {
+                    "X-GM-THRID": str(int(message["threadId"], 16)),
+                    "X-Gmail-Labels": ",".join(label_name(label, names) for label in message.get("labelIds", [])),
+                })
+                written += 1
+            out.flush()
+            os.fsync(out.fileno())
+            exported += written
+            state.update(page_token=page.get("nextPageToken"), offset=out.tell(), exported=state["exported"] + written)
+            if not state["page_token"]:
+                complete = True
+                break
+            checkpoint.save(state)
+    if complete:
+        checkpoint.remove()
+    return {
+        "path": str(target),
+        "query": query,
+        "exported": state["exported"],
+        "this_call": exported,
+        "skipped": state["skipped"],
+        "bytes": state["offset"],
+        "complete": complete,
+        **({} if complete else {"checkpoint": str(checkpoint.path)}),
+    }
+
+
+def _unquote(lines: list[bytes]) -> bytes:
+    if lines and not lines[-1].strip():
+        lines = lines[:-1]  # the blank line that separates messages
+    return b"".join(_QUOTED_FROM.sub(rb"\1", line.rstrip(b"\r\n")) + b"\r\n" for line in lines)
+
+
+def iter_mbox(path: Path, offset: int = 0) -> Iterator[tuple[int, int, bytes]]:
+    """Yield (start offset, end offset, message) from ``offset``, one message in memory at a time.
+
+    Messages come back with CRLF line ends and mboxrd ``>From`` quoting undone.
+    """
+    with open(path, "rb") as source:
+        source.seek(offset)
+        lines: list[bytes] | None = None
+        start = position = offset
+        for line in source:
+            if line.startswith(b"From "):
+                if lines is not None:
+                    yield start, position, _unquote(lines)
+                lines, start = [], position
+            elif lines is not None:
+                lines.append(line)
+            position += len(line)
+        if lines is not None:
+            yield start, position, _unquote(lines)
+
+
+def split_takeout(raw: bytes) -> tuple[bytes, list[str], str | None]:
+    """(message without Takeout headers, its X-Gmail-Labels names, its Message-ID)."""
+    head, separator, body = raw.partition(b"\r\n\r\n")
+    headers = BytesHeaderParser().parsebytes(head + separator)
+    labels = [name.strip() for name in (headers.get("X-Gmail-Labels") or "").split(",") if name.strip()]
+    message_id = (headers.get("Message-ID") or "").strip() or None
+    return _TAKEOUT_HEADERS.sub(b"", head + b"\r\n").rstrip(b"\r\n") + separator + body, labels, message_id
+
+
+class LabelMap:
+    """Label names (Takeout or user) to IDs, creating missing user labels on request."""
+
+    def __init__(self, client: Any, create: bool) -> None:
+        self.client = client
+        self.create = create
+        self.created: list[str] = []
+        self.unmapped: set[str] = set()
+        self._ids = {name.lower(): label_id for label_id, name in SYSTEM_LABEL_NAMES.items()}
+        for label in client.list_labels().get("labels", []):
+            self._ids[label["name"].lower()] = label["id"]
+            self._ids.setdefault(label["id"].lower(), label["id"])
+
+    def resolve(self, names: list[str]) -> list[str]:
+        ids = []
+        for name in names:
+            key = name.lower()
+            if key in _PSEUDO_LABELS:
+                continue
+            if key not in self._ids and key.startswith("category "):
+                self._ids[key] = "CATEGORY_" + name[len("category "):].strip().upper().replace(" ", "_")
+            if key not in self._ids:
+                if not self.create:
+                    self.unmapped.add(name)
+                    continue
+                self._ids[key] = self.client.create_label(name=name)["id"]
+                self.created.append(name)
+            if self._ids[key] not in _UNSETTABLE and self._ids[key] not in ids:
+                ids.append(self._ids[key])
+        return ids
+
+
+def _existing(client: Any, account: str, message_ids: list[str]) -> set[str]:
+    """The Message-IDs already in the mailbox, by batched ``rfc822msgid:`` searches."""
+    results = execute_metered(client, account, [
+        BatchRequest("GET", "/users/me/messages", {"q": f"rfc822msgid:{mid.strip('<>')}", "maxResults": 1, "includeSpamTrash": "true"})
+        for mid in message_ids
+    ])
+    return {mid for mid, result in zip(message_ids, results) if isinstance(result, dict) and result.get("messages")}
+
+
+def _queued(path: Path, offset: int, retries: list[int]) -> Iterator[tuple[int, int, bytes]]:
+    """Messages that failed before (at ``retries`` offsets), then the rest of the mbox from ``offset``."""
+    for start in retries:
+        yield next(iter_mbox(path, start))
+    yield from iter_mbox(path, offset)
+
+
+def _import_one(client: Any, account: str, url: str, raw: bytes, label_ids: list[str]) -> dict[str, Any]:
+    units = bucket(account, "units", USER_UNITS_PER_SECOND, USER_UNITS_PER_SECOND)
+    attempt = 0
+    while True:
+        units.acquire(QUOTA_UNITS["messages.import"])
+        try:
+            return upload_content(client._http, url, raw, {"labelIds": label_ids}, IMPORT_PARAMS)
+        except (GmailAPIError, httpx.TransportError) as exc:
+            transient = not isinstance(exc, GmailAPIError) or exc.status_code == 429 or exc.status_code >= 500
+            if not transient or attempt == IMPORT_RETRIES:
+                raise
+        time.sleep(2 ** attempt)
+        attempt += 1
+
+
+def import_mbox(
+    client: Any,
+    account: str,
+    path: str,
+    labels: list[str] | None = None,
+    create_labels: bool = True,
+    dedupe: bool = True,
+    max_messages: int = 5_000,
+) -> dict[str, Any]:
+    """Import messages from the mbox at ``path``, resuming from its import checkpoint if one exists."""
+    source = Path(path).expanduser()
+    if not source.is_file():
+        raise ValueError(f"mbox not found: {source}")
+    checkpoint = Checkpoint(source.with_name(source.name + ".import-checkpoint"))
+    state = checkpoint.load()
+    if state is not None and state["account"] != account:
+        raise ValueError(f"{checkpoint.path} belongs to an import into {state['account']!r}; delete it to start over")
+    state = state or {"account": account, "offset": 0, "imported": 0, "duplicates": 0, "failures": []}
+    failures = {failure["offset"]: failure for failure in state["failures"]}  # by start offset
+    mapping = LabelMap(client, create_labels)
+    extra = mapping.resolve(labels or [])
+    url = str(client._http.base_url.copy_with(path="/upload/gmail/v1/users/me/messages/import", query=None))
+    seen: set[str] = set()
+    processed = 0
+    complete = False
+    messages = _queued(source, state["offset"], sorted(failures))
+    with ThreadPoolExecutor(MAX_PARALLEL) as pool:
+        while processed < max_messages:
+            window = []
+            for start, end, raw in messages:
+                window.append((start, end, *split_takeout(raw)))
+                if len(window) == min(IMPORT_WINDOW, max_messages - processed):
+                    break
+            if not window:
+                complete = True
+                break
+            present = set()
+            if dedupe:
+                present = _existing(client, account, list(dict.fromkeys(mid for *_, mid in window if mid and mid not in seen)))
+            pending = []
+            for start, _, raw, names, message_id in window:
+                if dedupe and message_id and (message_id in seen or message_id in present):
+                    state["duplicates"] += 1
+                    failures.pop(start, None)
+                    continue
+                if message_id:
+                    seen.add(message_id)
+                label_ids = mapping.resolve(names)
+                pending.append((start, message_id, raw, label_ids + [i for i in extra if i not in label_ids]))
+
+            def run(item: tuple[int, str | None, bytes, list[str]]) -> dict[str, Any] | None:
+                start, message_id, raw, label_ids = item
+                try:
+                    _import_one(client, account, url, raw, label_ids)
+                    return None
+                except Exception as exc:
+                    return {"offset": start, "message_id": message_id, "error": str(exc)}
+
+            for (start, *_), error in zip(pending, pool.map(run, pending)):
+                if error is None:
+                    state["imported"] += 1
+                    failures.pop(start, None)
+                else:
+                    failures[start] = error
+            processed += len(window)
+            state["offset"] = max(state["offset"], *(end for _, end, *_ in window))
+            state["failures"] = [failures[start] for start in sorted(failures)]
+            checkpoint.save(state)
+        else:
+            complete = next(messages, None) is None
+    complete = complete and not failures
+    if complete:
+        checkpoint.remove()
+    return {
+        "path": str(source),
+        "imported": state["imported"],
+        "duplicates": state["duplicates"],
+        "failed": len(failures),
+        "this_call": processed,
+        "complete": complete,
+        "labels_created": mapping.created,
+        "unmapped_labels": sorted(mapping.unmapped),
+        "errors": [failures[start] for start in sorted(failures)][:MAX_REPORTED_ERRORS],
+        **({} if complete else {"checkpoint": str(checkpoint.path)}),
+    }
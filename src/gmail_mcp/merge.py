@@ -0,0 +1,87 @@
+"""Mail merge — render one message per recipient from templates and send within quota.
+
+Templates use ``string.Template`` syntax (``$name`` / ``${name}``, ``$$`` for
+a literal dollar). Every message is rendered before anything is sent, so a
+missing variable fails the batch up front instead of halfway through.
+
+Sends run on a small thread pool and draw from two per-account token buckets
+shared by every batch in the process: quota units (``messages.send`` costs
+100 of the per-user 250 units/second) and sends per minute
+(``GMAIL_MCP_SENDS_PER_MINUTE``, default 60). A 429 from Gmail backs off and
+retries the same message; other errors are reported for that recipient only.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
+from typing import Any
+
+from gmail_sdk import GmailAPIError
+
+from .quota import QUOTA_UNITS, USER_UNITS_PER_SECOND, bucket
+
+SENDS_PER_MINUTE = int(os.environ.get("GMAIL_MCP_SENDS_PER_MINUTE", "60"))
+MAX_RECIPIENTS = 500  # Gmail's daily sending limit for consumer accounts
+MAX_PARALLEL = 4
+RATE_LIMIT_RETRIES = 3
+_ADDRESS_FIELDS = ("to", "cc", "bcc")
+
+
+def render(template: str, variables: dict[str, Any]) -> str:
+    """Substitute ``variables`` into ``template``; raises ValueError naming a missing variable."""
+    try:
+        return Template(template).substitute({k: "" if v is None else str(v) for k, v in variables.items()})
+    except KeyError as exc:
+        raise ValueError(f"missing variable ${exc.args[0]}") from None
+
+
+def prepare(subject_template: str, body_template: str, recipients: list[Any]) -> list[dict[str, Any]]:
+    """Render every message; rows that cannot be rendered carry an ``error`` instead."""
+    if not isinstance(recipients, list) or not recipients:
+        raise ValueError("recipients must be a non-empty JSON array of objects")
+    if len(recipients) > MAX_RECIPIENTS:
+        raise ValueError(f"At most {MAX_RECIPIENTS} recipients per batch (got {len(recipients)})")
+    messages = []
+    for index, variables in enumerate(recipients):
+        if not isinstance(variables, dict) or not variables.get("to"):
+            messages.append({"index": index, "to": None, "error": "each recipient needs a 'to' address"})
+            continue
+        row: dict[str, Any] = {"index": index, **{f: variables.get(f) for f in _ADDRESS_FIELDS}}
+        try:
+            row["subject"] = render(subject_template, variables)
+            row["body"] = render(body_template, variables)
+        except ValueError as exc:
+            row["error"] = str(exc)
+        messages.append(row)
+    return messages
+
+
+def _send_one(client: Any, account: str, message: dict[str, Any]) -> dict[str, Any]:
+    sends = bucket(account, "sends", SENDS_PER_MINUTE / 60, max(1, SENDS_PER_MINUTE // 10))
+    units = bucket(account, "units", USER_UNITS_PER_SECOND, USER_UNITS_PER_SECOND)
+    row = {"index": message["index"], "to": message["to"]}
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        sends.acquire()
+        units.acquire(QUOTA_UNITS["messages.send"])
+        try:
+            result = client.send_message(
+                to=message["to"], subject=message["subject"], body=message["body"], cc=message["cc"], bcc=message["bcc"],
+            )
+            return {**row, "status": "sent", "id": result.get("id"), "threadId": result.get("threadId")}
+        except GmailAPIError as exc:
+            if exc.status_code == 429 and attempt < RATE_LIMIT_RETRIES:
+                time.sleep(2 ** attempt)
+                continue
+            return {**row, "status": "error", "error": f"{exc.status_code}: {exc.message}"}
+        except Exception as exc:
+            return {**row, "status": "error", "error": str(exc)}
+    return row
+
+
+def send_all(client: Any, account: str, messages: list[dict[str, Any]], max_parallel: int = MAX_PARALLEL) -> list[dict[str, Any]]:
+    """Send rendered messages concurrently; returns one status row per message, in order."""
+    with ThreadPoolExecutor(max(1, min(max_parallel, len(messages)))) as pool:
+        return list(pool.map(lambda message: _send_one(client, account, message), messages))
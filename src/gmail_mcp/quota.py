@@ -0,0 +1,167 @@
+"""Gmail API quota accounting — maps HTTP requests to API methods and quota units.
+
+Unit costs follow the published per-method table for the Gmail API
+(https://developers.google.com/gmail/api/reference/quota).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+
+QUOTA_UNITS: dict[str, int] = {
+    "users.getProfile": 1,
+    "users.watch": 100,
+    "users.stop": 50,
+    "messages.list": 5,
+    "messages.get": 5,
+    "messages.send": 100,
+    "messages.import": 25,
+    "messages.insert": 25,
+    "messages.modify": 5,
+    "messages.trash": 5,
+    "messages.untrash": 5,
+    "messages.delete": 10,
+    "messages.batchModify": 50,
+    "messages.batchDelete": 50,
+    "messages.attachments.get": 5,
+    "threads.list": 10,
+    "threads.get": 10,
+    "threads.modify": 10,
+    "threads.trash": 10,
+    "threads.untrash": 10,
+    "threads.delete": 20,
+    "drafts.list": 5,
+    "drafts.get": 5,
+    "drafts.create": 10,
+    "drafts.update": 15,
+    "drafts.send": 100,
+    "drafts.delete": 10,
+    "labels.list": 1,
+    "labels.get": 1,
+    "labels.create": 5,
+    "labels.patch": 5,
+    "labels.update": 5,
+    "labels.delete": 5,
+    "history.list": 2,
+    "settings.filters.list": 1,
+    "settings.filters.get": 1,
+    "settings.filters.create": 5,
+    "settings.filters.delete": 5,
+    "settings.getVacation": 1,
+    "settings.updateVacation": 5,
+}
+
+# (HTTP method, path suffix pattern, API method). Order matters: specific
+# sub-resources must come before the generic "{collection}/{id}" routes.
+_ROUTES: list[tuple[str, re.Pattern[str], str]] = [
+    (verb, re.compile(pattern + "$"), name)
+    for verb, pattern, name in [
+        ("GET", r"/users/me/profile", "users.getProfile"),
+        ("POST", r"/users/me/watch", "users.watch"),
+        ("POST", r"/users/me/stop", "users.stop"),
+        ("GET", r"/users/me/messages", "messages.list"),
+        ("POST", r"/users/me/messages", "messages.insert"),
+        ("POST", r"/users/me/messages/send", "messages.send"),
+        ("POST", r"/users/me/messages/import", "messages.import"),
+        ("POST", r"/users/me/messages/batchModify", "messages.batchModify"),
+        ("POST", r"/users/me/messages/batchDelete", "messages.batchDelete"),
+        ("GET", r"/users/me/messages/[^/]+/attachments/[^/]+", "messages.attachments.get"),
+        ("POST", r"/users/me/messages/[^/]+/modify", "messages.modify"),
+        ("POST", r"/users/me/messages/[^/]+/trash", "messages.trash"),
+        ("POST", r"/users/me/messages/[^/]+/untrash", "messages.untrash"),
+        ("GET", r"/users/me/messages/[^/]+", "messages.get"),
+        ("DELETE", r"/users/me/messages/[^/]+", "messages.delete"),
+        ("GET", r"/users/me/threads", "threads.list"),
+        ("POST", r"/users/me/threads/[^/]+/modify", "threads.modify"),
+        ("POST", r"/users/me/threads/[^/]+/trash", "threads.trash"),
+        ("POST", r"/users/me/threads/[^/]+/untrash", "threads.untrash"),
+        ("GET", r"/users/me/threads/[^/]+", "threads.get"),
+        ("DELETE", r"/users/me/threads/[^/]+", "threads.delete"),
+        ("GET", r"/users/me/drafts", "drafts.list"),
+        ("POST", r"/users/me/drafts", "drafts.create"),
+        ("POST", r"/users/me/drafts/send", "drafts.send"),
+        ("GET", r"/users/me/drafts/[^/]+", "drafts.get"),
+        ("PUT", r"/users/me/drafts/[^/]+", "drafts.update"),
+        ("DELETE", r"/users/me/drafts/[^/]+", "drafts.delete"),
+        ("GET", r"/users/me/labels", "labels.list"),
+        ("POST", r"/users/me/labels", "labels.create"),
+        ("GET", r"/users/me/labels/[^/]+", "labels.get"),
+        ("PATCH", r"/users/me/labels/[^/]+", "labels.patch"),
+        ("PUT", r"/users/me/labels/[^/]+", "labels.update"),
+        ("DELETE", r"/users/me/labels/[^/]+", "labels.delete"),
+        ("GET", r"/users/me/history", "history.list"),
+        ("GET", r"/users/me/settings/filters", "settings.filters.list"),
+        ("POST", r"/users/me/settings/filters", "settings.filters.create"),
+        ("GET", r"/users/me/settings/filters/[^/]+", "settings.filters.get"),
+        ("DELETE", r"/users/me/settings/filters/[^/]+", "settings.filters.delete"),
+        ("GET", r"/users/me/settings/vacation", "settings.getVacation"),
+        ("PUT", r"/users/me/settings/vacation", "settings.updateVacation"),
+    ]
+]
+
+
+def api_method(http_method: str, path: str) -> str | None:
+    """Return the Gmail API method name (e.g. "messages.get") for a request, or None."""
+    http_method = http_method.upper()
+    for verb, pattern, name in _ROUTES:
+        if verb == http_method and pattern.search(path):
+            return name
+    return None
+
+
+def quota_units(http_method: str, path: str) -> int:
+    """Return the quota units a single request costs (0 if the method is unknown)."""
+    name = api_method(http_method, path)
+    return QUOTA_UNITS.get(name, 0) if name else 0
+
+
+# Per-user limit on quota units per second (the Gmail API default is 250).
+USER_UNITS_PER_SECOND = float(os.environ.get("GMAIL_MCP_QUOTA_UNITS_PER_SEC", "250"))
+
+
+class TokenBucket:
+    """Blocking token bucket: ``rate`` tokens per second, bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take ``tokens``, sleeping until they are available; returns the seconds waited.
+
+        A request costing more than ``capacity`` waits for a full bucket and
+        then charges its whole cost, leaving the bucket in debt that later
+        callers wait out, so the long-run rate still holds.
+        """
+        needed = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+_buckets: dict[tuple[str, str], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket(account: str, name: str, rate: float, capacity: float) -> TokenBucket:
+    """The shared ``name`` bucket for an account, created on first use."""
+    with _buckets_lock:
+        found = _buckets.get((account, name))
+        if found is None:
+            found = _buckets[(account, name)] = TokenBucket(rate, capacity)
+        return found
@@ -0,0 +1,215 @@
+"""Raw messages — stream ``format=raw`` to a file instead of holding JSON copies.
+
+A ``format=raw`` response is one JSON object whose ``raw`` field is the whole
+RFC 822 message in base64url. Parsing it the usual way keeps the response
+bytes, the decoded JSON string and the decoded message in memory at once,
+and dumping it into a tool result adds another. Here the response is read
+as a stream: the small metadata fields around ``raw`` are buffered, while
+the ``raw`` value is decoded piece by piece straight into
+``GMAIL_MCP_RAW_DIR/<account>/<message id>.eml`` (default
+``~/.cache/gmail-mcp/raw``). So memory holds one network chunk at a time
+however large the message is. The directories must be owned by the current
+user and are kept private (mode 0700).
+
+Message content never changes, so a file already on disk is reused; only
+the labels are refreshed (from the label overlay, or a ``format=minimal``
+get). After each download, files unused for ``GMAIL_MCP_RAW_MAX_AGE``
+seconds (default a week) are removed, then the least recently used ones
+until the directory holds at most ``GMAIL_MCP_RAW_MAX_BYTES`` (default 1 GiB). ``RawMessage`` parses the header block on first use and can map the
+file read-only for callers that want bytes without a copy.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import mmap
+import os
+import re
+import stat
+import tempfile
+import time
+from email.parser import BytesHeaderParser
+from email.policy import default as default_policy
+from pathlib import Path
+from typing import IO, Any, Iterable
+
+from gmail_sdk import GmailAPIError
+
+from .cache import label_overlay
+
+RAW_DIR = Path(os.environ.get("GMAIL_MCP_RAW_DIR") or os.path.expanduser("~/.cache/gmail-mcp/raw"))
+RAW_MAX_BYTES = int(os.environ.get("GMAIL_MCP_RAW_MAX_BYTES", str(1024 ** 3)))
+RAW_MAX_AGE = float(os.environ.get("GMAIL_MCP_RAW_MAX_AGE", str(7 * 86400)))
+RAW_FIELDS = "id,threadId,labelIds,sizeEstimate,internalDate,historyId,raw"
+MAX_HEADER_BYTES = 1024 * 1024
+_RAW_KEY = re.compile(rb'"raw"\s*:\s*"')
+_HEADER_END = re.compile(rb"\r?\n\r?\n")
+_MESSAGE_ID = re.compile(r"[0-9a-zA-Z]+")
+
+
+class _Base64Sink:
+    """Decode base64url text that arrives in arbitrary pieces into ``out``."""
+
+    def __init__(self, out: IO[bytes]) -> None:
+        self.out = out
+        self.carry = b""
+        self.written = 0
+
+    def write(self, data: bytes) -> None:
+        data = self.carry + data
+        cut = len(data) - len(data) % 4
+        if cut:
+            self.written += self.out.write(base64.urlsafe_b64decode(data[:cut]))
+        self.carry = data[cut:]
+
+    def close(self) -> None:
+        if self.carry.rstrip(b"="):
+            self.written += self.out.write(base64.urlsafe_b64decode(self.carry + b"=" * (-len(self.carry) % 4)))
+        self.carry = b""
+
+
+def decode_stream(chunks: Iterable[bytes], out: IO[bytes]) -> dict[str, Any]:
+    """Write the decoded ``raw`` field of a streamed message resource to ``out``; return the other fields."""
+    head, tail = bytearray(), bytearray()
+    sink = _Base64Sink(out)
+    state = "head"  # then "raw" inside the value, then "tail"
+    for chunk in chunks:
+        if state == "head":
+            head += chunk
+            match = _RAW_KEY.search(head)
+            if match is None:
+                continue
+            chunk = bytes(head[match.end():])
+            del head[match.end() - 1:]  # keep everything before the opening quote
+            state = "raw"
+        if state == "raw":
+            end = chunk.find(b'"')
+            if end < 0:
+                sink.write(chunk)
+                continue
+            sink.write(chunk[:end])
+            sink.close()
+            chunk = chunk[end + 1:]
+            state = "tail"
+        tail += chunk
+    if state != "tail":
+        raise GmailAPIError(502, "Response has no complete raw field")
+    return json.loads(bytes(head) + b'""' + bytes(tail))
+
+
+class RawMessage:
+    """A raw message on disk with its metadata; headers are parsed on first use."""
+
+    def __init__(self, path: Path, meta: dict[str, Any]) -> None:
+        self.path = path
+        self.meta = meta
+        self._headers: list[dict[str, str]] | None = None
+
+    @property
+    def size(self) -> int:
+        return self.path.stat().st_size
+
+    def open(self) -> IO[bytes]:
+        return open(self.path, "rb")
+
+    def mmap(self) -> mmap.mmap:
+        """A read-only memory map of the message (empty files cannot be mapped)."""
+        with self.open() as source:
+            return mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def header_block(self) -> bytes:
+        """The bytes up to and including the blank line that ends the headers."""
+        block = bytearray()
+        with self.open() as source:
+            while len(block) < MAX_HEADER_BYTES:
+                chunk = source.read(64 * 1024)
+                if not chunk:
+                    break
+                scan_from = max(0, len(block) - 3)
+                block += chunk
+                match = _HEADER_END.search(block, scan_from)
+                if match is not None:
+                    return bytes(block[:match.end()])
+        return bytes(block[:MAX_HEADER_BYTES])
+
+    @property
+    def headers(self) -> list[dict[str, str]]:
+        if self._headers is None:
+            parsed = BytesHeaderParser(policy=default_policy).parsebytes(self.header_block())
+            self._headers = [{"name": name, "value": str(value)} for name, value in parsed.items()]
+        return self._headers
+
+    def summary(self) -> dict[str, Any]:
+        return {**self.meta, "path": str(self.path), "bytes": self.size, "headers": self.headers}
+
+
+def _raise_for(response: Any) -> None:
+    if response.status_code >= 400:
+        response.read()
+        try:
+            message = response.json().get("error", {}).get("message", response.text)
+        except ValueError:
+            message = response.text
+        raise GmailAPIError(response.status_code, message)
+
+
+def _private_dir(path: Path) -> None:
+    """Create ``path`` if needed; refuse it unless it is a real directory owned by us, and make it 0700."""
+    path.mkdir(parents=True, exist_ok=True, mode=0o700)
+    st = path.lstat()
+    if not stat.S_ISDIR(st.st_mode) or (hasattr(os, "getuid") and st.st_uid != os.getuid()):
+        raise PermissionError(f"{path} is not a directory owned by the current user")
+    if st.st_mode & 0o077:
+        os.chmod(path, 0o700)
+
+
+def _evict(keep: Path) -> None:
+    """Remove files unused for ``RAW_MAX_AGE``, then the least recently used beyond ``RAW_MAX_BYTES``."""
+    files = []
+    for path in RAW_DIR.glob("*/*.eml"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue  # removed by another call
+        files.append((st.st_mtime, st.st_size, path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    cutoff = time.time() - RAW_MAX_AGE
+    for mtime, size, path in files:
+        if path == keep or (mtime >= cutoff and total <= RAW_MAX_BYTES):
+            continue
+        path.unlink(missing_ok=True)
+        path.with_suffix(".json").unlink(missing_ok=True)
+        total -= size
+
+
+def fetch_raw(client: Any, account: str, message_id: str) -> RawMessage:
+    """The message as a file under ``RAW_DIR``, downloading it only if it is not already there."""
+    if not _MESSAGE_ID.fullmatch(message_id):
+        raise ValueError(f"Invalid message ID: {message_id!r}")
+    folder = RAW_DIR / account
+    path = folder / f"{message_id}.eml"
+    sidecar = folder / f"{message_id}.json"
+    if path.is_file() and sidecar.is_file():
+        os.utime(path)  # recently used, for eviction
+        meta = json.loads(sidecar.read_text())
+        labels = label_overlay.get(account, message_id)
+        if labels is None:
+            labels = client.get_message(message_id, format_="minimal").get("labelIds", [])
+        return RawMessage(path, {**meta, "labelIds": labels})
+    _private_dir(RAW_DIR)
+    _private_dir(folder)
+    with tempfile.NamedTemporaryFile(dir=folder, suffix=".part", delete=False) as out:
+        try:
+            with client._http.stream("GET", f"/users/me/messages/{message_id}", params={"format": "raw", "fields": RAW_FIELDS}) as response:
+                _raise_for(response)
+                meta = decode_stream(response.iter_bytes(), out)
+        except BaseException:
+            os.unlink(out.name)
+            raise
+    os.replace(out.name, path)
+    label_overlay.note(account, [meta])
+    sidecar.write_text(json.dumps({k: v for k, v in meta.items() if k != "labelIds"}))
+    _evict(path)
+    return RawMessage(path, meta)
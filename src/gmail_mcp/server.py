@@ -2,34 +2,128 @@
 
 from __future__ import annotations
 
+import argparse
+import atexit
+import contextlib
+import functools
+import inspect
 import json
+import logging
+import os
+import threading
+import weakref
 from typing import Any
 
+import anyio
+
 from gmail_sdk import GmailClient, GmailAPIError
 from mcp.server.fastmcp import FastMCP
 
+from . import budget, cache, coalesce, tracing, workers
 from .accounts import resolve_account
 from .auth import SECRETS_DIR
 
-mcp = FastMCP("gmail")
+
+logger = logging.getLogger(__name__)
+
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class GmailMCP(FastMCP):
+    """FastMCP app that runs sync tools in worker threads and traces every call.
+
+    FastMCP calls sync tool functions directly on the event loop, so one slow
+    Gmail request would stall every other in-flight call. Registered tools are
+    wrapped to run in anyio's thread pool instead; the decorated function
+    itself is returned unchanged.
+
+    Each client session may run at most ``session_concurrency`` tool calls at
+    once (``GMAIL_MCP_SESSION_CONCURRENCY``, default 8); further calls wait.
+    This keeps one session from using every worker thread when many sessions
+    share the process over HTTP.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.session_concurrency = int(os.environ.get("GMAIL_MCP_SESSION_CONCURRENCY", "8"))
+        self._session_limits: weakref.WeakKeyDictionary[Any, anyio.Semaphore] = weakref.WeakKeyDictionary()
+
+    def _session_limit(self) -> anyio.Semaphore | None:
+        try:
+            session = self._mcp_server.request_context.session
+        except LookupError:
+            return None  # called outside a request (tests, in-process use)
+        limit = self._session_limits.get(session)
+        if limit is None:
+            limit = self._session_limits[session] = anyio.Semaphore(self.session_concurrency)
+        return limit
+
+    def add_tool(self, fn: Any, *args: Any, **kwargs: Any) -> None:
+        if not inspect.iscoroutinefunction(fn):
+            fn = _in_thread(fn)
+        super().add_tool(fn, *args, **kwargs)
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> Any:
+        async with self._session_limit() or contextlib.nullcontext():
+            with tracing.span(f"tool {name}", **{"mcp.tool": name, "account": arguments.get("account")}):
+                return await super().call_tool(name, arguments)
+
+
+def _in_thread(fn: Any) -> Any:
+    @functools.wraps(fn)
+    async def run(**kwargs: Any) -> Any:
+        supervisor = workers.supervisor
+        shard = supervisor.shard_for(fn.__name__, kwargs) if supervisor is not None else None
+        if shard is not None:
+            try:
+                return await supervisor.call(shard, fn.__name__, kwargs)
+            except Exception as exc:
+                return _error_response(exc)
+        return await anyio.to_thread.run_sync(functools.partial(fn, **kwargs))
+
+    return run
+
+
+mcp = GmailMCP("gmail")
 
 # ---------------------------------------------------------------------------
 # Per-account client cache
 # ---------------------------------------------------------------------------
 
 _clients: dict[str, GmailClient] = {}
+_client_locks: dict[str, threading.Lock] = {}
+_clients_lock = threading.Lock()  # guards _client_locks only
+
+# Scheme and host of the Gmail API. Override with GMAIL_API_ROOT to point the
+# server at a stand-in such as benchmarks/fake_gmail.py.
+GMAIL_API_ROOT = os.environ.get("GMAIL_API_ROOT", "https://gmail.googleapis.com").rstrip("/")
 
 
 def get_client(account: str | None = None) -> GmailClient:
     """Return a cached GmailClient for the resolved account alias.
 
     Creates the client on first call per account. The SDK handles token
-    loading and refresh internally.
+    loading and refresh internally. Message content on the returned client is
+    served from the content cache, and other reads are coalesced: identical
+    concurrent calls share one request. Building a client (which may refresh
+    its token) holds a lock for that account only.
     """
-    alias = resolve_account(account)
-    if alias not in _clients:
-        _clients[alias] = GmailClient(account=alias, secrets_dir=str(SECRETS_DIR))
-    return _clients[alias]
+    with tracing.span("resolve_account"):
+        alias = resolve_account(account)
+    client = _clients.get(alias)
+    if client is not None:
+        return client
+    with _clients_lock:
+        lock = _client_locks.setdefault(alias, threading.Lock())
+    with tracing.span("get_client", account=alias), lock:
+        if alias not in _clients:
+            with tracing.span("token_refresh", account=alias):
+                client = GmailClient(account=alias, secrets_dir=str(SECRETS_DIR))
+            client._http.base_url = f"{GMAIL_API_ROOT}/gmail/v1"
+            tracing.instrument_client(client)
+            coalesced = coalesce.CoalescingClient(client, coalesce.flight)
+            _clients[alias] = cache.CachingClient(coalesced, cache.content_cache, cache.label_overlay, cache.label_counts)
+        return _clients[alias]
 
 
 # ---------------------------------------------------------------------------
@@ -55,6 +149,23 @@ def _slim_response(data: Any) -> Any:
     return result
 
 
+def _json_response(data: Any, max_bytes: int | None = None) -> str:
+    """Slim an API result and serialize it as the JSON string a tool returns.
+
+    With ``max_bytes`` set, an over-budget result is cut down and carries a
+    ``truncated`` object with a continuation cursor (see budget.py).
+    """
+    with tracing.span("slim_response"):
+        slim = _slim_response(data)
+    if max_bytes:
+        with tracing.span("budget", max_bytes=max_bytes):
+            slim = budget.apply_budget(slim, max_bytes)
+    with tracing.span("serialize") as attrs:
+        text = json.dumps(slim, indent=2)
+        attrs["bytes"] = len(text)
+    return text
+
+
 def _parse_json(value: str | dict | list | None, name: str) -> Any:
     """Parse a JSON string into a Python object, or pass through if already parsed."""
     if value is None:
@@ -90,6 +201,40 @@ from .tools import register_all_tools  # noqa: E402
 register_all_tools()
 
 
-def main() -> None:
-    """Entry point for the console script."""
-    mcp.run()
+def main(argv: list[str] | None = None) -> None:
+    """Entry point for the console script.
+
+    Serves one client over stdio by default. ``--transport http`` serves many
+    concurrent sessions over streamable HTTP from one process, so they share
+    clients, tokens, connection pools and caches. ``--workers N`` shards
+    accounts across N worker processes (see workers.py).
+    """
+    parser = argparse.ArgumentParser(prog="gmail-mcp-ldraney", description="MCP server for Gmail.")
+    parser.add_argument("--transport", choices=("stdio", "http"), default=os.environ.get("GMAIL_MCP_TRANSPORT", "stdio"))
+    parser.add_argument("--host", default=os.environ.get("GMAIL_MCP_HOST", "127.0.0.1"), help="HTTP bind address (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("GMAIL_MCP_PORT", "8000")), help="HTTP port (default 8000)")
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("GMAIL_MCP_WORKERS", "0")),
+        help="shard accounts across this many worker processes (default 0: serve in-process)",
+    )
+    parser.add_argument(
+        "--session-concurrency", type=int, default=mcp.session_concurrency,
+        help=f"maximum concurrent tool calls per session (default {mcp.session_concurrency})",
+    )
+    args = parser.parse_args(argv)
+
+    mcp.session_concurrency = args.session_concurrency
+    if args.workers > 0:
+        workers.start(args.workers)
+        atexit.register(workers.stop)
+    if args.transport == "stdio":
+        mcp.run()
+        return
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    if args.host not in _LOOPBACK_HOSTS:
+        # FastMCP only allows loopback Host headers by default. The server has no
+        # auth of its own, so anything non-local belongs behind an authenticating proxy.
+        mcp.settings.transport_security = None
+        logger.warning("Serving Gmail tools on %s without authentication", args.host)
+    mcp.run(transport="streamable-http")
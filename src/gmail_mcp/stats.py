@@ -0,0 +1,234 @@
+"""Mailbox aggregates — messages and bytes per sender, mailing list, label and day.
+
+A scan lists message IDs newest first and reads each message's
+``metadata`` (From and List-Id headers plus ``sizeEstimate``, ``labelIds``
+and ``internalDate``) from the content cache when already held with fresh
+labels in the label overlay, else through the batch endpoint, paced by
+the account's quota-unit bucket.
+Every message becomes one small row that is added to running totals.
+Rows are kept, so later calls replay
+``history.list`` from the scan's history ID and adjust the totals for
+added, deleted and relabelled messages instead of scanning again. A
+history ID too old for ``history.list`` triggers a fresh scan.
+
+Trash and spam are left out, as in Gmail's own message list.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from email.utils import parseaddr
+from typing import Any, Iterable
+
+from gmail_sdk import GmailAPIError
+
+from .batch import BatchRequest, execute_metered
+from .bodies import header_map
+from .cache import content_cache, label_overlay, message_key
+
+STATS_HEADERS = ["From", "List-Id"]
+DIMENSIONS = ("sender", "list", "label", "day")
+PAGE_SIZE = 500
+MAX_HISTORY_RECORDS = 10_000  # beyond this a rescan is about as cheap
+_EXCLUDED = frozenset({"TRASH", "SPAM"})
+
+
+@dataclass(frozen=True)
+class _Row:
+    sender: str
+    list_id: str | None
+    size: int
+    labels: tuple[str, ...]
+    day: date
+
+    def keys(self) -> Iterable[tuple[str, Any]]:
+        yield "sender", self.sender
+        if self.list_id:
+            yield "list", self.list_id
+        for label in self.labels:
+            yield "label", label
+        yield "day", self.day
+
+
+def _row(message: dict[str, Any]) -> _Row:
+    headers = header_map(message.get("payload", {}))
+    sender = headers.get("from", "")
+    list_id = headers.get("list-id", "")
+    if "<" in list_id:
+        list_id = list_id[list_id.rindex("<") + 1:].rstrip(">").strip()
+    return _Row(
+        sender=(parseaddr(sender)[1] or sender).lower(),
+        list_id=list_id.lower() or None,
+        size=int(message.get("sizeEstimate", 0)),
+        labels=tuple(message.get("labelIds", [])),
+        day=datetime.fromtimestamp(int(message.get("internalDate", 0)) / 1000, tz=timezone.utc).date(),
+    )
+
+
+class MailboxStats:
+    """Per-message rows and the running [messages, bytes] totals derived from them."""
+
+    def __init__(self, history_id: int, limit: int) -> None:
+        self.history_id = history_id
+        self.limit = limit
+        self.complete = False
+        self.total_bytes = 0
+        self._rows: dict[str, _Row] = {}
+        self._totals: dict[str, dict[Any, list[int]]] = {dimension: {} for dimension in DIMENSIONS}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, message_id: str) -> bool:
+        return message_id in self._rows
+
+    def _apply(self, row: _Row, sign: int) -> None:
+        self.total_bytes += sign * row.size
+        for dimension, key in row.keys():
+            totals = self._totals[dimension]
+            entry = totals.setdefault(key, [0, 0])
+            entry[0] += sign
+            entry[1] += sign * row.size
+            if entry[0] <= 0:
+                del totals[key]
+
+    def add(self, message: dict[str, Any]) -> None:
+        self.remove(message["id"])
+        if _EXCLUDED.isdisjoint(message.get("labelIds", [])):
+            row = _row(message)
+            self._rows[message["id"]] = row
+            self._apply(row, 1)
+
+    def remove(self, message_id: str) -> None:
+        row = self._rows.pop(message_id, None)
+        if row is not None:
+            self._apply(row, -1)
+
+    def relabel(self, message_id: str, labels: list[str]) -> None:
+        row = self._rows.get(message_id)
+        if row is None:
+            return
+        self._apply(row, -1)
+        if not _EXCLUDED.isdisjoint(labels):
+            del self._rows[message_id]
+            return
+        row = _Row(row.sender, row.list_id, row.size, tuple(labels), row.day)
+        self._rows[message_id] = row
+        self._apply(row, 1)
+
+    def totals(self, dimension: str) -> dict[Any, tuple[int, int]]:
+        """(messages, bytes) per key of ``dimension``."""
+        return {key: (entry[0], entry[1]) for key, entry in self._totals[dimension].items()}
+
+    def top(self, dimension: str, n: int, by: str = "messages") -> list[tuple[Any, int, int]]:
+        """The ``n`` largest (key, messages, bytes) entries, by message count or bytes."""
+        index = 1 if by == "bytes" else 0
+        ranked = sorted(self._totals[dimension].items(), key=lambda item: (-item[1][index], str(item[0])))
+        return [(key, entry[0], entry[1]) for key, entry in ranked[:n]]
+
+
+def _fetch(client: Any, account: str, message_ids: list[str]) -> list[dict[str, Any]]:
+    """Metadata for ``message_ids`` from the content cache (with fresh labels), the rest in batch requests."""
+    found, missing = [], []
+    for message_id in message_ids:
+        labels = label_overlay.get(account, message_id)
+        for fmt, headers in (("metadata", STATS_HEADERS), ("full", None)):
+            message = content_cache.get(message_key(account, message_id, fmt, headers))
+            if message is not None and labels is not None:
+                found.append({**message, "labelIds": labels})
+                break
+        else:
+            missing.append(message_id)
+    requests = [
+        BatchRequest("GET", f"/users/me/messages/{message_id}", {"format": "metadata", "metadataHeaders": STATS_HEADERS})
+        for message_id in missing
+    ]
+    for result in execute_metered(client, account, requests):
+        if isinstance(result, GmailAPIError):
+            if result.status_code != 404:  # deleted since it was listed
+                raise result
+        else:
+            found.append(result)
+            label_overlay.note(account, [result])
+    return found
+
+
+def scan(client: Any, account: str, limit: int) -> MailboxStats:
+    """Aggregate the newest ``limit`` messages of the mailbox."""
+    stats = MailboxStats(int(client.get_profile().get("historyId", 0)), limit)
+    page_token = None
+    while len(stats) < limit:
+        result = client.list_messages(max_results=min(PAGE_SIZE, limit - len(stats)), page_token=page_token)
+        for message in _fetch(client, account, [m["id"] for m in result.get("messages", [])]):
+            stats.add(message)
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            stats.complete = True
+            break
+    return stats
+
+
+def update(client: Any, account: str, stats: MailboxStats) -> bool:
+    """Apply mailbox history since ``stats.history_id``; False if a rescan is needed instead."""
+    records: list[dict[str, Any]] = []
+    page_token = None
+    try:
+        while True:
+            result = client.list_history(start_history_id=str(stats.history_id), max_results=500, page_token=page_token)
+            records.extend(result.get("history", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+            if len(records) > MAX_HISTORY_RECORDS:
+                return False
+    except GmailAPIError as exc:
+        if exc.status_code == 404:
+            return False
+        raise
+    added: dict[str, None] = {}
+    for record in records:
+        for change in record.get("messagesAdded", []):
+            added[change["message"]["id"]] = None
+        for change in record.get("messagesDeleted", []):
+            added.pop(change["message"]["id"], None)
+            stats.remove(change["message"]["id"])
+        for change in record.get("labelsAdded", []) + record.get("labelsRemoved", []):
+            message = change["message"]
+            if message["id"] in stats:
+                stats.relabel(message["id"], message.get("labelIds", []))
+            elif stats.complete and _EXCLUDED.isdisjoint(message.get("labelIds", [])):
+                added[message["id"]] = None  # e.g. restored from trash
+    for message in _fetch(client, account, [message_id for message_id in added if message_id not in stats]):
+        stats.add(message)
+    stats.history_id = int(result.get("historyId", stats.history_id))
+    return True
+
+
+class StatsStore:
+    """Each account's ``MailboxStats``, refreshed under a per-account lock."""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, MailboxStats] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, client: Any, account: str, limit: int) -> MailboxStats:
+        with self._lock:
+            lock = self._locks.setdefault(account, threading.Lock())
+        with lock:
+            stats = self._stats.get(account)
+            if stats is not None and not stats.complete and stats.limit < limit:
+                stats = None  # asked for more than was scanned
+            if stats is None or not update(client, account, stats):
+                stats = scan(client, account, limit)
+                self._stats[account] = stats
+            return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+mailbox_stats = StatsStore()
@@ -13,3 +13,9 @@ def register_all_tools() -> None:
     from . import filters  # noqa: F401
     from . import settings  # noqa: F401
     from . import history  # noqa: F401
+    from . import continuation  # noqa: F401
+    from . import watch  # noqa: F401
+    from . import batch  # noqa: F401
+    from . import analytics  # noqa: F401
+    from . import archive  # noqa: F401
+    from . import contacts  # noqa: F401
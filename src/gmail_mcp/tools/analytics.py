@@ -0,0 +1,188 @@
+"""Gmail analytics tools — counts, volume histograms and mailbox aggregates."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated, Any
+
+from gmail_sdk import GmailAPIError
+from pydantic import Field
+
+from ..accounts import resolve_account
+from ..batch import BatchRequest, execute_metered
+from ..server import mcp, get_client, _error_response, _json_response, _parse_json
+from ..stats import MailboxStats, mailbox_stats
+
+BUCKET_UNITS = ("day", "week", "month")
+MAX_QUERIES = 500
+MAX_BUCKETS = 400
+
+
+def _parse_date(value: str, name: str) -> date:
+    try:
+        return datetime.strptime(value.replace("-", "/"), "%Y/%m/%d").date()
+    except ValueError:
+        raise ValueError(f"{name} must be a date like 2024/01/31, got {value!r}") from None
+
+
+def _bucket_start(day: date, unit: str) -> date:
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day: date, unit: str) -> date:
+    if unit == "month":
+        return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=7 if unit == "week" else 1)
+
+
+def buckets(after: date, before: date, unit: str) -> list[tuple[date, date]]:
+    """Calendar-aligned ``[start, end)`` ranges covering ``after`` up to ``before``, the first clipped to ``after``."""
+    if unit not in BUCKET_UNITS:
+        raise ValueError(f"histogram must be one of {', '.join(BUCKET_UNITS)}")
+    if before <= after:
+        raise ValueError("before must be later than after")
+    ranges = []
+    start = after
+    while start < before:
+        end = min(_next_bucket(_bucket_start(start, unit), unit), before)
+        ranges.append((start, end))
+        start = end
+        if len(ranges) > MAX_BUCKETS:
+            raise ValueError(f"More than {MAX_BUCKETS} {unit} buckets: narrow the range or use a larger unit")
+    return ranges
+
+
+def count_queries(client: Any, account: str, queries: list[str], include_spam_trash: bool = False) -> list[int | GmailAPIError]:
+    """Gmail's ``resultSizeEstimate`` for each query, listed through batch requests within the account's quota."""
+    requests = [
+        BatchRequest("GET", "/users/me/messages", {
+            "q": query or None,
+            "maxResults": 1,
+            "includeSpamTrash": "true" if include_spam_trash else None,
+        })
+        for query in queries
+    ]
+    return [
+        result if isinstance(result, GmailAPIError) else int(result.get("resultSizeEstimate", 0))
+        for result in execute_metered(client, account, requests)
+    ]
+
+
+def _row(row: dict[str, Any], result: int | GmailAPIError) -> dict[str, Any]:
+    if isinstance(result, GmailAPIError):
+        return {**row, "error": True, "status_code": result.status_code, "message": result.message}
+    return {**row, "estimate": result}
+
+
+def _queries(query: str | None, queries: str | None) -> list[str]:
+    parsed = _parse_json(queries, "queries")
+    if parsed is not None and (not isinstance(parsed, list) or not all(isinstance(q, str) for q in parsed)):
+        raise ValueError("queries must be a JSON array of search query strings")
+    found = ([query] if query is not None else []) + (parsed or [])
+    if not found:
+        raise ValueError("Provide query or queries")
+    if len(found) > MAX_QUERIES:
+        raise ValueError(f"At most {MAX_QUERIES} queries per call")
+    return found
+
+
+@mcp.tool()
+def gmail_count(
+    query: Annotated[str | None, Field(description="Gmail search query to count (e.g. 'from:boss@co.com is:unread')")] = None,
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    queries: Annotated[str | None, Field(description='JSON array of search queries to count together, e.g. ["is:unread", "in:inbox has:attachment"]')] = None,
+    histogram: Annotated[str | None, Field(description="Split query into 'day', 'week' or 'month' buckets between after and before and count each")] = None,
+    after: Annotated[str | None, Field(description="Histogram start date, inclusive (YYYY/MM/DD)")] = None,
+    before: Annotated[str | None, Field(description="Histogram end date, exclusive (YYYY/MM/DD). Defaults to tomorrow.")] = None,
+    include_spam_trash: Annotated[bool, Field(description="Count messages in Spam and Trash too")] = False,
+) -> str:
+    """Count messages matching one or more search queries, without listing or fetching them.
+
+    Counts are Gmail's resultSizeEstimate, so large counts are approximate.
+    Queries (or histogram buckets) go out together in batch requests, as
+    many per request as the account's quota allows per second (50 at the
+    default 250 units/s), so up to 50 counts cost one round trip.
+    """
+    try:
+        alias = resolve_account(account)
+        client = get_client(alias)
+        if histogram is not None:
+            if queries is not None:
+                raise ValueError("histogram counts a single query: pass query, not queries")
+            query = query or ""
+            if after is None:
+                raise ValueError("histogram needs after (YYYY/MM/DD)")
+            start = _parse_date(after, "after")
+            end = _parse_date(before, "before") if before else datetime.now(timezone.utc).date() + timedelta(days=1)
+            ranges = buckets(start, end, histogram)
+            counted = count_queries(client, alias, [
+                f"{query} after:{lo:%Y/%m/%d} before:{hi:%Y/%m/%d}".strip() for lo, hi in ranges
+            ], include_spam_trash)
+            rows = [_row({"start": f"{lo:%Y/%m/%d}"}, n) for (lo, _), n in zip(ranges, counted)]
+            total = sum(row.get("estimate", 0) for row in rows)
+            return _json_response({
+                "query": query, "histogram": histogram, "after": f"{start:%Y/%m/%d}", "before": f"{end:%Y/%m/%d}",
+                "total": total, "buckets": rows,
+            })
+        found = _queries(query, queries)
+        counted = count_queries(client, alias, found, include_spam_trash)
+        if query is not None and queries is None:
+            result = counted[0]
+            if isinstance(result, GmailAPIError):
+                raise result
+            return _json_response({"query": query, "estimate": result})
+        return _json_response({"counts": [_row({"query": q}, n) for q, n in zip(found, counted)]})
+    except Exception as exc:
+        return _error_response(exc)
+
+
+def _volume(stats: MailboxStats, unit: str) -> list[dict[str, Any]]:
+    grouped: dict[date, list[int]] = {}
+    for day, (messages, size) in stats.totals("day").items():
+        entry = grouped.setdefault(_bucket_start(day, unit), [0, 0])
+        entry[0] += messages
+        entry[1] += size
+    return [
+        {"start": f"{start:%Y/%m/%d}", "messages": messages, "bytes": size}
+        for start, (messages, size) in sorted(grouped.items())
+    ]
+
+
+@mcp.tool()
+def gmail_mailbox_stats(
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    top_n: Annotated[int, Field(description="Rows in each top table", ge=1, le=100)] = 10,
+    by: Annotated[str, Field(description="Rank top tables by 'messages' or 'bytes'")] = "messages",
+    volume: Annotated[str, Field(description="Volume-over-time bucket: 'day', 'week' or 'month'")] = "month",
+    max_messages: Annotated[int, Field(description="Aggregate at most this many of the newest messages", ge=1, le=200_000)] = 5000,
+) -> str:
+    """Mailbox aggregates: top senders and mailing lists, size by label, and volume over time.
+
+    The first call reads metadata for up to max_messages messages in batch
+    requests (cached ones are free). Later calls only apply mailbox history
+    since then, so they cost one history request when nothing changed.
+    Trash and spam are excluded. Sizes are Gmail's sizeEstimate in bytes.
+    """
+    try:
+        if by not in ("messages", "bytes"):
+            raise ValueError("by must be 'messages' or 'bytes'")
+        if volume not in BUCKET_UNITS:
+            raise ValueError(f"volume must be one of {', '.join(BUCKET_UNITS)}")
+        alias = resolve_account(account)
+        stats = mailbox_stats.get(get_client(alias), alias, max_messages)
+        return _json_response({
+            "messages": len(stats),
+            "bytes": stats.total_bytes,
+            "complete": stats.complete,
+            "historyId": str(stats.history_id),
+            "top_senders": [{"sender": k, "messages": n, "bytes": b} for k, n, b in stats.top("sender", top_n, by)],
+            "top_lists": [{"list_id": k, "messages": n, "bytes": b} for k, n, b in stats.top("list", top_n, by)],
+            "labels": [{"label_id": k, "messages": n, "bytes": b} for k, n, b in stats.top("label", top_n, by)],
+            "volume": _volume(stats, volume),
+        })
+    except Exception as exc:
+        return _error_response(exc)
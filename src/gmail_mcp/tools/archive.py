@@ -0,0 +1,86 @@
+"""Gmail archive tools — mbox export and import, metadata export to Parquet or Arrow."""
+
+from __future__ import annotations
+
+from typing import Annotated
+
+from pydantic import Field
+
+from ..accounts import resolve_account
+from ..columnar import export_metadata
+from ..mbox import export_mbox, import_mbox
+from ..server import mcp, get_client, _error_response, _json_response
+
+
+@mcp.tool()
+def gmail_export_mbox(
+    path: Annotated[str, Field(description="mbox file to write (e.g. '~/backups/inbox.mbox')")],
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    query: Annotated[str | None, Field(description="Gmail search query selecting the messages to export; omit for the whole mailbox")] = None,
+    max_messages: Annotated[int, Field(description="Stop after this many messages; call again to continue from the checkpoint", ge=1, le=100_000)] = 10_000,
+    overwrite: Annotated[bool, Field(description="Replace an existing file that has no checkpoint")] = False,
+    include_spam_trash: Annotated[bool, Field(description="Export messages in Spam and Trash too")] = False,
+) -> str:
+    """Export messages to an mbox file, streaming raw messages straight to disk.
+
+    Progress is checkpointed next to the file after every page of 500
+    messages. If an export is interrupted or stops at max_messages, call the
+    tool again with the same path and query to continue where it left off.
+    Each message carries X-GM-THRID and X-Gmail-Labels headers, as in a
+    Google Takeout export.
+    """
+    try:
+        alias = resolve_account(account)
+        result = export_mbox(get_client(alias), alias, path, query, max_messages, overwrite, include_spam_trash)
+        return _json_response(result)
+    except Exception as exc:
+        return _error_response(exc)
+
+
+@mcp.tool()
+def gmail_export_metadata(
+    path: Annotated[str, Field(description="File to write (e.g. '~/exports/mail.parquet')")],
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    file_format: Annotated[str, Field(description="'parquet' or 'arrow' (Arrow IPC file)")] = "parquet",
+    query: Annotated[str | None, Field(description="Gmail search query selecting the messages; omit for the whole mailbox")] = None,
+    max_messages: Annotated[int, Field(description="Export at most this many of the newest matching messages", ge=1, le=2_000_000)] = 100_000,
+    include_spam_trash: Annotated[bool, Field(description="Include messages in Spam and Trash")] = False,
+) -> str:
+    """Export message metadata as a table for dataframe analysis, without message bodies.
+
+    Columns: id, thread_id, label_ids, from, to, subject, date (header),
+    internal_date (UTC timestamp) and size_estimate. Rows are streamed to the
+    file in row groups. Requires pyarrow (the package's 'export' extra).
+    """
+    try:
+        alias = resolve_account(account)
+        result = export_metadata(get_client(alias), alias, path, file_format, query, max_messages, include_spam_trash)
+        return _json_response(result)
+    except Exception as exc:
+        return _error_response(exc)
+
+
+@mcp.tool()
+def gmail_import_mbox(
+    path: Annotated[str, Field(description="mbox file to import (e.g. a Google Takeout export or one from gmail_export_mbox)")],
+    account: Annotated[str | None, Field(description="Account alias or email to import into")] = None,
+    labels: Annotated[str | None, Field(description="Comma-separated label names to add to every imported message (e.g. 'Imported/2019')")] = None,
+    create_labels: Annotated[bool, Field(description="Create user labels named in X-Gmail-Labels or labels that don't exist yet")] = True,
+    dedupe: Annotated[bool, Field(description="Skip messages whose Message-ID is already in the mailbox or earlier in the file")] = True,
+    max_messages: Annotated[int, Field(description="Stop after this many messages; call again to continue from the checkpoint", ge=1, le=100_000)] = 5000,
+) -> str:
+    """Import messages from an mbox file into the mailbox, as received mail.
+
+    Labels come from each message's X-Gmail-Labels header (as written by
+    Takeout or gmail_export_mbox) plus labels. Messages without labels land
+    in All Mail only. Progress is checkpointed next to the file, along with
+    messages that failed after retries; if complete is false, call again
+    with the same path to continue and retry them.
+    """
+    try:
+        alias = resolve_account(account)
+        names = [name.strip() for name in (labels or "").split(",") if name.strip()]
+        result = import_mbox(get_client(alias), alias, path, names, create_labels, dedupe, max_messages)
+        return _json_response(result)
+    except Exception as exc:
+        return _error_response(exc)
@@ -2,12 +2,11 @@
 
 from __future__ import annotations
 
-import json
 from typing import Annotated
 
 from pydantic import Field
 
-from ..server import mcp, get_client, _error_response, _slim_response
+from ..server import mcp, get_client, _error_response, _json_response
 
 
 @mcp.tool()
@@ -15,11 +14,12 @@ def gmail_attachment_get(
     message_id: Annotated[str, Field(description="The message ID containing the attachment")],
     attachment_id: Annotated[str, Field(description="The attachment ID to retrieve")],
     account: Annotated[str | None, Field(description="Account alias or email. Omit to auto-select if only one account is configured.")] = None,
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
 ) -> str:
     """Get attachment data (base64-encoded) from a message."""
     try:
         client = get_client(account)
         result = client.get_attachment(message_id, attachment_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result, max_bytes=max_bytes)
     except Exception as exc:
         return _error_response(exc)
@@ -0,0 +1,319 @@
+"""Gmail batch tool — many message, thread and label operations in one call."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Annotated, Any, Callable
+
+from gmail_sdk import GmailAPIError
+from pydantic import Field
+
+from ..accounts import resolve_account
+from ..batch import BatchRequest, execute_metered
+from ..cache import CONTENT_FORMATS, content_cache, label_counts, label_overlay, message_key
+from ..server import mcp, get_client, _error_response, _json_response, _parse_json
+
+
+@dataclass
+class _Op:
+    """A planned operation: its REST call, the resources it touches and how to shape its result."""
+
+    request: BatchRequest
+    reads: frozenset[str] = frozenset()
+    writes: frozenset[str] = frozenset()
+    finish: Callable[[Any], Any] = lambda result: result
+    local: Any = None  # result already known (cache hit); ``request`` is sent only if an earlier op may change it
+    result: Any = field(default=None, init=False)
+
+
+def _ids(value: Any) -> list[str] | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return [str(v) for v in value]
+
+
+def _label_body(args: dict[str, Any], add: list[str] | None = None, remove: list[str] | None = None) -> dict[str, Any]:
+    body: dict[str, Any] = {}
+    add = add if add is not None else _ids(args.get("add_label_ids"))
+    remove = remove if remove is not None else _ids(args.get("remove_label_ids"))
+    if add is not None:
+        body["addLabelIds"] = add
+    if remove is not None:
+        body["removeLabelIds"] = remove
+    return body
+
+
+def _noting(account: str) -> Callable[[Any], Any]:
+    def finish(result: Any) -> Any:
+        if isinstance(result, dict):
+            label_overlay.note(account, [result] + list(result.get("messages", [])))
+        return result
+
+    return finish
+
+
+def _list_params(args: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "maxResults": args.get("max_results", 10),
+        "q": args.get("query"),
+        "labelIds": _ids(args.get("label_ids")),
+        "pageToken": args.get("page_token"),
+    }
+
+
+# -- messages -------------------------------------------------------------------
+
+def _message_get(args: dict[str, Any], account: str) -> _Op:
+    message_id, fmt = args["message_id"], args.get("response_format", "full")
+    reads = frozenset({f"m:{message_id}"})
+    local = None
+    if fmt in CONTENT_FORMATS:
+        content = content_cache.get(message_key(account, message_id, fmt))
+        labels = label_overlay.get(account, message_id)
+        if content is not None and labels is not None:
+            local = {**content, "labelIds": labels}
+
+    def finish(result: Any) -> Any:
+        if fmt in CONTENT_FORMATS:
+            content_cache.put(message_key(account, message_id, fmt), result)
+        label_overlay.note(account, [result])
+        return result
+
+    return _Op(BatchRequest("GET", f"/users/me/messages/{message_id}", {"format": fmt}), reads, finish=finish, local=local)
+
+
+def _message_write(args: dict[str, Any], account: str, suffix: str, body: dict[str, Any] | None = None) -> _Op:
+    message_id = args["message_id"]
+    return _Op(
+        BatchRequest("POST", f"/users/me/messages/{message_id}/{suffix}", body=body),
+        writes=frozenset({f"m:{message_id}", "t:*", "l:*"}),
+        finish=_noting(account),
+    )
+
+
+def _message_delete(args: dict[str, Any], account: str) -> _Op:
+    message_id = args["message_id"]
+
+    def finish(result: Any) -> Any:
+        content_cache.forget(account, [message_id])
+        label_overlay.drop(account, [message_id])
+        return {"success": True, "message_id": message_id, "action": "permanently_deleted"}
+
+    return _Op(BatchRequest("DELETE", f"/users/me/messages/{message_id}"), writes=frozenset({f"m:{message_id}", "t:*", "l:*"}), finish=finish)
+
+
+def _messages_batch_modify(args: dict[str, Any], account: str) -> _Op:
+    ids = _ids(args["message_ids"]) or []
+    body = {"ids": ids, **_label_body(args)}
+
+    def finish(result: Any) -> Any:
+        label_overlay.apply(account, ids, body.get("addLabelIds"), body.get("removeLabelIds"))
+        return {"success": True, "action": "batch_modified", "count": len(ids)}
+
+    return _Op(BatchRequest("POST", "/users/me/messages/batchModify", body=body), writes=frozenset({"t:*", "l:*", *(f"m:{i}" for i in ids)}), finish=finish)
+
+
+def _messages_batch_delete(args: dict[str, Any], account: str) -> _Op:
+    ids = _ids(args["message_ids"]) or []
+
+    def finish(result: Any) -> Any:
+        content_cache.forget(account, ids)
+        label_overlay.drop(account, ids)
+        return {"success": True, "action": "batch_deleted", "count": len(ids)}
+
+    return _Op(BatchRequest("POST", "/users/me/messages/batchDelete", body={"ids": ids}), writes=frozenset({"t:*", "l:*", *(f"m:{i}" for i in ids)}), finish=finish)
+
+
+# -- threads --------------------------------------------------------------------
+
+def _thread_get(args: dict[str, Any], account: str) -> _Op:
+    thread_id, fmt = args["thread_id"], args.get("response_format", "full")
+
+    def finish(result: Any) -> Any:
+        for message in result.get("messages", []) if isinstance(result, dict) else []:
+            if fmt in CONTENT_FORMATS:
+                content_cache.put(message_key(account, message["id"], fmt), message)
+        return _noting(account)(result)
+
+    return _Op(BatchRequest("GET", f"/users/me/threads/{thread_id}", {"format": fmt}), frozenset({f"t:{thread_id}", "m:*"}), finish=finish)
+
+
+def _thread_write(args: dict[str, Any], account: str, suffix: str, body: dict[str, Any] | None = None) -> _Op:
+    thread_id = args["thread_id"]
+    return _Op(
+        BatchRequest("POST", f"/users/me/threads/{thread_id}/{suffix}", body=body),
+        writes=frozenset({f"t:{thread_id}", "m:*", "l:*"}),
+        finish=_noting(account),
+    )
+
+
+def _thread_delete(args: dict[str, Any], account: str) -> _Op:
+    thread_id = args["thread_id"]
+
+    def finish(result: Any) -> Any:
+        content_cache.forget(account, thread_id=thread_id)
+        return {"success": True, "thread_id": thread_id, "action": "permanently_deleted"}
+
+    return _Op(
+        BatchRequest("DELETE", f"/users/me/threads/{thread_id}"),
+        writes=frozenset({f"t:{thread_id}", "m:*", "l:*"}),
+        finish=finish,
+    )
+
+
+# -- labels ---------------------------------------------------------------------
+
+def _label_create(args: dict[str, Any], account: str) -> _Op:
+    body = {
+        "name": args["name"],
+        "labelListVisibility": args.get("label_list_visibility", "labelShow"),
+        "messageListVisibility": args.get("message_list_visibility", "show"),
+    }
+    return _Op(BatchRequest("POST", "/users/me/labels", body=body), writes=frozenset({f"l:{body['name']}"}))
+
+
+def _label_update(args: dict[str, Any], account: str) -> _Op:
+    label_id = args["label_id"]
+    body: dict[str, Any] = {"id": label_id}
+    for arg, key in (("name", "name"), ("label_list_visibility", "labelListVisibility"), ("message_list_visibility", "messageListVisibility")):
+        if args.get(arg) is not None:
+            body[key] = args[arg]
+    return _Op(BatchRequest("PATCH", f"/users/me/labels/{label_id}", body=body), writes=frozenset({f"l:{label_id}"}))
+
+
+def _label_delete(args: dict[str, Any], account: str) -> _Op:
+    label_id = args["label_id"]
+    return _Op(
+        BatchRequest("DELETE", f"/users/me/labels/{label_id}"),
+        writes=frozenset({f"l:{label_id}", "m:*", "t:*"}),
+        finish=lambda result: {"success": True, "label_id": label_id, "action": "deleted"},
+    )
+
+
+_LISTS = frozenset({"m:*", "t:*"})
+
+# Operation name (the tool name without "gmail_") -> planner taking (arguments, account alias).
+OPERATIONS: dict[str, Callable[[dict[str, Any], str], _Op]] = {
+    "messages_list": lambda a, acct: _Op(BatchRequest("GET", "/users/me/messages", _list_params(a)), _LISTS),
+    "message_get": _message_get,
+    "message_modify": lambda a, acct: _message_write(a, acct, "modify", _label_body(a)),
+    "message_archive": lambda a, acct: _message_write(a, acct, "modify", _label_body(a, remove=["INBOX"])),
+    "mark_as_read": lambda a, acct: _message_write(a, acct, "modify", _label_body(a, remove=["UNREAD"])),
+    "mark_as_unread": lambda a, acct: _message_write(a, acct, "modify", _label_body(a, add=["UNREAD"])),
+    "message_trash": lambda a, acct: _message_write(a, acct, "trash"),
+    "message_untrash": lambda a, acct: _message_write(a, acct, "untrash"),
+    "message_delete": _message_delete,
+    "messages_batch_modify": _messages_batch_modify,
+    "messages_batch_delete": _messages_batch_delete,
+    "threads_list": lambda a, acct: _Op(BatchRequest("GET", "/users/me/threads", _list_params(a)), _LISTS),
+    "thread_get": _thread_get,
+    "thread_modify": lambda a, acct: _thread_write(a, acct, "modify", _label_body(a)),
+    "thread_trash": lambda a, acct: _thread_write(a, acct, "trash"),
+    "thread_untrash": lambda a, acct: _thread_write(a, acct, "untrash"),
+    "thread_delete": _thread_delete,
+    "labels_list": lambda a, acct: _Op(BatchRequest("GET", "/users/me/labels"), frozenset({"l:*"})),
+    "label_get": lambda a, acct: _Op(BatchRequest("GET", f"/users/me/labels/{a['label_id']}"), frozenset({f"l:{a['label_id']}"})),
+    "label_create": _label_create,
+    "label_update": _label_update,
+    "label_delete": _label_delete,
+}
+
+
+def _match(a: str, b: str) -> bool:
+    """Whether two resource keys may name the same thing (``m:*`` is "some message")."""
+    if a == b:
+        return not a.endswith(":*")  # two unknown members of a kind need not collide
+    return (a.endswith(":*") and b.startswith(a[:-1])) or (b.endswith(":*") and a.startswith(b[:-1]))
+
+
+def _overlaps(left: frozenset[str] | set[str], right: frozenset[str] | set[str]) -> bool:
+    return any(_match(a, b) for a in left for b in right)
+
+
+def _plan(operations: Any, account: str) -> list[_Op]:
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("operations must be a non-empty JSON array")
+    planned = []
+    written: set[str] = set()
+    for index, spec in enumerate(operations):
+        if not isinstance(spec, dict) or "op" not in spec:
+            raise ValueError(f"operation {index}: expected an object with an 'op' key")
+        name = str(spec["op"]).removeprefix("gmail_")
+        if name not in OPERATIONS:
+            raise ValueError(f"operation {index}: unknown op '{spec['op']}' (supported: {', '.join(OPERATIONS)})")
+        try:
+            planned.append(OPERATIONS[name](spec, account))
+        except KeyError as exc:
+            raise ValueError(f"operation {index} ({name}): missing '{exc.args[0]}'") from None
+        op = planned[-1]
+        if op.local is not None and _overlaps(op.reads, written):
+            op.local = None  # an earlier op may change it: fetch after that op runs
+        written |= op.writes
+    return planned
+
+
+def _rounds(ops: list[_Op]) -> list[list[_Op]]:
+    """Group ops into batches that are safe to run in any order.
+
+    A new round starts whenever an op writes something already read or
+    written in the current round, or reads something already written, so
+    dependent steps of a plan still run in the order given.
+    """
+    rounds: list[list[_Op]] = []
+    reads: set[str] = set()
+    writes: set[str] = set()
+    for op in ops:
+        if op.local is not None:
+            continue
+        if not rounds or _overlaps(op.writes, reads | writes) or _overlaps(op.reads, writes):
+            rounds.append([])
+            reads, writes = set(), set()
+        rounds[-1].append(op)
+        reads |= op.reads
+        writes |= op.writes
+    return rounds
+
+
+def run_batch(client: Any, account: str, operations: Any) -> dict[str, Any]:
+    """Plan, execute and shape a list of operations; results are in input order."""
+    ops = _plan(operations, account)
+    rounds = _rounds(ops)
+    for batch in rounds:
+        for op, result in zip(batch, execute_metered(client, account, [op.request for op in batch])):
+            if isinstance(result, GmailAPIError):
+                op.result = {"error": True, "status_code": result.status_code, "message": result.message}
+            else:
+                op.result = op.finish(result)
+    if any(key.startswith("l:") and key != "l:*" for op in ops for key in op.writes):
+        label_counts.drop(account)  # labels created, renamed or deleted
+    elif any(op.writes for op in ops):
+        label_counts.mark_stale(account)
+    results = [op.result if op.local is None else op.local for op in ops]
+    failed = sum(isinstance(r, dict) and r.get("error") is True for r in results)
+    return {"operations": len(ops), "failed": failed, "batches": len(rounds), "results": results}
+
+
+@mcp.tool()
+def gmail_batch(
+    operations: Annotated[str, Field(description='JSON array of operations, each {"op": <tool name without gmail_>, ...that tool\'s arguments}, e.g. [{"op": "thread_modify", "thread_id": "t1", "add_label_ids": "Label_3"}, {"op": "message_trash", "message_id": "m2"}, {"op": "label_get", "label_id": "INBOX"}]')],
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
+) -> str:
+    """Run many message, thread and label operations in one call via Gmail's batch endpoint.
+
+    Supports the get, list, modify, archive, mark read/unread, trash,
+    untrash and delete operations on messages and threads, plus label
+    list/get/create/update/delete. Operations are packed into as few batch
+    requests as the account's quota-unit bucket allows; steps that touch the same message, thread or label
+    are kept in order, and label reads wait for message and thread writes
+    that may change their counts. Returns one result per operation, in order; a failed
+    operation has an error entry and does not stop the others.
+    """
+    try:
+        alias = resolve_account(account)
+        result = run_batch(get_client(alias), alias, _parse_json(operations, "operations"))
+        return _json_response(result, max_bytes=max_bytes)
+    except Exception as exc:
+        return _error_response(exc)
@@ -0,0 +1,52 @@
+"""Gmail contact tools — recipient suggestions from an address index of your mail."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from email.utils import formataddr
+from typing import Annotated
+
+from pydantic import Field
+
+from ..accounts import resolve_account
+from ..contacts import contact_index
+from ..server import mcp, get_client, _error_response, _json_response
+
+
+@mcp.tool()
+def gmail_contacts_suggest(
+    query: Annotated[str, Field(description="Start of a name, address or domain, e.g. 'ali', 'alice sm', 'alice.smith@exa'; empty for the most-used contacts")] = "",
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    limit: Annotated[int, Field(description="Maximum suggestions to return", ge=1, le=100)] = 10,
+    max_messages: Annotated[int, Field(description="Build the index from at most this many of the newest messages", ge=1, le=100_000)] = 2000,
+    refresh: Annotated[bool, Field(description="Apply new mail to the index before answering, even if it was refreshed recently")] = False,
+) -> str:
+    """Suggest recipient addresses, ranked by how often and how recently they appear in your mail.
+
+    Names and addresses come from the From, To and Cc headers of your
+    messages; people you have written to rank higher. The index is built on
+    first use (reading metadata for up to max_messages messages in batch
+    requests), saved to disk, and afterwards only updated from mailbox
+    history, so lookups are immediate. Use the returned 'recipient' value
+    as to/cc in message_send, draft_create or message_forward.
+    """
+    try:
+        alias = resolve_account(account)
+        index = contact_index.get(get_client(alias), alias, max_messages, refresh)
+        return _json_response({
+            "query": query,
+            "contacts": [
+                {
+                    "recipient": formataddr((contact.name, contact.address)),
+                    "address": contact.address,
+                    "name": contact.name,
+                    "count": contact.count,
+                    "last_seen": datetime.fromtimestamp(contact.last_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d"),
+                }
+                for contact in index.search(query, limit)
+            ],
+            "indexed_contacts": len(index),
+            "indexed_messages": index.scanned,
+        })
+    except Exception as exc:
+        return _error_response(exc)
@@ -0,0 +1,27 @@
+"""Continuation tool — resume a response that was cut at its max_bytes budget."""
+
+from __future__ import annotations
+
+from typing import Annotated
+
+from pydantic import Field
+
+from ..budget import continue_response
+from ..server import mcp, _error_response, _json_response
+
+
+@mcp.tool()
+def gmail_continue(
+    cursor: Annotated[str, Field(description="The 'cursor' value from a response's 'truncated' object")],
+    max_bytes: Annotated[int, Field(description="Size budget in bytes for this piece of the response")] = 50_000,
+) -> str:
+    """Return the next piece of a truncated response without re-fetching it from Gmail.
+
+    Cut string values come back under 'fields' as {path, offset, data} chunks to
+    append at that offset; remaining list items come back under their original
+    key. A new 'truncated' object with a fresh cursor is included while more remains.
+    """
+    try:
+        return _json_response(continue_response(cursor, max_bytes))
+    except Exception as exc:
+        return _error_response(exc)
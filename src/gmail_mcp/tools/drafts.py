@@ -7,7 +7,8 @@ from typing import Annotated
 
 from pydantic import Field
 
-from ..server import mcp, get_client, _error_response, _slim_response
+from ..server import GMAIL_API_ROOT, mcp, get_client, _error_response, _json_response
+from ..uploads import resolve_paths, send_with_attachments
 
 
 @mcp.tool()
@@ -16,12 +17,13 @@ def gmail_drafts_list(
     max_results: Annotated[int, Field(description="Maximum number of drafts to return")] = 10,
     page_token: Annotated[str | None, Field(description="Token for fetching the next page of results")] = None,
     query: Annotated[str | None, Field(description="Gmail search query to filter drafts")] = None,
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
 ) -> str:
     """List drafts in the account."""
     try:
         client = get_client(account)
         result = client.list_drafts(max_results=max_results, page_token=page_token, query=query)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result, max_bytes=max_bytes)
     except Exception as exc:
         return _error_response(exc)
 
@@ -31,12 +33,13 @@ def gmail_draft_get(
     draft_id: Annotated[str, Field(description="The draft ID to retrieve")],
     account: Annotated[str | None, Field(description="Account alias or email")] = None,
     response_format: Annotated[str, Field(description="Response format: 'full', 'metadata', 'minimal', or 'raw'")] = "full",
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
 ) -> str:
     """Get a single draft by ID."""
     try:
         client = get_client(account)
         result = client.get_draft(draft_id, format_=response_format)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result, max_bytes=max_bytes)
     except Exception as exc:
         return _error_response(exc)
 
@@ -50,14 +53,21 @@ def gmail_draft_create(
     cc: Annotated[str | None, Field(description="CC recipients (comma-separated)")] = None,
     bcc: Annotated[str | None, Field(description="BCC recipients (comma-separated)")] = None,
     thread_id: Annotated[str | None, Field(description="Thread ID to associate the draft with (for replies)")] = None,
+    attachments: Annotated[str | None, Field(description="Comma-separated local file paths to attach (up to 35 MB in total)")] = None,
 ) -> str:
-    """Create a new draft email."""
+    """Create a new draft email (attachments are streamed via a resumable upload)."""
     try:
         client = get_client(account)
+        if attachments:
+            result = send_with_attachments(
+                client, GMAIL_API_ROOT, draft=True, thread_id=thread_id,
+                to=to, subject=subject, body=body, cc=cc, bcc=bcc, attachments=resolve_paths(attachments),
+            )
+            return _json_response(result)
         result = client.create_draft(
             to=to, subject=subject, body=body, cc=cc, bcc=bcc, thread_id=thread_id,
         )
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -78,7 +88,7 @@ def gmail_draft_update(
         result = client.update_draft(
             draft_id, to=to, subject=subject, body=body, cc=cc, bcc=bcc,
         )
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -92,7 +102,7 @@ def gmail_draft_send(
     try:
         client = get_client(account)
         result = client.send_draft(draft_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
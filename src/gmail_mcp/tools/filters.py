@@ -1,13 +1,122 @@
-"""Gmail filter tools — list, get, create, delete."""
+"""Gmail filter tools — list, get, create, delete, dry run."""
 
 from __future__ import annotations
 
 import json
-from typing import Annotated
+from typing import Annotated, Any
 
 from pydantic import Field
 
-from ..server import mcp, get_client, _error_response, _slim_response, _parse_json
+from ..accounts import resolve_account
+from ..batch import BatchRequest, execute_metered
+from ..bodies import header_map
+from ..cache import content_cache, label_overlay, message_key
+from ..criteria import locally_decidable, matches, required_headers, to_query
+from ..server import mcp, get_client, _error_response, _json_response, _parse_json
+
+SAMPLE_HEADERS = ["From", "To", "Subject", "Date"]
+SCOPES = ("auto", "mailbox", "cached")
+_HIDDEN_LABELS = {"TRASH", "SPAM"}  # excluded from search results by default, like Gmail's search
+
+
+def _sample(message: dict[str, Any]) -> dict[str, Any]:
+    headers = header_map(message.get("payload", {}))
+    return {
+        "id": message["id"],
+        "threadId": message.get("threadId"),
+        **{name.lower(): headers[name.lower()] for name in SAMPLE_HEADERS if name.lower() in headers},
+    }
+
+
+def _cached_messages(account: str, needed: set[str]) -> dict[str, dict[str, Any]]:
+    """Message resources held in the content cache for ``account`` whose headers include ``needed``, by ID.
+
+    Entries cached with a header subset (``metadata`` with
+    ``metadataHeaders``) only count when the subset covers ``needed``.
+    """
+    found: dict[str, dict[str, Any]] = {}
+    for key, value in content_cache.items():
+        if key[0] != "message" or key[1] != account or key[3] not in ("full", "metadata") or not isinstance(value, dict):
+            continue
+        if key[4] and not needed <= {name.lower() for name in key[4]}:
+            continue
+        if value.get("payload", {}).get("headers"):
+            found.setdefault(key[2], value)
+    return found
+
+
+def _visible(account: str, message: dict[str, Any]) -> bool:
+    labels = label_overlay.get(account, message["id"])
+    return not _HIDDEN_LABELS & set(labels if labels is not None else message.get("labelIds", []))
+
+
+def _samples(client: Any, account: str, ids: list[str]) -> list[dict[str, Any]]:
+    """Sample rows from cached headers, fetching the rest as metadata in batch requests within quota."""
+    cached = {}
+    for message_id in ids:
+        for fmt, headers in (("full", None), ("metadata", SAMPLE_HEADERS), ("metadata", None)):
+            message = content_cache.get(message_key(account, message_id, fmt, headers))
+            if message is not None:
+                cached[message_id] = message
+                break
+    missing = [message_id for message_id in ids if message_id not in cached]
+    requests = [
+        BatchRequest("GET", f"/users/me/messages/{message_id}", {"format": "metadata", "metadataHeaders": SAMPLE_HEADERS})
+        for message_id in missing
+    ]
+    for message_id, result in zip(missing, execute_metered(client, account, requests)):
+        if isinstance(result, dict):
+            content_cache.put(message_key(account, message_id, "metadata", SAMPLE_HEADERS), result)
+            label_overlay.note(account, [result])
+            cached[message_id] = result
+    return [_sample(cached[message_id]) for message_id in ids if message_id in cached]
+
+
+def filter_dry_run(client: Any, account: str, criteria: Any, scope: str, max_count: int, max_samples: int) -> dict[str, Any]:
+    """Count and sample matches locally when the cache can answer, else with a Gmail search.
+
+    ``auto`` evaluates locally only when the whole mailbox is cached with
+    the headers the criteria need (checked with one profile request). The
+    content cache rarely holds a whole mailbox, so ``auto`` usually
+    searches, and cached headers then only save the sample requests: Gmail
+    search cannot leave out the cached IDs, so a cached subset cannot be
+    counted locally and the rest remotely.
+    """
+    query = to_query(criteria)
+    if scope not in SCOPES:
+        raise ValueError(f"scope must be one of {', '.join(SCOPES)}")
+    if scope == "cached" and not locally_decidable(criteria):
+        raise ValueError("query and negatedQuery need Gmail search: use scope='mailbox'")
+    cached = _cached_messages(account, required_headers(criteria)) if scope != "mailbox" and locally_decidable(criteria) else {}
+    if scope == "auto" and cached and len(cached) < int(client.get_profile().get("messagesTotal", 0)):
+        cached = {}  # part of the mailbox is not held locally
+    if scope == "cached" or cached:
+        held = [m for m in cached.values() if _visible(account, m)]
+        matched = [m for m in held if matches(criteria, m)]
+        matched.sort(key=lambda m: -int(m.get("internalDate", 0)))
+        return {
+            "query": query,
+            "scope": "cached",
+            "scanned": len(held),
+            "count": len(matched),
+            "samples": [_sample(m) for m in matched[:max_samples]],
+        }
+    ids: list[str] = []
+    page_token = None
+    estimate = None
+    while len(ids) < max_count:
+        result = client.list_messages(query=query, max_results=min(500, max_count - len(ids)), page_token=page_token)
+        if estimate is None:
+            estimate = result.get("resultSizeEstimate")
+        ids += [message["id"] for message in result.get("messages", [])]
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            break
+    summary: dict[str, Any] = {"query": query, "scope": "mailbox", "count": len(ids), "exact": not page_token}
+    if page_token:
+        summary["estimate"] = estimate
+    summary["samples"] = _samples(client, account, ids[:max_samples])
+    return summary
 
 
 @mcp.tool()
@@ -18,7 +127,7 @@ def gmail_filters_list(
     try:
         client = get_client(account)
         result = client.list_filters()
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -32,7 +141,7 @@ def gmail_filter_get(
     try:
         client = get_client(account)
         result = client.get_filter(filter_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -49,7 +158,7 @@ def gmail_filter_create(
         action_obj = _parse_json(action, "action")
         client = get_client(account)
         result = client.create_filter(criteria=criteria_obj, action=action_obj)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -66,3 +175,29 @@ def gmail_filter_delete(
         return json.dumps({"success": True, "filter_id": filter_id, "action": "deleted"}, indent=2)
     except Exception as exc:
         return _error_response(exc)
+
+
+@mcp.tool()
+def gmail_filter_dry_run(
+    criteria: Annotated[str, Field(description='JSON filter criteria as for gmail_filter_create, e.g. {"from": "news@shop.com", "hasAttachment": true}')],
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    scope: Annotated[str, Field(description="'auto' (match locally only when the whole mailbox is cached, which is rare; else search), 'mailbox' (always count with a search) or 'cached' (match locally held headers only, no Gmail requests)")] = "auto",
+    max_count: Annotated[int, Field(description="Stop counting after this many matches (the result is then marked inexact)", ge=1, le=10000)] = 1000,
+    max_samples: Annotated[int, Field(description="Number of matching messages to return as samples (id, from, to, subject, date)", ge=0, le=50)] = 5,
+) -> str:
+    """Show which existing mail a filter's criteria would match, without creating it.
+
+    Only when every message in the mailbox is already cached with the
+    headers the criteria need are they matched locally; a partly cached
+    mailbox is searched. Counts then come from message IDs
+    only (500 per search request), and samples carry just a few headers:
+    cached headers are used as-is, the rest come from batched metadata
+    requests. The result's scope says which was used.
+    """
+    try:
+        alias = resolve_account(account)
+        client = get_client(alias)
+        result = filter_dry_run(client, alias, _parse_json(criteria, "criteria"), scope, max_count, max_samples)
+        return _json_response(result)
+    except Exception as exc:
+        return _error_response(exc)
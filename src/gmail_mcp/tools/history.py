@@ -2,12 +2,11 @@
 
 from __future__ import annotations
 
-import json
 from typing import Annotated
 
 from pydantic import Field
 
-from ..server import mcp, get_client, _error_response, _slim_response
+from ..server import mcp, get_client, _error_response, _json_response
 
 
 @mcp.tool()
@@ -18,6 +17,7 @@ def gmail_history_list(
     max_results: Annotated[int, Field(description="Maximum number of history records to return")] = 100,
     page_token: Annotated[str | None, Field(description="Token for fetching the next page of results")] = None,
     history_types: Annotated[str | None, Field(description="Comma-separated history types: messageAdded, messageDeleted, labelAdded, labelRemoved")] = None,
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
 ) -> str:
     """List history of mailbox changes since a given history ID. Useful for incremental sync."""
     try:
@@ -30,6 +30,6 @@ def gmail_history_list(
             page_token=page_token,
             history_types=types_list,
         )
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result, max_bytes=max_bytes)
     except Exception as exc:
         return _error_response(exc)
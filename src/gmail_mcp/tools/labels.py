@@ -3,22 +3,106 @@
 from __future__ import annotations
 
 import json
-from typing import Annotated
+from typing import Annotated, Any
 
+from gmail_sdk import GmailAPIError
 from pydantic import Field
 
-from ..server import mcp, get_client, _error_response, _slim_response
+from ..accounts import resolve_account
+from ..batch import BatchRequest, execute
+from ..cache import label_counts
+from ..server import mcp, get_client, _error_response, _json_response
+
+_HISTORY_KEYS = ("messagesAdded", "messagesDeleted", "labelsAdded", "labelsRemoved")
+
+
+def _fetch_labels(client: Any, label_ids: list[str], with_list: bool = False, with_profile: bool = False) -> tuple[Any, ...]:
+    """One batch request: optionally the profile and label list, plus each label's details."""
+    requests = []
+    if with_profile:
+        requests.append(BatchRequest("GET", "/users/me/profile"))
+    if with_list:
+        requests.append(BatchRequest("GET", "/users/me/labels"))
+    requests += [BatchRequest("GET", f"/users/me/labels/{label_id}") for label_id in label_ids]
+    results = execute(client, requests) if requests else []
+    head, details = results[:len(requests) - len(label_ids)], results[len(requests) - len(label_ids):]
+    for result in head:
+        if isinstance(result, GmailAPIError):
+            raise result
+    counted = {label_id: result for label_id, result in zip(label_ids, details) if isinstance(result, dict)}
+    return (*head, counted)
+
+
+def _changed_labels(client: Any, history_id: int) -> tuple[set[str], int] | None:
+    """Labels whose counts may have changed since ``history_id``, or None if history can't tell."""
+    try:
+        result = client.list_history(start_history_id=str(history_id), max_results=500)
+    except GmailAPIError as exc:
+        if exc.status_code == 404:
+            return None
+        raise
+    if result.get("nextPageToken"):
+        return None  # many changes: a full refresh is as cheap
+    changed: set[str] = set()
+    for record in result.get("history", []):
+        for key in _HISTORY_KEYS:
+            for change in record.get(key, []):
+                changed.update(change.get("labelIds", []))
+                changed.update(change.get("message", {}).get("labelIds", []))
+    return changed, int(result.get("historyId", history_id))
+
+
+def _labels_with_counts(client: Any, account: str) -> list[dict[str, Any]]:
+    """All labels with counts: cached, re-checked against history after the TTL, else refetched."""
+    held = label_counts.get(account)
+    if held is not None:
+        labels, history_id, fresh = held
+        if fresh:
+            return labels
+        delta = _changed_labels(client, history_id)
+        if delta is not None:
+            changed, history_id = delta
+            known = {label["id"] for label in labels}
+            if not changed:
+                label_counts.put(account, labels, history_id)
+                return labels
+            if changed <= known:
+                listed, counted = _fetch_labels(client, sorted(changed), with_list=True)
+                previous = {label["id"]: label for label in labels}
+                missing = [label["id"] for label in listed.get("labels", []) if label["id"] not in counted and label["id"] not in previous]
+                if missing:
+                    counted.update(_fetch_labels(client, missing)[0])
+                labels = [counted.get(label["id"]) or previous.get(label["id"]) or label for label in listed.get("labels", [])]
+                label_counts.put(account, labels, history_id)
+                return labels
+    # Label details need the IDs from the list, so a full fetch takes two batches.
+    profile, listed, _ = _fetch_labels(client, [], with_list=True, with_profile=True)
+    ids = [label["id"] for label in listed.get("labels", [])]
+    counted = _fetch_labels(client, ids)[0]
+    labels = [counted.get(label["id"], label) for label in listed.get("labels", [])]
+    label_counts.put(account, labels, int(profile.get("historyId", 0)))
+    return labels
 
 
 @mcp.tool()
 def gmail_labels_list(
     account: Annotated[str | None, Field(description="Account alias or email. Omit to auto-select if only one account is configured.")] = None,
+    with_counts: Annotated[bool, Field(description="Include messagesTotal/messagesUnread/threadsTotal/threadsUnread for every label")] = False,
 ) -> str:
-    """List all labels in the account (system and user-created)."""
+    """List all labels in the account (system and user-created).
+
+    With with_counts, every label's counts come back in the same call: they
+    are fetched in two batch requests (the label list, then every label's
+    details) and kept briefly, then re-checked against mailbox history so
+    only labels that changed are refetched, usually in one batch request.
+    """
     try:
+        if with_counts:
+            alias = resolve_account(account)
+            return _json_response({"labels": _labels_with_counts(get_client(alias), alias)})
         client = get_client(account)
         result = client.list_labels()
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -32,7 +116,7 @@ def gmail_label_get(
     try:
         client = get_client(account)
         result = client.get_label(label_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -52,7 +136,7 @@ def gmail_label_create(
             label_list_visibility=label_list_visibility,
             message_list_visibility=message_list_visibility,
         )
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -74,7 +158,7 @@ def gmail_label_update(
             label_list_visibility=label_list_visibility,
             message_list_visibility=message_list_visibility,
         )
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
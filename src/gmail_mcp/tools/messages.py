@@ -1,4 +1,4 @@
-"""Gmail message tools — profile, list, get, send, reply, forward, modify, archive, trash, delete, batch."""
+"""Gmail message tools — profile, list, triage, get, send, batch send, reply, forward, modify, archive, trash, delete, batch."""
 
 from __future__ import annotations
 
@@ -7,7 +7,13 @@ from typing import Annotated
 
 from pydantic import Field
 
-from ..server import mcp, get_client, _error_response, _slim_response
+from ..accounts import resolve_account
+from ..bodies import text_view
+from ..merge import MAX_PARALLEL, prepare, send_all
+from ..raw import fetch_raw
+from ..server import GMAIL_API_ROOT, mcp, get_client, _error_response, _json_response, _parse_json
+from ..triage import TRIAGE_FORMATS, fetch, render, row
+from ..uploads import resolve_paths, send_with_attachments
 
 
 @mcp.tool()
@@ -18,7 +24,7 @@ def gmail_get_profile(
     try:
         client = get_client(account)
         result = client.get_profile()
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -30,6 +36,7 @@ def gmail_messages_list(
     max_results: Annotated[int, Field(description="Maximum number of messages to return (1-500)")] = 10,
     label_ids: Annotated[str | None, Field(description="Comma-separated label IDs to filter by, e.g. 'INBOX,UNREAD'")] = None,
     page_token: Annotated[str | None, Field(description="Token for fetching the next page of results")] = None,
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
 ) -> str:
     """List messages matching a query. Returns message IDs and thread IDs."""
     try:
@@ -41,7 +48,38 @@ def gmail_messages_list(
             label_ids=label_list,
             page_token=page_token,
         )
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result, max_bytes=max_bytes)
+    except Exception as exc:
+        return _error_response(exc)
+
+
+@mcp.tool()
+def gmail_inbox_triage(
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    query: Annotated[str | None, Field(description="Gmail search query, e.g. 'in:inbox is:unread'")] = "in:inbox",
+    max_results: Annotated[int, Field(description="Number of messages (1-500)", ge=1, le=500)] = 50,
+    label_ids: Annotated[str | None, Field(description="Comma-separated label IDs to filter by, e.g. 'INBOX,UNREAD'")] = None,
+    page_token: Annotated[str | None, Field(description="Token for fetching the next page of results")] = None,
+    output_format: Annotated[str, Field(description="'tsv' (header line, then one tab-separated line per message) or 'json' (columns plus one array per message)")] = "tsv",
+    snippet_length: Annotated[int, Field(description="Cut snippets to this many characters (0 drops them)", ge=0, le=200)] = 80,
+) -> str:
+    """Messages matching a query as a compact table: id, thread, from, subject, date, labels, size, snippet.
+
+    One list request plus batched metadata reads (cached messages are free),
+    about a tenth of the output of messages_list followed by message_get.
+    Dates are UTC; labels are comma-separated IDs; size is in bytes. A
+    further page is announced by a final '# nextPageToken' line (tsv) or a
+    nextPageToken field (json).
+    """
+    try:
+        if output_format not in TRIAGE_FORMATS:
+            raise ValueError(f"output_format must be one of {', '.join(TRIAGE_FORMATS)}")
+        alias = resolve_account(account)
+        client = get_client(alias)
+        label_list = [lid.strip() for lid in label_ids.split(",")] if label_ids else None
+        page = client.list_messages(query=query, max_results=max_results, label_ids=label_list, page_token=page_token)
+        messages = fetch(client, alias, [m["id"] for m in page.get("messages", [])])
+        return render([row(m, snippet_length) for m in messages], output_format, page.get("nextPageToken"))
     except Exception as exc:
         return _error_response(exc)
 
@@ -50,13 +88,27 @@ def gmail_messages_list(
 def gmail_message_get(
     message_id: Annotated[str, Field(description="The message ID to retrieve")],
     account: Annotated[str | None, Field(description="Account alias or email")] = None,
-    response_format: Annotated[str, Field(description="Response format: 'full', 'metadata', 'minimal', or 'raw'")] = "full",
+    response_format: Annotated[str, Field(description="Response format: 'full', 'metadata', 'minimal', 'text' (headers, body as plain text with HTML converted, and an attachment list), or 'raw' (saves the RFC 822 message to a local .eml file and returns its path and headers)")] = "full",
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
 ) -> str:
-    """Get a single message by ID with full content."""
+    """Get a single message by ID with full content.
+
+    With response_format='text' the result is the message's headers, its
+    body as plain text (HTML-only messages converted, links as numbered
+    footnotes) and its attachments. With response_format='raw' the message
+    is streamed to a local .eml file rather than returned as base64: the
+    result has its path, size and parsed headers.
+    """
     try:
+        if response_format == "text":
+            client = get_client(account)
+            return _json_response(text_view(client.get_message(message_id, format_="full"), client.account), max_bytes=max_bytes)
+        if response_format == "raw":
+            alias = resolve_account(account)
+            return _json_response(fetch_raw(get_client(alias), alias, message_id).summary(), max_bytes=max_bytes)
         client = get_client(account)
         result = client.get_message(message_id, format_=response_format)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result, max_bytes=max_bytes)
     except Exception as exc:
         return _error_response(exc)
 
@@ -69,12 +121,59 @@ def gmail_message_send(
     account: Annotated[str | None, Field(description="Account alias or email")] = None,
     cc: Annotated[str | None, Field(description="CC recipients (comma-separated)")] = None,
     bcc: Annotated[str | None, Field(description="BCC recipients (comma-separated)")] = None,
+    attachments: Annotated[str | None, Field(description="Comma-separated local file paths to attach (up to 35 MB in total)")] = None,
 ) -> str:
-    """Send an email from the specified account."""
+    """Send an email from the specified account.
+
+    With attachments, the message is streamed to Gmail's upload endpoint;
+    large messages use a resumable upload that picks up from the last
+    confirmed chunk after a dropped connection.
+    """
     try:
         client = get_client(account)
+        if attachments:
+            result = send_with_attachments(
+                client, GMAIL_API_ROOT, to=to, subject=subject, body=body, cc=cc, bcc=bcc,
+                attachments=resolve_paths(attachments),
+            )
+            return _json_response(result)
         result = client.send_message(to=to, subject=subject, body=body, cc=cc, bcc=bcc)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
+    except Exception as exc:
+        return _error_response(exc)
+
+
+@mcp.tool()
+def gmail_messages_send_batch(
+    subject_template: Annotated[str, Field(description="Subject with $variable placeholders (string.Template syntax, $$ for a literal $)")],
+    body_template: Annotated[str, Field(description="Plain-text body with $variable placeholders")],
+    recipients: Annotated[str, Field(description='JSON array, one object per message: "to" (required), optional "cc"/"bcc", plus the template variables, e.g. [{"to": "a@example.com", "name": "Ann"}]')],
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    dry_run: Annotated[bool, Field(description="Render and return every message without sending")] = False,
+    max_parallel: Annotated[int, Field(description="Maximum concurrent sends (still limited by the account's send quota)", ge=1, le=16)] = MAX_PARALLEL,
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
+) -> str:
+    """Mail merge: render a subject/body template per recipient and send them all.
+
+    Messages are rendered first; if any recipient is missing a variable,
+    nothing is sent and the failing rows are returned. Sends run
+    concurrently within the account's quota and per-minute send limit.
+    Returns one status row per recipient. Use dry_run to preview.
+    """
+    try:
+        alias = resolve_account(account)
+        messages = prepare(subject_template, body_template, _parse_json(recipients, "recipients"))
+        failed = [m for m in messages if "error" in m]
+        if dry_run or failed:
+            rows = messages if dry_run else [{"index": m["index"], "to": m["to"], "status": "error", "error": m["error"]} for m in failed]
+            result = {"account": alias, "dry_run": dry_run, "total": len(messages), "sent": 0, "failed": len(failed), "results": rows}
+            if failed and not dry_run:
+                result["message"] = "Nothing was sent: fix the failing rows or use dry_run to preview"
+            return _json_response(result, max_bytes=max_bytes)
+        rows = send_all(get_client(alias), alias, messages, max_parallel)
+        sent = sum(row["status"] == "sent" for row in rows)
+        result = {"account": alias, "dry_run": False, "total": len(rows), "sent": sent, "failed": len(rows) - sent, "results": rows}
+        return _json_response(result, max_bytes=max_bytes)
     except Exception as exc:
         return _error_response(exc)
 
@@ -89,7 +188,7 @@ def gmail_message_reply(
     try:
         client = get_client(account)
         result = client.reply(message_id, body)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -105,7 +204,7 @@ def gmail_message_forward(
     try:
         client = get_client(account)
         result = client.forward(message_id, to=to, note=note)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -123,7 +222,7 @@ def gmail_message_modify(
         add_list = [lid.strip() for lid in add_label_ids.split(",")] if add_label_ids else None
         remove_list = [lid.strip() for lid in remove_label_ids.split(",")] if remove_label_ids else None
         result = client.modify_message(message_id, add_label_ids=add_list, remove_label_ids=remove_list)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -137,7 +236,7 @@ def gmail_message_archive(
     try:
         client = get_client(account)
         result = client.archive(message_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -151,7 +250,7 @@ def gmail_message_trash(
     try:
         client = get_client(account)
         result = client.trash_message(message_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -165,7 +264,7 @@ def gmail_message_untrash(
     try:
         client = get_client(account)
         result = client.untrash_message(message_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -212,7 +311,7 @@ def gmail_mark_as_read(
     try:
         client = get_client(account)
         result = client.mark_as_read(message_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -226,7 +325,7 @@ def gmail_mark_as_unread(
     try:
         client = get_client(account)
         result = client.mark_as_unread(message_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -241,7 +340,7 @@ def gmail_message_reply_all(
     try:
         client = get_client(account)
         result = client.reply_all(message_id, body)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -2,12 +2,11 @@
 
 from __future__ import annotations
 
-import json
 from typing import Annotated
 
 from pydantic import Field
 
-from ..server import mcp, get_client, _error_response, _slim_response
+from ..server import mcp, get_client, _error_response, _json_response
 
 
 @mcp.tool()
@@ -18,7 +17,7 @@ def gmail_vacation_get(
     try:
         client = get_client(account)
         result = client.get_vacation_settings()
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -48,6 +47,6 @@ def gmail_vacation_set(
             start_time=start_time,
             end_time=end_time,
         )
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
@@ -3,11 +3,18 @@
 from __future__ import annotations
 
 import json
+from datetime import datetime, timezone
+from email.utils import getaddresses
 from typing import Annotated
 
 from pydantic import Field
 
-from ..server import mcp, get_client, _error_response, _slim_response
+from ..bodies import QuoteTracker, header_map, text_body
+from ..cache import content_cache, message_key
+from ..server import mcp, get_client, _error_response, _json_response
+
+_ORDERS = ("oldest", "newest")
+_STUB_KEYS = ("id", "labelIds", "internalDate")
 
 
 @mcp.tool()
@@ -17,6 +24,7 @@ def gmail_threads_list(
     max_results: Annotated[int, Field(description="Maximum number of threads to return (1-500)")] = 10,
     label_ids: Annotated[str | None, Field(description="Comma-separated label IDs to filter by")] = None,
     page_token: Annotated[str | None, Field(description="Token for fetching the next page of results")] = None,
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
 ) -> str:
     """List threads matching a query. Prefer this over messages_list for conversations."""
     try:
@@ -28,7 +36,7 @@ def gmail_threads_list(
             label_ids=label_list,
             page_token=page_token,
         )
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result, max_bytes=max_bytes)
     except Exception as exc:
         return _error_response(exc)
 
@@ -38,16 +46,142 @@ def gmail_thread_get(
     thread_id: Annotated[str, Field(description="The thread ID to retrieve")],
     account: Annotated[str | None, Field(description="Account alias or email")] = None,
     response_format: Annotated[str, Field(description="Response format: 'full', 'metadata', or 'minimal'")] = "full",
+    last_n: Annotated[int | None, Field(description="Return full content for only the N most recent messages; earlier ones come back as stubs")] = None,
+    offset: Annotated[int, Field(description="Skip this many messages (in the chosen order) before the full-content window")] = 0,
+    limit: Annotated[int | None, Field(description="Number of messages to return with full content, starting at offset")] = None,
+    order: Annotated[str, Field(description="Message order: 'oldest' first (thread order) or 'newest' first")] = "oldest",
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
+) -> str:
+    """Get a thread with its messages.
+
+    Pass last_n, or offset/limit, to get full content for only a window of
+    the thread; the other messages come back as stubs (id, labelIds,
+    internalDate) so positions and counts stay visible.
+    """
+    try:
+        if order not in _ORDERS:
+            raise ValueError(f"order must be one of {', '.join(_ORDERS)}")
+        if last_n is not None and (offset or limit is not None):
+            raise ValueError("Pass either last_n or offset/limit, not both")
+        client = get_client(account)
+        if last_n is None and not offset and limit is None and order == "oldest":
+            result = client.get_thread(thread_id, format_=response_format)
+        else:
+            result = _window_thread(client, thread_id, response_format, last_n, offset, limit, order)
+        return _json_response(result, max_bytes=max_bytes)
+    except Exception as exc:
+        return _error_response(exc)
+
+
+def _window_thread(
+    client, thread_id: str, response_format: str, last_n: int | None, offset: int, limit: int | None, order: str,
+) -> dict:
+    """Return the thread in ``order`` with full content only inside the window.
+
+    The skeleton is always fetched fresh (``minimal`` is cheap and carries
+    current labels); the client serves message content from the content
+    cache when held. When most of the window is uncached, one full thread
+    fetch is cheaper than per-message gets.
+    """
+    skeleton = client.get_thread(thread_id, format_="minimal")
+    stubs = skeleton.get("messages", [])
+    ordered = stubs if order == "oldest" else stubs[::-1]
+    total = len(ordered)
+    if last_n is not None:
+        start, end = (0, last_n) if order == "newest" else (max(total - last_n, 0), total)
+    else:
+        start, end = offset, total if limit is None else offset + limit
+    start, end = max(start, 0), max(min(end, total), 0)
+    window = ordered[start:end]
+
+    missing = [stub["id"] for stub in window if content_cache.get(message_key(client.account, stub["id"], response_format)) is None]
+    if len(missing) * 2 > total:
+        fetched = client.get_thread(thread_id, format_=response_format).get("messages", [])
+    else:
+        fetched = [client.get_message(stub["id"], format_=response_format) for stub in window]
+    content = {message["id"]: message for message in fetched}
+
+    messages = []
+    for index, stub in enumerate(ordered):
+        if start <= index < end and stub["id"] in content:
+            messages.append({**content[stub["id"]], "labelIds": stub.get("labelIds", [])})
+        else:
+            messages.append({k: stub[k] for k in _STUB_KEYS if k in stub})
+    return {
+        "id": skeleton.get("id", thread_id),
+        "historyId": skeleton.get("historyId"),
+        "messageCount": total,
+        "window": {"order": order, "start": start, "end": end},
+        "messages": messages,
+    }
+
+
+@mcp.tool()
+def gmail_thread_digest(
+    thread_id: Annotated[str, Field(description="The thread ID to digest")],
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    max_bytes: Annotated[int | None, Field(description="Response size budget in bytes (roughly 4 bytes per token). Larger responses are cut at the budget and include a 'truncated' object with a cursor for gmail_continue.")] = None,
 ) -> str:
-    """Get a thread with all its messages."""
+    """Get a thread as compact text: each message's new content only, quoted history removed.
+
+    Participants are listed once; each message refers to them by index.
+    Use this to read long reply chains; use thread_get for MIME parts and attachments.
+    """
     try:
         client = get_client(account)
-        result = client.get_thread(thread_id, format_=response_format)
-        return json.dumps(_slim_response(result), indent=2)
+        thread = client.get_thread(thread_id, format_="full")
+        return _json_response(_digest(thread, client.account), max_bytes=max_bytes)
     except Exception as exc:
         return _error_response(exc)
 
 
+def _digest(thread: dict, account: str = "") -> dict:
+    participants: list[str] = []
+    index: dict[str, int] = {}
+
+    def refs(value: str) -> list[int]:
+        out = []
+        for name, address in getaddresses([value]):
+            if not address:
+                continue
+            key = address.lower()
+            if key not in index:
+                index[key] = len(participants)
+                participants.append(f"{name} <{address}>" if name else address)
+            out.append(index[key])
+        return out
+
+    tracker = QuoteTracker()
+    subject = None
+    messages = []
+    for message in thread.get("messages", []):
+        payload = message.get("payload", {})
+        headers = header_map(payload)
+        text, dropped = tracker.new_content(text_body(payload, account, message.get("id")))
+        entry: dict = {"id": message.get("id"), "from": refs(headers.get("from", ""))}
+        for field in ("to", "cc"):
+            if headers.get(field):
+                entry[field] = refs(headers[field])
+        if message.get("internalDate"):
+            sent = datetime.fromtimestamp(int(message["internalDate"]) / 1000, tz=timezone.utc)
+            entry["date"] = sent.strftime("%Y-%m-%d %H:%M")
+        if subject is None:
+            subject = headers.get("subject")
+        elif headers.get("subject") and headers["subject"].removeprefix("Re: ") != subject.removeprefix("Re: "):
+            entry["subject"] = headers["subject"]
+        entry["text"] = text
+        if dropped:
+            entry["quoted_chars_omitted"] = dropped
+        messages.append(entry)
+    return {
+        "id": thread.get("id"),
+        "subject": subject,
+        "messageCount": len(messages),
+        "participants": participants,
+        "messages": messages,
+    }
+
+
 @mcp.tool()
 def gmail_thread_modify(
     thread_id: Annotated[str, Field(description="The thread ID to modify")],
@@ -61,7 +195,7 @@ def gmail_thread_modify(
         add_list = [lid.strip() for lid in add_label_ids.split(",")] if add_label_ids else None
         remove_list = [lid.strip() for lid in remove_label_ids.split(",")] if remove_label_ids else None
         result = client.modify_thread(thread_id, add_label_ids=add_list, remove_label_ids=remove_list)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -75,7 +209,7 @@ def gmail_thread_trash(
     try:
         client = get_client(account)
         result = client.trash_thread(thread_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -89,7 +223,7 @@ def gmail_thread_untrash(
     try:
         client = get_client(account)
         result = client.untrash_thread(thread_id)
-        return json.dumps(_slim_response(result), indent=2)
+        return _json_response(result)
     except Exception as exc:
         return _error_response(exc)
 
@@ -0,0 +1,68 @@
+"""Gmail push-notification tools — start/stop users.watch and the history resource."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+from typing import Annotated
+
+import anyio
+from mcp.server.fastmcp import Context
+from pydantic import AnyUrl, Field
+
+from ..server import mcp, _error_response, _json_response
+from ..watch import RESOURCE_URI, watcher
+
+
+@mcp.tool()
+async def gmail_watch_start(
+    topic_name: Annotated[str, Field(description="Cloud Pub/Sub topic Gmail publishes to, e.g. 'projects/my-project/topics/gmail'")],
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+    label_ids: Annotated[str | None, Field(description="Comma-separated label IDs to restrict notifications to")] = None,
+    label_filter_behavior: Annotated[str, Field(description="'include' (only changes to label_ids) or 'exclude' (all but label_ids)")] = "include",
+    ctx: Context | None = None,
+) -> str:
+    """Start push notifications for mailbox changes (users.watch).
+
+    Changes arrive through the local push receiver, are fetched with an
+    incremental history.list right away, and this session gets a
+    resources/updated notification for the returned gmail://{account}/history
+    resource. Re-call to change the topic or labels; renewal is automatic.
+    """
+    try:
+        label_list = [lid.strip() for lid in label_ids.split(",")] if label_ids else None
+        start = functools.partial(watcher.start, account, topic_name, label_list, label_filter_behavior)
+        result = await anyio.to_thread.run_sync(start)
+        if ctx is not None:
+            watcher.listen(result["resource"], ctx.session, asyncio.get_running_loop())
+        return _json_response(result)
+    except Exception as exc:
+        return _error_response(exc)
+
+
+@mcp.tool()
+def gmail_watch_stop(
+    account: Annotated[str | None, Field(description="Account alias or email")] = None,
+) -> str:
+    """Stop push notifications for an account (users.stop)."""
+    try:
+        return _json_response(watcher.stop(account))
+    except Exception as exc:
+        return _error_response(exc)
+
+
+@mcp.resource(RESOURCE_URI, mime_type="application/json")
+def gmail_history_resource(account: str) -> str:
+    """Mailbox changes received through push notifications since the watch started (most recent 500)."""
+    return json.dumps(watcher.changes(account), indent=2)
+
+
+@mcp._mcp_server.subscribe_resource()
+async def _subscribe(uri: AnyUrl) -> None:
+    watcher.listen(str(uri), mcp._mcp_server.request_context.session, asyncio.get_running_loop())
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def _unsubscribe(uri: AnyUrl) -> None:
+    watcher.unlisten(str(uri), mcp._mcp_server.request_context.session)
@@ -0,0 +1,134 @@
+"""Optional tracing — OpenTelemetry-compatible spans for each stage of a tool call.
+
+Tracing is off unless ``GMAIL_MCP_TRACE_FILE`` points at a file. Each finished
+span is appended to it as one JSON line using OTLP span field names
+(traceId, spanId, parentSpanId, name, startTimeUnixNano, endTimeUnixNano,
+attributes, status), so a slow call can be broken down with ``jq`` or shipped
+to a collector's file receiver. When disabled, ``span()`` costs one
+attribute check.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import IO, Any, Iterator
+
+from .quota import api_method, quota_units
+
+_current_span: ContextVar[dict[str, Any] | None] = ContextVar("gmail_mcp_span", default=None)
+_lock = threading.Lock()
+_exporter: IO[str] | None = None
+
+
+def configure(path: str | os.PathLike[str] | None) -> None:
+    """Start exporting spans to ``path`` as JSON lines, or stop if ``path`` is None."""
+    global _exporter
+    with _lock:
+        if _exporter is not None:
+            _exporter.close()
+        _exporter = open(path, "a", buffering=1, encoding="utf-8") if path else None
+
+
+def enabled() -> bool:
+    """Return True when spans are being exported."""
+    return _exporter is not None
+
+
+def _export(record: dict[str, Any]) -> None:
+    line = json.dumps(record, separators=(",", ":"), default=str)
+    with _lock:
+        if _exporter is not None:
+            _exporter.write(line + "\n")
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+    """Record a span around the enclosed block.
+
+    Yields the span's attribute dict so callers can attach values that are only
+    known at the end (response sizes, counts). Spans opened inside the block —
+    including from nested helpers — become children of this one.
+    """
+    if _exporter is None:
+        yield attributes
+        return
+    parent = _current_span.get()
+    record: dict[str, Any] = {
+        "traceId": parent["traceId"] if parent else secrets.token_hex(16),
+        "spanId": secrets.token_hex(8),
+        "parentSpanId": parent["spanId"] if parent else None,
+        "name": name,
+        "startTimeUnixNano": time.time_ns(),
+        "attributes": attributes,
+        "status": {"code": "OK"},
+    }
+    token = _current_span.set(record)
+    try:
+        yield attributes
+    except BaseException as exc:
+        record["status"] = {"code": "ERROR", "message": str(exc)}
+        raise
+    finally:
+        _current_span.reset(token)
+        record["endTimeUnixNano"] = time.time_ns()
+        _export(record)
+
+
+def carrier() -> dict[str, str] | None:
+    """Ids of the current span, for continuing the trace in another process."""
+    current = _current_span.get()
+    return {"traceId": current["traceId"], "spanId": current["spanId"]} if current else None
+
+
+@contextmanager
+def attach(parent: dict[str, str] | None) -> Iterator[None]:
+    """Make spans opened in the block children of ``parent`` (from ``carrier()``)."""
+    token = _current_span.set(parent) if parent else None
+    try:
+        yield
+    finally:
+        if token is not None:
+            _current_span.reset(token)
+
+
+def instrument_client(client: Any) -> None:
+    """Wrap a GmailClient's HTTP transport so every request gets its own span.
+
+    Spans carry the HTTP method, Gmail API method, quota units, status code and
+    request/response byte counts. No-op when tracing is disabled.
+    """
+    http = getattr(client, "_http", None)
+    if _exporter is None or http is None:
+        return
+    send = http.send
+
+    def traced_send(request: Any, **kwargs: Any) -> Any:
+        path = request.url.path
+        with span(
+            f"http {request.method}",
+            **{
+                "http.method": request.method,
+                "http.path": path,
+                "gmail.method": api_method(request.method, path),
+                "gmail.quota_units": quota_units(request.method, path),
+                "http.request.bytes": int(request.headers.get("content-length", 0)),
+            },
+        ) as attrs:
+            response = send(request, **kwargs)
+            attrs["http.status_code"] = response.status_code
+            if kwargs.get("stream"):
+                attrs["http.response.bytes"] = int(response.headers.get("content-length", 0))
+            else:
+                attrs["http.response.bytes"] = len(response.content)
+            return response
+
+    http.send = traced_send
+
+
+configure(os.environ.get("GMAIL_MCP_TRACE_FILE"))
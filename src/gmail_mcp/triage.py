@@ -0,0 +1,83 @@
+"""Triage table — one short row per message instead of nested ``metadata`` resources.
+
+A ``metadata`` message carries its headers as a list of name/value objects
+inside ``payload``, plus fields a triage pass never reads. Here the IDs from
+one ``messages.list`` page are resolved to ``metadata`` messages with only
+the From, Subject and Date headers: messages already in the content cache
+(with fresh labels) are free, the rest are read through the batch endpoint
+within the account's quota-unit bucket and cached for later reads. Each
+message is then flattened to a row of ``COLUMNS`` and rendered as TSV or as
+compact JSON arrays, one row per line.
+"""
+
+from __future__ import annotations
+
+import html
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any
+
+from .batch import stream_messages
+from .bodies import header_map
+from .cache import content_cache, label_overlay, message_key
+
+TRIAGE_HEADERS = ["From", "Subject", "Date"]
+COLUMNS = ["id", "thread", "from", "subject", "date", "labels", "size", "snippet"]
+TRIAGE_FORMATS = ("tsv", "json")
+MAX_PARALLEL = 4
+_CONTROL = re.compile(r"[\t\r\n]+")
+
+
+def fetch(client: Any, account: str, message_ids: list[str]) -> list[dict[str, Any]]:
+    """``metadata`` messages for ``message_ids`` in order, from the content cache where possible."""
+    found: dict[str, dict[str, Any]] = {}
+    missing = []
+    for message_id in message_ids:
+        content = content_cache.get(message_key(account, message_id, "metadata", TRIAGE_HEADERS))
+        labels = label_overlay.get(account, message_id)
+        if content is not None and labels is not None:
+            found[message_id] = {**content, "labelIds": labels}
+        else:
+            missing.append(message_id)
+    params = {"format": "metadata", "metadataHeaders": TRIAGE_HEADERS}
+    with ThreadPoolExecutor(MAX_PARALLEL) as pool:
+        for message in stream_messages(client, account, missing, params, pool, parallel=MAX_PARALLEL):
+            if message is not None:  # deleted since it was listed
+                content_cache.put(message_key(account, message["id"], "metadata", TRIAGE_HEADERS), message)
+                found[message["id"]] = message
+    label_overlay.note(account, list(found.values()))
+    return [found[message_id] for message_id in message_ids if message_id in found]
+
+
+def row(message: dict[str, Any], snippet_length: int) -> list[Any]:
+    headers = header_map(message.get("payload", {}))
+    sent = datetime.fromtimestamp(int(message.get("internalDate", 0)) / 1000, tz=timezone.utc)
+    snippet = html.unescape(message.get("snippet", "")) if snippet_length else ""
+    if len(snippet) > snippet_length:
+        snippet = snippet[:snippet_length].rstrip() + "…"
+    return [
+        message["id"],
+        message.get("threadId", ""),
+        headers.get("from", ""),
+        headers.get("subject", ""),
+        sent.strftime("%Y-%m-%d %H:%M"),
+        ",".join(message.get("labelIds", [])),
+        int(message.get("sizeEstimate", 0)),
+        snippet,
+    ]
+
+
+def render(rows: list[list[Any]], fmt: str, next_page_token: str | None = None) -> str:
+    """Rows as TSV (header line first) or as a JSON object with one compact row array per line."""
+    if fmt == "tsv":
+        lines = ["\t".join(COLUMNS)]
+        lines += ["\t".join(_CONTROL.sub(" ", str(value)) for value in values) for values in rows]
+        if next_page_token:
+            lines.append(f"# nextPageToken\t{next_page_token}")
+        return "\n".join(lines)
+    compact = {"separators": (",", ":"), "ensure_ascii": False}
+    body = ",\n".join(json.dumps(values, **compact) for values in rows)
+    tail = f',\n"nextPageToken":{json.dumps(next_page_token)}' if next_page_token else ""
+    return f'{{"columns":{json.dumps(COLUMNS, **compact)},\n"rows":[\n{body}]{tail}}}'
@@ -0,0 +1,284 @@
+"""Attachment sending — stream MIME messages to Gmail's ``/upload`` media endpoint.
+
+The JSON ``messages.send`` call needs the whole message base64-encoded in
+memory, which is slow and memory-hungry for large files. Instead, the MIME
+message is written to a temporary file with each attachment base64-encoded
+chunk by chunk, then uploaded as ``message/rfc822``:
+
+- up to ``SIMPLE_UPLOAD_LIMIT`` bytes with one ``uploadType=media`` request;
+- messages already in memory with metadata (imports) with one
+  ``uploadType=multipart`` request carrying both;
+- larger messages with ``uploadType=resumable``, in ``CHUNK_SIZE`` chunks.
+  After a network error or 5xx, the session is queried
+  (``Content-Range: bytes */total``) and the upload resumes after the last
+  byte Gmail confirmed, rather than starting over.
+
+Attachment paths are read on the server, which in HTTP mode may not be the
+caller's machine. Files under ``SECRETS_DIR`` (OAuth tokens) are always
+refused, and when ``GMAIL_MCP_ATTACHMENTS_DIR`` is set only files inside it
+are accepted; relative paths are taken from it. Symlinks are followed
+before the check.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import mimetypes
+import os
+import secrets
+import tempfile
+import time
+from email.message import EmailMessage
+from email.policy import SMTP
+from pathlib import Path
+from typing import IO, Any
+
+import httpx
+from gmail_sdk import GmailAPIError
+
+from .auth import SECRETS_DIR
+
+ATTACHMENTS_DIR = Path(os.environ["GMAIL_MCP_ATTACHMENTS_DIR"]).expanduser() if os.environ.get("GMAIL_MCP_ATTACHMENTS_DIR") else None
+CHUNK_SIZE = 8 * 1024 * 1024  # must be a multiple of 256 KiB
+SIMPLE_UPLOAD_LIMIT = 5 * 1024 * 1024
+MAX_MESSAGE_SIZE = 35 * 1024 * 1024  # Gmail's limit for uploaded messages
+MAX_RETRIES = 5
+_B64_READ = 57 * 1024  # 57 input bytes -> one 76-character base64 line
+
+
+def resolve_paths(attachments: str) -> list[Path]:
+    """Split a comma-separated path list, expanding ``~``; raises ValueError for missing or refused files."""
+    paths = [Path(p.strip()).expanduser() for p in attachments.split(",") if p.strip()]
+    if ATTACHMENTS_DIR is not None:
+        paths = [ATTACHMENTS_DIR / p for p in paths]  # no-op for absolute paths
+    missing = [str(p) for p in paths if not p.is_file()]
+    if missing:
+        raise ValueError(f"Attachment not found: {', '.join(missing)}")
+    for path in paths:
+        real = path.resolve()
+        if real.is_relative_to(SECRETS_DIR.resolve()):
+            raise ValueError(f"Attachment refused: {path} is in the OAuth secrets directory")
+        if ATTACHMENTS_DIR is not None and not real.is_relative_to(ATTACHMENTS_DIR.resolve()):
+            raise ValueError(f"Attachment refused: {path} is outside GMAIL_MCP_ATTACHMENTS_DIR ({ATTACHMENTS_DIR})")
+    return paths
+
+
+def _header_block(message: EmailMessage) -> bytes:
+    """Folded, encoded header lines plus the blank separator line — no body."""
+    return b"".join(SMTP.fold_binary(name, value) for name, value in message.items()) + b"\r\n"
+
+
+def _headers(**fields: str | None) -> bytes:
+    message = EmailMessage(policy=SMTP)
+    for name, value in fields.items():
+        if value:
+            message[name.replace("_", "-")] = value
+    return _header_block(message)
+
+
+def _write_attachment(out: IO[bytes], path: Path, boundary: str) -> None:
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    part = EmailMessage(policy=SMTP)
+    part["Content-Type"] = content_type
+    part.add_header("Content-Disposition", "attachment", filename=path.name)
+    part["Content-Transfer-Encoding"] = "base64"
+    out.write(f"--{boundary}\r\n".encode("ascii"))
+    out.write(_header_block(part))
+    with open(path, "rb") as source:
+        while chunk := source.read(_B64_READ):
+            encoded = base64.b64encode(chunk)
+            for start in range(0, len(encoded), 76):
+                out.write(encoded[start:start + 76] + b"\r\n")
+
+
+def write_mime(
+    out: IO[bytes],
+    *,
+    to: str,
+    subject: str,
+    body: str,
+    attachments: list[Path],
+    cc: str | None = None,
+    bcc: str | None = None,
+    extra_headers: dict[str, str] | None = None,
+) -> None:
+    """Write a multipart/mixed message with ``attachments`` to ``out``, one chunk at a time."""
+    boundary = f"=_gmail_mcp_{secrets.token_hex(12)}"
+    out.write(_headers(
+        To=to, Cc=cc, Bcc=bcc, Subject=subject, **(extra_headers or {}),
+        MIME_Version="1.0", Content_Type=f'multipart/mixed; boundary="{boundary}"',
+    ))
+    text = EmailMessage(policy=SMTP)
+    text.set_content(body)
+    del text["MIME-Version"]
+    out.write(f"--{boundary}\r\n".encode("ascii"))
+    out.write(text.as_bytes())
+    out.write(b"\r\n")
+    for path in attachments:
+        _write_attachment(out, path, boundary)
+    out.write(f"--{boundary}--\r\n".encode("ascii"))
+
+
+def _raise_for(response: httpx.Response) -> None:
+    if response.status_code >= 400:
+        try:
+            message = response.json().get("error", {}).get("message", response.text)
+        except ValueError:
+            message = response.text
+        raise GmailAPIError(response.status_code, message)
+
+
+def _retryable(response: httpx.Response) -> bool:
+    return response.status_code == 429 or response.status_code >= 500
+
+
+class ResumableUpload:
+    """One resumable upload session for a file already on disk."""
+
+    def __init__(
+        self,
+        http: httpx.Client,
+        url: str,
+        path: Path,
+        metadata: dict[str, Any],
+        chunk_size: int | None = None,
+        params: dict[str, str] | None = None,
+    ) -> None:
+        self.http = http
+        self.url = url
+        self.path = path
+        self.metadata = metadata
+        self.params = params or {}
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.total = path.stat().st_size
+        self.session_uri: str | None = None
+        self.offset = 0
+        self.resumes = 0
+
+    def start(self) -> None:
+        response = self.http.post(
+            self.url,
+            params={**self.params, "uploadType": "resumable"},
+            json=self.metadata,
+            headers={"X-Upload-Content-Type": "message/rfc822", "X-Upload-Content-Length": str(self.total)},
+        )
+        _raise_for(response)
+        self.session_uri = response.headers["Location"]
+
+    def _confirmed(self, response: httpx.Response) -> int:
+        """Next offset to send, from a 308 response's ``Range: bytes=0-N`` header."""
+        received = response.headers.get("Range")
+        return int(received.rsplit("-", 1)[1]) + 1 if received else 0
+
+    def query(self) -> dict[str, Any] | None:
+        """Ask Gmail how much it has; returns the result if the upload already completed."""
+        response = self.http.put(self.session_uri, headers={"Content-Range": f"bytes */{self.total}"}, content=b"")
+        if response.status_code == 308:
+            self.offset = self._confirmed(response)
+            return None
+        _raise_for(response)
+        return response.json()
+
+    def run(self) -> dict[str, Any]:
+        if self.session_uri is None:
+            self.start()
+        failures = 0
+        with open(self.path, "rb") as source:
+            while True:
+                source.seek(self.offset)
+                chunk = source.read(self.chunk_size)
+                end = self.offset + len(chunk) - 1
+                try:
+                    response = self.http.put(
+                        self.session_uri,
+                        headers={"Content-Range": f"bytes {self.offset}-{end}/{self.total}"},
+                        content=chunk,
+                    )
+                except httpx.TransportError:
+                    response = None
+                if response is not None and response.status_code == 308:
+                    self.offset = self._confirmed(response)
+                    failures = 0
+                    continue
+                if response is not None and not _retryable(response):
+                    _raise_for(response)
+                    return response.json()
+                failures += 1
+                if failures > MAX_RETRIES:
+                    if response is not None:
+                        _raise_for(response)
+                    raise GmailAPIError(503, f"Upload interrupted at byte {self.offset} of {self.total}")
+                time.sleep(min(2 ** failures * 0.25, 8))
+                self.resumes += 1
+                result = self.query()
+                if result is not None:
+                    return result
+
+
+def upload_message(client: Any, api_root: str, resource: str, path: Path, metadata: dict[str, Any]) -> dict[str, Any]:
+    """Upload the RFC 822 file at ``path`` to ``users.{resource}`` ("messages/send" or "drafts")."""
+    size = path.stat().st_size
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message is {size / 1024 / 1024:.1f} MB; Gmail accepts at most 35 MB (use Drive links for larger files)")
+    url = f"{api_root}/upload/gmail/v1/users/me/{resource}"
+    http = client._http
+    if size <= SIMPLE_UPLOAD_LIMIT and not metadata:
+        with open(path, "rb") as source:
+            response = http.post(
+                url,
+                params={"uploadType": "media"},
+                content=source,
+                headers={"Content-Type": "message/rfc822", "Content-Length": str(size)},
+            )
+        _raise_for(response)
+        return response.json()
+    return ResumableUpload(http, url, path, metadata).run()
+
+
+def upload_content(
+    http: httpx.Client, url: str, content: bytes, metadata: dict[str, Any], params: dict[str, str] | None = None,
+) -> dict[str, Any]:
+    """Upload an in-memory RFC 822 message with its JSON metadata (and query ``params``) to ``url``."""
+    if len(content) > MAX_MESSAGE_SIZE:
+        raise ValueError(f"Message is {len(content) / 1024 / 1024:.1f} MB; Gmail accepts at most 35 MB")
+    if len(content) > SIMPLE_UPLOAD_LIMIT:
+        with tempfile.NamedTemporaryFile(suffix=".eml", delete=False) as out:
+            out.write(content)
+        path = Path(out.name)
+        try:
+            return ResumableUpload(http, url, path, metadata, params=params).run()
+        finally:
+            path.unlink(missing_ok=True)
+    boundary = f"upload_{secrets.token_hex(12)}"
+    body = b"".join([
+        f"--{boundary}\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n".encode("ascii"),
+        json.dumps(metadata).encode("utf-8"),
+        f"\r\n--{boundary}\r\nContent-Type: message/rfc822\r\n\r\n".encode("ascii"),
+        content,
+        f"\r\n--{boundary}--\r\n".encode("ascii"),
+    ])
+    response = http.post(
+        url, params={**(params or {}), "uploadType": "multipart"}, content=body,
+        headers={"Content-Type": f"multipart/related; boundary={boundary}"},
+    )
+    _raise_for(response)
+    return response.json()
+
+
+def send_with_attachments(client: Any, api_root: str, *, draft: bool = False, thread_id: str | None = None, **message: Any) -> dict[str, Any]:
+    """Build a message with attachments on disk and send it (or save it as a draft)."""
+    with tempfile.NamedTemporaryFile(suffix=".eml", delete=False) as out:
+        try:
+            write_mime(out, **message)
+        except BaseException:
+            os.unlink(out.name)
+            raise
+    path = Path(out.name)
+    try:
+        if draft:
+            metadata = {"message": {"threadId": thread_id}} if thread_id else {}
+            return upload_message(client, api_root, "drafts", path, metadata)
+        return upload_message(client, api_root, "messages/send", path, {"threadId": thread_id} if thread_id else {})
+    finally:
+        path.unlink(missing_ok=True)
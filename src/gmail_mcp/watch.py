@@ -0,0 +1,272 @@
+"""Push notifications — ``users.watch`` plus a local receiver for Pub/Sub push deliveries.
+
+Instead of polling ``history.list``, Gmail can publish a message to a Cloud
+Pub/Sub topic whenever a mailbox changes. A push subscription on that topic
+delivers ``{"message": {"data": base64({"emailAddress", "historyId"})}}`` to
+the receiver started here. Each delivery triggers an immediate incremental
+``history.list`` from the last seen history ID. The changes are applied to
+the label overlay and buffered per account, and subscribed MCP sessions get
+a ``notifications/resources/updated`` for ``gmail://{account}/history``.
+
+The receiver listens on ``GMAIL_MCP_PUSH_HOST``:``GMAIL_MCP_PUSH_PORT``
+(default 127.0.0.1:8787). When ``GMAIL_MCP_PUSH_TOKEN`` is set, deliveries
+must carry it as ``?token=``. Pub/Sub only pushes to public HTTPS endpoints,
+so front the receiver with a tunnel or reverse proxy. The Pub/Sub emulator,
+or ``benchmarks.fake_gmail --push-endpoint``, can push to it directly.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from gmail_sdk import GmailAPIError
+
+from .accounts import resolve_account
+from .cache import label_counts, label_overlay
+from .server import get_client
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_URI = "gmail://{account}/history"
+MAX_BUFFERED_RECORDS = 500
+RENEW_INTERVAL = 24 * 3600  # Gmail asks for watch to be re-called at least every 7 days
+
+
+@dataclass
+class _Watch:
+    alias: str
+    email: str
+    request: dict[str, Any]
+    history_id: int
+    expiration: int
+    records: deque = field(default_factory=lambda: deque(maxlen=MAX_BUFFERED_RECORDS))
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    timer: threading.Timer | None = None
+
+
+class _PushHandler(BaseHTTPRequestHandler):
+    server: "PushReceiver"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        logger.debug("push receiver: " + format, *args)
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+        token = parse_qs(urlsplit(self.path).query).get("token", [None])[0]
+        if self.server.token and token != self.server.token:
+            self.send_response(403)
+        else:
+            try:
+                envelope = json.loads(body)
+                data = json.loads(base64.b64decode(envelope["message"]["data"]))
+                self.server.on_notification(data["emailAddress"], int(data["historyId"]))
+                self.send_response(204)
+            except (KeyError, ValueError, TypeError):
+                self.send_response(400)  # malformed: acking would drop it, but retrying won't fix it
+            except Exception:
+                logger.exception("push notification failed")
+                self.send_response(500)  # Pub/Sub redelivers
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class PushReceiver(ThreadingHTTPServer):
+    """HTTP endpoint for Pub/Sub push deliveries; calls ``on_notification(email, history_id)``."""
+
+    daemon_threads = True
+
+    def __init__(self, on_notification: Any, host: str = "127.0.0.1", port: int = 8787, token: str | None = None) -> None:
+        super().__init__((host, port), _PushHandler)
+        self.on_notification = on_notification
+        self.token = token
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> None:
+        threading.Thread(target=self.serve_forever, name="gmail-push", daemon=True).start()
+
+
+class Watcher:
+    """Tracks active watches, turns notifications into history fetches, and notifies sessions."""
+
+    def __init__(self) -> None:
+        self._watches: dict[str, _Watch] = {}
+        self._by_email: dict[str, str] = {}
+        self._listeners: dict[str, list[tuple[Any, asyncio.AbstractEventLoop]]] = {}
+        self._lock = threading.Lock()
+        self.receiver: PushReceiver | None = None
+
+    # -- watches ------------------------------------------------------------
+
+    def ensure_receiver(self) -> PushReceiver:
+        with self._lock:
+            if self.receiver is None:
+                self.receiver = PushReceiver(
+                    self.notify,
+                    os.environ.get("GMAIL_MCP_PUSH_HOST", "127.0.0.1"),
+                    int(os.environ.get("GMAIL_MCP_PUSH_PORT", "8787")),
+                    os.environ.get("GMAIL_MCP_PUSH_TOKEN") or None,
+                )
+                self.receiver.start()
+            return self.receiver
+
+    def start(self, account: str | None, topic_name: str, label_ids: list[str] | None = None, label_filter_behavior: str = "include") -> dict[str, Any]:
+        """Call users.watch for the account and start receiving its notifications."""
+        alias = resolve_account(account)
+        client = get_client(alias)
+        request: dict[str, Any] = {"topicName": topic_name}
+        if label_ids:
+            request["labelIds"] = label_ids
+            request["labelFilterBehavior"] = label_filter_behavior
+        response = client._post("/users/me/watch", json=request)
+        email = client.get_profile()["emailAddress"]
+        receiver = self.ensure_receiver()
+        watch = _Watch(alias, email.lower(), request, int(response["historyId"]), int(response["expiration"]))
+        with self._lock:
+            old = self._watches.pop(alias, None)
+            if old is not None and old.timer is not None:
+                old.timer.cancel()
+            self._watches[alias] = watch
+            self._by_email[watch.email] = alias
+        self._schedule_renewal(watch)
+        return {
+            "account": alias,
+            "historyId": str(watch.history_id),
+            "expiration": str(watch.expiration),
+            "resource": RESOURCE_URI.format(account=alias),
+            "receiver": receiver.url,
+        }
+
+    def stop(self, account: str | None) -> dict[str, Any]:
+        """Call users.stop and forget the account's watch."""
+        alias = resolve_account(account)
+        get_client(alias)._post("/users/me/stop")
+        with self._lock:
+            watch = self._watches.pop(alias, None)
+            if watch is not None:
+                self._by_email.pop(watch.email, None)
+        if watch is not None and watch.timer is not None:
+            watch.timer.cancel()
+        return {"success": True, "account": alias, "action": "watch_stopped"}
+
+    def watching(self, alias: str) -> bool:
+        return alias in self._watches
+
+    def _schedule_renewal(self, watch: _Watch) -> None:
+        delay = max(60.0, min(RENEW_INTERVAL, watch.expiration / 1000 - time.time() - 3600))
+        watch.timer = threading.Timer(delay, self._renew, args=(watch.alias,))
+        watch.timer.daemon = True
+        watch.timer.start()
+
+    def _renew(self, alias: str) -> None:
+        watch = self._watches.get(alias)
+        if watch is None:
+            return
+        try:
+            response = get_client(alias)._post("/users/me/watch", json=watch.request)
+            watch.expiration = int(response["expiration"])
+        except Exception:
+            logger.exception("renewing watch for %s failed", alias)
+        self._schedule_renewal(watch)
+
+    # -- notifications ------------------------------------------------------
+
+    def notify(self, email: str, history_id: int) -> None:
+        """Handle one push delivery: fetch history since the last seen ID, then notify sessions."""
+        alias = self._by_email.get(email.lower())
+        watch = self._watches.get(alias) if alias else None
+        if watch is None:
+            logger.info("ignoring notification for unwatched mailbox %s", email)
+            return
+        with watch.lock:
+            if history_id <= watch.history_id:
+                return  # duplicate or out-of-order delivery, already synced
+            changed = self._sync(watch)
+        if changed:
+            self.publish(RESOURCE_URI.format(account=alias))
+
+    def _sync(self, watch: _Watch) -> bool:
+        client = get_client(watch.alias)
+        records: list[dict[str, Any]] = []
+        page_token = None
+        try:
+            while True:
+                result = client.list_history(start_history_id=str(watch.history_id), max_results=500, page_token=page_token)
+                records.extend(result.get("history", []))
+                page_token = result.get("nextPageToken")
+                if not page_token:
+                    break
+        except GmailAPIError as exc:
+            if exc.status_code != 404:
+                raise
+            # Start ID too old for history.list: resync from now and tell clients to re-read.
+            watch.history_id = int(client.get_profile()["historyId"])
+            watch.records.append({"id": str(watch.history_id), "reset": True})
+            return True
+        for record in records:
+            for change in record.get("labelsAdded", []) + record.get("labelsRemoved", []):
+                label_overlay.note(watch.alias, [change.get("message")])
+            deleted = [change["message"]["id"] for change in record.get("messagesDeleted", [])]
+            if deleted:
+                label_overlay.drop(watch.alias, deleted)
+            watch.records.append(record)
+        if records:
+            label_counts.mark_stale(watch.alias)
+        watch.history_id = int(result.get("historyId", watch.history_id))
+        return bool(records)
+
+    def changes(self, account: str | None) -> dict[str, Any]:
+        """Buffered history records for the account's watch (the resource contents)."""
+        alias = resolve_account(account)
+        watch = self._watches.get(alias)
+        if watch is None:
+            return {"account": alias, "watching": False}
+        return {
+            "account": alias,
+            "watching": True,
+            "historyId": str(watch.history_id),
+            "expiration": str(watch.expiration),
+            "history": list(watch.records),
+        }
+
+    # -- MCP sessions -------------------------------------------------------
+
+    def listen(self, uri: str, session: Any, loop: asyncio.AbstractEventLoop) -> None:
+        with self._lock:
+            listeners = self._listeners.setdefault(uri, [])
+            if not any(s is session for s, _ in listeners):
+                listeners.append((session, loop))
+
+    def unlisten(self, uri: str, session: Any) -> None:
+        with self._lock:
+            self._listeners[uri] = [(s, loop) for s, loop in self._listeners.get(uri, []) if s is not session]
+
+    def publish(self, uri: str) -> None:
+        """Send resources/updated for ``uri`` to every listening session (from any thread)."""
+        from pydantic import AnyUrl
+
+        with self._lock:
+            listeners = list(self._listeners.get(uri, []))
+        for session, loop in listeners:
+            if loop.is_closed():
+                self.unlisten(uri, session)
+                continue
+            future = asyncio.run_coroutine_threadsafe(session.send_resource_updated(AnyUrl(uri)), loop)
+            future.add_done_callback(lambda f, s=session: (f.cancelled() or f.exception()) and self.unlisten(uri, s))
+
+
+watcher = Watcher()
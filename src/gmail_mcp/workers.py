@@ -0,0 +1,183 @@
+"""Account-sharded worker processes — spread response processing across cores.
+
+Decoding and serializing large ``format=full`` threads is CPU-bound, and in a
+single process the GIL caps it at one core however many accounts are busy.
+With ``--workers N`` the front process keeps the MCP transport, argument
+validation and per-session limits, and hands each sync tool call to one of N
+worker processes over a multiprocessing pipe; each worker runs its calls in
+a thread pool (``GMAIL_MCP_WORKER_THREADS``, default 16). The worker is
+chosen by a stable hash of the account alias, so each account's client, token and caches
+live in exactly one worker.
+
+``gmail_continue`` cursors are prefixed with the issuing worker's index
+(``w2.…``) so the remainder is served by the process holding it. Tools with
+no account to route on and async tools run in the front process, and so do
+the push-notification tools (``FRONT_ONLY``): the front holds the watches,
+their renewal timers and the label overlay and counts that push
+notifications keep fresh. For the same reason, calls for an account with
+an active watch are served by the front rather than a worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from . import budget, tracing
+from .accounts import resolve_account
+
+WORKER_THREADS = int(os.environ.get("GMAIL_MCP_WORKER_THREADS", "16"))
+FRONT_ONLY = frozenset({"gmail_watch_start", "gmail_watch_stop"})
+
+
+class WorkerError(RuntimeError):
+    """A worker process failed or exited before answering."""
+
+
+def _run_tool(name: str, arguments: dict[str, Any], parent: dict[str, str] | None) -> Any:
+    """Worker side: run the tool's sync function with already-validated arguments."""
+    from .server import mcp
+
+    tool = mcp._tool_manager.get_tool(name)
+    if tool is None:
+        raise ValueError(f"Unknown tool: {name}")
+    fn = tool.fn
+    with tracing.attach(parent), tracing.span(f"worker {name}", **{"mcp.tool": name}):
+        return fn.__wrapped__(**arguments)
+
+
+def _worker_main(index: int, conn: Any, threads: int) -> None:
+    """Worker process loop: run each request in a thread, send replies as they finish."""
+    budget.CURSOR_PREFIX = f"w{index}."
+    from . import server  # noqa: F401  (registers the tools)
+
+    send_lock = threading.Lock()
+
+    def handle(request_id: int, name: str, arguments: dict[str, Any], parent: dict[str, str] | None) -> None:
+        try:
+            reply = (request_id, True, _run_tool(name, arguments, parent))
+        except Exception as exc:
+            reply = (request_id, False, f"{type(exc).__name__}: {exc}")
+        with send_lock:
+            conn.send(reply)
+
+    with ThreadPoolExecutor(threads, thread_name_prefix=f"worker{index}") as pool:
+        while True:
+            try:
+                request = conn.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+            pool.submit(handle, *request)
+
+
+class _Worker:
+    """Front-process handle for one worker: a process, its pipe and a reply reader."""
+
+    def __init__(self, index: int, context: Any, threads: int) -> None:
+        self._conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(index, child, threads), name=f"gmail-mcp-worker{index}", daemon=True)
+        self.process.start()
+        child.close()
+        self._ids = itertools.count()
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self.alive = True
+        threading.Thread(target=self._read, name=f"worker{index}-replies", daemon=True).start()
+
+    def submit(self, name: str, arguments: dict[str, Any], parent: dict[str, str] | None) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if not self.alive:
+                raise WorkerError("worker process exited")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            self._conn.send((request_id, name, arguments, parent))
+        return future
+
+    def _read(self) -> None:
+        while True:
+            try:
+                request_id, ok, value = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.set_result(value) if ok else future.set_exception(WorkerError(value))
+        with self._lock:
+            self.alive = False
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(WorkerError("worker process exited"))
+
+    def close(self) -> None:
+        with self._lock:
+            if self.alive:
+                self._conn.send(None)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class Supervisor:
+    """Owns the worker processes and routes tool calls to them."""
+
+    def __init__(self, count: int, threads: int = WORKER_THREADS) -> None:
+        self.count = count
+        self.threads = threads
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(index, self._context, threads) for index in range(count)]
+
+    def shard_for(self, name: str, arguments: dict[str, Any]) -> int | None:
+        """Worker index for a call, or None to run it in the front process."""
+        if name == "gmail_continue":
+            prefix, dot, _ = str(arguments.get("cursor", "")).partition(".")
+            if dot and prefix[:1] == "w" and prefix[1:].isdigit() and int(prefix[1:]) < self.count:
+                return int(prefix[1:])
+            return None
+        if name in FRONT_ONLY or "account" not in arguments:
+            return None
+        try:
+            alias = resolve_account(arguments["account"])
+        except ValueError:
+            return 0  # let a worker produce the usual error response
+        from .watch import watcher
+
+        if watcher.watching(alias):
+            return None  # push keeps this account's overlay fresh in the front only
+        return zlib.crc32(alias.encode("utf-8")) % self.count
+
+    async def call(self, index: int, name: str, arguments: dict[str, Any]) -> Any:
+        worker = self._workers[index]
+        if not worker.alive:
+            worker = self._workers[index] = _Worker(index, self._context, self.threads)
+        return await asyncio.wrap_future(worker.submit(name, arguments, tracing.carrier()))
+
+    def shutdown(self) -> None:
+        for worker in self._workers:
+            worker.close()
+
+
+supervisor: Supervisor | None = None
+
+
+def start(count: int) -> Supervisor:
+    """Start ``count`` worker processes and route sync tool calls to them."""
+    global supervisor
+    supervisor = Supervisor(count)
+    return supervisor
+
+
+def stop() -> None:
+    global supervisor
+    if supervisor is not None:
+        supervisor.shutdown()
+        supervisor = None
@@ -1,4 +1,4 @@
-"""Shared test fixtures — mock GmailClient for all tool tests."""
+"""Shared test fixtures — mock GmailClient for all tool tests, or a fake Gmail server."""
 
 from __future__ import annotations
 
@@ -14,7 +14,38 @@ def mock_client():
     Yields a MagicMock that stands in for GmailClient. Tests can configure
     return values like: mock_client.get_profile.return_value = {...}
     """
+    from gmail_mcp import quota
+    from gmail_mcp.cache import content_cache, label_counts, label_overlay
+    from gmail_mcp.contacts import contact_index
+    from gmail_mcp.stats import mailbox_stats
+
+    content_cache.clear()
+    label_overlay.clear()
+    label_counts.clear()
+    mailbox_stats.clear()
+    contact_index.clear()
+    quota._buckets.clear()
     client = MagicMock()
     with patch("gmail_mcp.server._clients", {}):
         with patch("gmail_mcp.server.GmailClient", return_value=client):
             yield client
+
+
+@pytest.fixture
+def fake_gmail(monkeypatch):
+    """A real GmailClient pointed at the fake Gmail server."""
+    from gmail_sdk import GmailClient
+
+    from benchmarks.fake_gmail import FakeGmailApp, FakeGmailServer, FakeMailbox
+    from gmail_mcp import server as gmail_server
+
+    app = FakeGmailApp(FakeMailbox(threads=4, messages_per_thread=2))
+    server = FakeGmailServer(app)
+    server.start()
+    client = GmailClient(access_token="test")
+    client.account = "draneylucas"
+    monkeypatch.setattr(gmail_server, "GMAIL_API_ROOT", server.url)
+    monkeypatch.setattr(gmail_server, "GmailClient", lambda **kwargs: client)
+    yield app
+    server.shutdown()
+    client._http.close()
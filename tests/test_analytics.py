@@ -0,0 +1,169 @@
+"""Tests for analytics tools — counts and histograms against the fake Gmail server."""
+
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import pytest
+
+from gmail_mcp.tools.analytics import buckets
+
+
+class TestBuckets:
+    def test_week_buckets_align_to_monday(self):
+        ranges = buckets(date(2024, 1, 3), date(2024, 1, 20), "week")
+        assert ranges == [
+            (date(2024, 1, 3), date(2024, 1, 8)),
+            (date(2024, 1, 8), date(2024, 1, 15)),
+            (date(2024, 1, 15), date(2024, 1, 20)),
+        ]
+
+    def test_month_buckets(self):
+        ranges = buckets(date(2024, 1, 15), date(2024, 4, 1), "month")
+        assert [start for start, _ in ranges] == [date(2024, 1, 15), date(2024, 2, 1), date(2024, 3, 1)]
+
+    @pytest.mark.parametrize("after, before, unit", [
+        (date(2024, 1, 2), date(2024, 1, 1), "day"),
+        (date(2024, 1, 1), date(2024, 2, 1), "year"),
+        (date(2020, 1, 1), date(2024, 1, 1), "day"),
+    ])
+    def test_invalid(self, after, before, unit):
+        with pytest.raises(ValueError):
+            buckets(after, before, unit)
+
+
+class TestCount:
+    def _count(self, **kwargs):
+        from gmail_mcp.tools.analytics import gmail_count
+
+        return json.loads(gmail_count(account="draneylucas", **kwargs))
+
+    def test_single_query(self, fake_gmail):
+        result = self._count(query="is:starred")
+        starred = sum("STARRED" in m["labelIds"] for m in fake_gmail.mailbox.messages.values())
+        assert result == {"query": "is:starred", "estimate": starred}
+        assert "method:messages.get" not in fake_gmail.stats
+
+    def test_many_queries_in_one_request(self, fake_gmail):
+        result = self._count(queries=json.dumps(["is:unread", "from:eve.black", "from:nobody"]))
+        counts = {row["query"]: row["estimate"] for row in result["counts"]}
+        assert counts["from:eve.black"] == 3
+        assert counts["from:nobody"] == 0
+        assert fake_gmail.stats["batches"] == 1
+        assert fake_gmail.stats["method:messages.list"] == 3
+
+    def test_queries_are_paid_from_the_units_bucket(self, fake_gmail, monkeypatch):
+        from gmail_mcp import quota
+
+        units = quota.bucket("draneylucas", "units", 1e6, 250)
+        charged = []
+        monkeypatch.setattr(units, "acquire", lambda tokens=1.0: charged.append(tokens) or 0.0)
+        result = self._count(queries=json.dumps([f"from:x{i}" for i in range(120)]))
+        assert len(result["counts"]) == 120
+        assert charged == [250, 250, 100]  # 5 units per messages.list, at most one full bucket per batch
+        assert fake_gmail.stats["batches"] == 3
+
+    def test_histogram(self, fake_gmail):
+        result = self._count(histogram="month", after="2024/01/01", before="2025/01/01")
+        assert len(result["buckets"]) == 12
+        assert result["total"] == len(fake_gmail.mailbox.messages)
+        assert result["buckets"][0]["start"] == "2024/01/01"
+        assert fake_gmail.stats["batches"] == 1
+
+    def test_histogram_needs_after(self, fake_gmail):
+        result = self._count(query="is:unread", histogram="day")
+        assert result["error"] is True
+        assert "after" in result["message"]
+
+    def test_needs_a_query(self, fake_gmail):
+        assert self._count()["error"] is True
+
+
+class TestMailboxStatsAggregates:
+    def _message(self, message_id, sender, size, labels, list_id=None):
+        headers = [{"name": "From", "value": sender}]
+        if list_id:
+            headers.append({"name": "List-Id", "value": list_id})
+        return {"id": message_id, "sizeEstimate": size, "labelIds": labels, "internalDate": "1704067200000", "payload": {"headers": headers}}
+
+    def test_add_remove_relabel(self):
+        from gmail_mcp.stats import MailboxStats
+
+        stats = MailboxStats(history_id=1, limit=10)
+        stats.add(self._message("a", "Eve <EVE@x.com>", 100, ["INBOX"], "News <news.x.com>"))
+        stats.add(self._message("b", "eve@x.com", 50, ["INBOX", "STARRED"]))
+        stats.add(self._message("c", "bob@x.com", 500, ["SPAM"]))
+        assert len(stats) == 2 and stats.total_bytes == 150
+        assert stats.top("sender", 5) == [("eve@x.com", 2, 150)]
+        assert stats.totals("list") == {"news.x.com": (1, 100)}
+        stats.relabel("b", ["STARRED"])
+        assert stats.totals("label") == {"INBOX": (1, 100), "STARRED": (1, 50)}
+        stats.relabel("a", ["TRASH"])
+        stats.remove("b")
+        assert len(stats) == 0 and stats.total_bytes == 0
+        assert stats.totals("sender") == {} and stats.totals("day") == {}
+
+
+class TestMailboxStats:
+    def _stats(self, **kwargs):
+        from gmail_mcp.tools.analytics import gmail_mailbox_stats
+
+        return json.loads(gmail_mailbox_stats(account="draneylucas", **kwargs))
+
+    def test_aggregates_from_metadata(self, fake_gmail):
+        messages = fake_gmail.mailbox.messages
+        result = self._stats(top_n=100)
+        assert result["messages"] == len(messages)
+        assert result["complete"] is True
+        assert result["bytes"] == sum(m["sizeEstimate"] for m in messages.values())
+        senders = {row["sender"]: row["messages"] for row in result["top_senders"]}
+        assert senders["bob.jones@example.com"] == 2
+        assert sum(row["messages"] for row in result["volume"]) == len(messages)
+        assert "method:messages.list" in fake_gmail.stats and fake_gmail.stats["batches"] == 1
+
+    def test_metadata_reads_are_paid_from_the_units_bucket(self, fake_gmail, monkeypatch):
+        from gmail_mcp import quota
+
+        units = quota.bucket("draneylucas", "units", 1e6, 250)
+        charged = []
+        monkeypatch.setattr(units, "acquire", lambda tokens=1.0: charged.append(tokens) or 0.0)
+        self._stats()
+        assert charged == [5 * len(fake_gmail.mailbox.messages)]
+
+    def test_cached_messages_use_current_labels(self, fake_gmail):
+        from gmail_mcp.tools.messages import gmail_message_archive, gmail_message_get
+
+        inbox = [m["id"] for m in fake_gmail.mailbox.messages.values() if "INBOX" in m["labelIds"]]
+        gmail_message_get(inbox[0], account="draneylucas")
+        gmail_message_archive(inbox[0], account="draneylucas")
+        labels = {row["label_id"]: row["messages"] for row in self._stats(top_n=100)["labels"]}
+        assert labels.get("INBOX", 0) == len(inbox) - 1
+
+    def test_rank_by_bytes(self, fake_gmail):
+        result = self._stats(top_n=1, by="bytes")
+        largest = max(fake_gmail.mailbox.messages.values(), key=lambda m: m["sizeEstimate"])
+        assert result["labels"][0]["bytes"] >= largest["sizeEstimate"]
+        assert len(result["top_senders"]) == 1
+
+    def test_updates_from_history(self, fake_gmail):
+        from gmail_mcp.tools.messages import gmail_message_trash
+
+        before = self._stats(top_n=100)
+        victim = next(iter(fake_gmail.mailbox.messages.values()))
+        gmail_message_trash(victim["id"], account="draneylucas")
+        fake_gmail.stats.clear()
+        after = self._stats(top_n=100)
+        assert after["messages"] == before["messages"] - 1
+        assert after["bytes"] == before["bytes"] - victim["sizeEstimate"]
+        assert "method:messages.list" not in fake_gmail.stats
+        assert fake_gmail.stats["method:history.list"] == 1
+
+    def test_unchanged_mailbox_costs_one_history_request(self, fake_gmail):
+        self._stats()
+        fake_gmail.stats.clear()
+        self._stats(volume="week")
+        assert fake_gmail.stats["requests"] == 1
+
+    def test_invalid_ranking(self, fake_gmail):
+        assert self._stats(by="size")["error"] is True
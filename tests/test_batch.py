@@ -0,0 +1,224 @@
+"""Tests for the Gmail batch endpoint client and the gmail_batch tool."""
+
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+from gmail_sdk import GmailAPIError
+
+from gmail_mcp import batch, quota
+from gmail_mcp.batch import BatchRequest, execute
+from gmail_mcp.cache import label_overlay
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    from benchmarks.fake_gmail import FakeGmailApp, FakeGmailServer, FakeMailbox
+    from gmail_mcp import server as gmail_server
+
+    monkeypatch.setattr(batch.time, "sleep", lambda seconds: None)
+    app = FakeGmailApp(FakeMailbox(threads=3, messages_per_thread=2))
+    server = FakeGmailServer(app)
+    server.start()
+    monkeypatch.setattr(gmail_server, "GMAIL_API_ROOT", server.url)
+    with httpx.Client(base_url=f"{server.url}/gmail/v1", timeout=10) as http:
+        yield app, http
+    server.shutdown()
+
+
+class _Client:
+    def __init__(self, http):
+        self._http = http
+        self.account = "draneylucas"
+
+
+class TestExecute:
+    def test_results_in_order(self, fake):
+        app, http = fake
+        ids = list(app.mailbox.messages)[:3]
+        requests = [BatchRequest("GET", f"/users/me/messages/{i}", {"format": "minimal"}) for i in ids]
+        requests.append(BatchRequest("GET", "/users/me/messages/nope"))
+        results = execute(_Client(http), requests)
+        assert [r["id"] for r in results[:3]] == ids
+        assert isinstance(results[3], GmailAPIError) and results[3].status_code == 404
+        assert app.stats["batches"] == 1
+
+    def test_splits_at_batch_limit(self, fake, monkeypatch):
+        app, http = fake
+        monkeypatch.setattr(batch, "MAX_BATCH_SIZE", 2)
+        results = execute(_Client(http), [BatchRequest("GET", "/users/me/labels")] * 5)
+        assert all("labels" in r for r in results)
+        assert app.stats["batches"] == 3
+
+    def test_message_gets_sized_to_the_units_bucket(self, fake, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+
+        app, http = fake
+        monkeypatch.setattr(batch, "USER_UNITS_PER_SECOND", 1e6)  # no waiting; batch size is fixed at import
+        ids = list(app.mailbox.messages) * 20
+        with ThreadPoolExecutor(2) as pool:
+            results = list(batch.stream_messages(_Client(http), "draneylucas", ids, {"format": "minimal"}, pool))
+        assert [r["id"] for r in results] == ids
+        assert batch.GET_BATCH_SIZE * batch.QUOTA_UNITS["messages.get"] <= quota.USER_UNITS_PER_SECOND
+        assert app.stats["batches"] == -(-len(ids) // batch.GET_BATCH_SIZE)
+
+    def test_retries_throttled_items(self, fake):
+        app, http = fake
+        app.error_rate = 0.5
+        results = execute(_Client(http), [BatchRequest("GET", "/users/me/profile")] * 20)
+        assert app.stats["throttled"] > 0
+        assert sum(isinstance(r, dict) for r in results) + sum(
+            isinstance(r, GmailAPIError) and r.status_code == 429 for r in results
+        ) == 20
+        assert sum(isinstance(r, dict) for r in results) > 10
+
+
+class TestRounds:
+    def _plan(self, operations):
+        from gmail_mcp.tools.batch import _plan, _rounds
+
+        return _rounds(_plan(operations, "draneylucas"))
+
+    def test_independent_operations_share_a_batch(self):
+        rounds = self._plan([
+            {"op": "message_trash", "message_id": "m1"},
+            {"op": "message_trash", "message_id": "m2"},
+            {"op": "labels_list"},
+        ])
+        assert len(rounds) == 1
+
+    def test_dependent_steps_keep_their_order(self):
+        rounds = self._plan([
+            {"op": "message_modify", "message_id": "m1", "add_label_ids": "Label_3"},
+            {"op": "message_get", "message_id": "m2"},
+            {"op": "message_trash", "message_id": "m1"},
+            {"op": "thread_get", "thread_id": "t1"},
+        ])
+        assert [len(r) for r in rounds] == [2, 1, 1]
+
+    def test_label_counts_wait_for_message_writes(self):
+        rounds = self._plan([
+            {"op": "message_modify", "message_id": "m1", "add_label_ids": "STARRED"},
+            {"op": "message_trash", "message_id": "m2"},
+            {"op": "label_get", "label_id": "STARRED"},
+        ])
+        assert [len(r) for r in rounds] == [2, 1]
+
+    def test_unknown_op(self):
+        with pytest.raises(ValueError, match="unknown op 'explode'"):
+            self._plan([{"op": "explode"}])
+
+    def test_missing_argument(self):
+        with pytest.raises(ValueError, match=r"operation 0 \(thread_modify\): missing 'thread_id'"):
+            self._plan([{"op": "gmail_thread_modify"}])
+
+
+class TestBatchTool:
+    def test_triage_plan(self, fake, mock_client):
+        from gmail_mcp.tools.batch import gmail_batch
+
+        app, http = fake
+        mock_client._http = http
+        box = app.mailbox
+        threads = list(box.threads)
+        messages = [box.threads[threads[2]][0], box.threads[threads[2]][1]]
+        operations = [{"op": "thread_modify", "thread_id": t, "add_label_ids": "Label_3"} for t in threads[:2]]
+        operations += [{"op": "message_trash", "message_id": m} for m in messages]
+        operations.append({"op": "label_get", "label_id": "Label_3"})
+        result = json.loads(gmail_batch(json.dumps(operations), account="draneylucas"))
+        assert result["operations"] == 5
+        assert result["failed"] == 0
+        assert result["batches"] == 3  # thread writes may touch any message, and label counts wait for both
+        assert "Label_3" in result["results"][0]["messages"][0]["labelIds"]
+        assert "TRASH" in result["results"][2]["labelIds"]
+        assert result["results"][4]["id"] == "Label_3"
+        assert "TRASH" in box.messages[messages[1]]["labelIds"]
+        assert "TRASH" in label_overlay.get("draneylucas", messages[0])
+
+    def test_modify_then_label_counts(self, fake, mock_client):
+        from gmail_mcp.tools.batch import gmail_batch
+
+        app, http = fake
+        mock_client._http = http
+        before = app.mailbox.get_label("STARRED").get("messagesTotal", 0)
+        message_id = next(m for m, message in app.mailbox.messages.items() if "STARRED" not in message["labelIds"])
+        result = json.loads(gmail_batch(json.dumps([
+            {"op": "message_modify", "message_id": message_id, "add_label_ids": "STARRED"},
+            {"op": "label_get", "label_id": "STARRED"},
+        ]), account="draneylucas"))
+        assert result["batches"] == 2
+        assert result["results"][1]["messagesTotal"] == before + 1
+
+    def test_cached_message_needs_no_request(self, fake, mock_client):
+        from gmail_mcp.tools.batch import gmail_batch
+
+        app, http = fake
+        mock_client._http = http
+        message_id = next(iter(app.mailbox.messages))
+        ops = json.dumps([{"op": "message_get", "message_id": message_id}])
+        first = json.loads(gmail_batch(ops, account="draneylucas"))
+        second = json.loads(gmail_batch(ops, account="draneylucas"))
+        assert second["results"] == first["results"]
+        assert second["batches"] == 0
+        assert app.stats["batches"] == 1
+
+    def test_cached_get_after_modify_is_refetched(self, fake, mock_client):
+        from gmail_mcp.tools.batch import gmail_batch
+
+        app, http = fake
+        mock_client._http = http
+        message_id = next(m for m, message in app.mailbox.messages.items() if "STARRED" not in message["labelIds"])
+        get = {"op": "message_get", "message_id": message_id}
+        gmail_batch(json.dumps([get]), account="draneylucas")
+        result = json.loads(gmail_batch(json.dumps([
+            {"op": "message_modify", "message_id": message_id, "add_label_ids": "STARRED"}, get,
+        ]), account="draneylucas"))
+        assert result["batches"] == 2
+        assert "STARRED" in result["results"][1]["labelIds"]
+
+    def test_cached_get_after_delete_is_not_found(self, fake, mock_client):
+        from gmail_mcp.tools.batch import gmail_batch
+
+        app, http = fake
+        mock_client._http = http
+        message_id = next(iter(app.mailbox.messages))
+        get = {"op": "message_get", "message_id": message_id}
+        gmail_batch(json.dumps([get]), account="draneylucas")
+        result = json.loads(gmail_batch(json.dumps([{"op": "message_delete", "message_id": message_id}, get]), account="draneylucas"))
+        assert result["results"][1]["status_code"] == 404
+
+    def test_rounds_are_paid_from_the_units_bucket(self, fake, mock_client, monkeypatch):
+        from gmail_mcp.tools.batch import gmail_batch
+
+        app, http = fake
+        mock_client._http = http
+        charged = []
+        units = quota.bucket("draneylucas", "units", 1e6, 250)
+        monkeypatch.setattr(units, "acquire", lambda tokens=1.0: charged.append(tokens) or 0.0)
+        ids = list(app.mailbox.messages)[:3]
+        gmail_batch(json.dumps(
+            [{"op": "message_get", "message_id": m} for m in ids] + [{"op": "message_trash", "message_id": ids[0]}]
+        ), account="draneylucas")
+        assert charged == [3 * quota.QUOTA_UNITS["messages.get"], quota.QUOTA_UNITS["messages.trash"]]
+
+    def test_item_errors_do_not_stop_others(self, fake, mock_client):
+        from gmail_mcp.tools.batch import gmail_batch
+
+        app, http = fake
+        mock_client._http = http
+        result = json.loads(gmail_batch(json.dumps([
+            {"op": "message_archive", "message_id": "missing"},
+            {"op": "labels_list"},
+        ]), account="draneylucas"))
+        assert result["failed"] == 1
+        assert result["results"][0]["status_code"] == 404
+        assert "labels" in result["results"][1]
+
+    def test_invalid_json(self, mock_client):
+        from gmail_mcp.tools.batch import gmail_batch
+
+        result = json.loads(gmail_batch("[{", account="draneylucas"))
+        assert result["error"] is True
+        assert "operations" in result["message"]
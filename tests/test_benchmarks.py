@@ -0,0 +1,37 @@
+"""Smoke tests for the benchmark suite — fixtures are well-formed and every case runs."""
+
+from __future__ import annotations
+
+from benchmarks import bench_response, fixtures
+
+
+class TestFixtures:
+    def test_thread_shape(self):
+        thread = fixtures.make_thread(5)
+        assert len(thread["messages"]) == 5
+        assert {m["threadId"] for m in thread["messages"]} == {thread["id"]}
+
+    def test_mime_heavy_part_count(self):
+        message = fixtures.make_mime_heavy_message(30)
+
+        def leaves(part):
+            children = part.get("parts", [])
+            return sum(leaves(c) for c in children) if children else 1
+
+        assert leaves(message["payload"]) == 30
+
+    def test_deterministic(self):
+        assert fixtures.make_list_page(10) == fixtures.make_list_page(10)
+
+
+class TestBenchResponse:
+    def test_all_cases_run(self):
+        results = bench_response.run(repeat=1, scale=0.02)
+        assert set(results) == set(bench_response.build_cases(0.02))
+        assert all(r["median_ms"] >= 0 and r["peak_kib"] >= 0 for r in results.values())
+
+    def test_compare_flags_regression(self):
+        baseline = {"a": {"median_ms": 10.0, "peak_kib": 100.0}}
+        current = {"a": {"median_ms": 13.0, "peak_kib": 100.0}}
+        assert bench_response.compare(current, baseline, 0.2) == ["a: median_ms 10.00 -> 13.00"]
+        assert bench_response.compare(current, baseline, 0.5) == []
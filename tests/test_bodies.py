@@ -0,0 +1,137 @@
+"""Tests for body decoding and quoted-history deduplication."""
+
+from __future__ import annotations
+
+import base64
+
+from gmail_mcp.bodies import QuoteTracker, attachments, decode_data, header_map, html_to_text, text_body
+from gmail_mcp.cache import content_cache
+
+
+def _b64(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+PARA_1 = "Can we move the quarterly budget review to Thursday afternoon instead?"
+PARA_2 = "Thursday works for me, but only after three because of the offsite."
+
+
+class TestDecoding:
+    def test_decode_unpadded(self):
+        assert decode_data(_b64("hello!?")) == b"hello!?"
+
+    def test_text_body_prefers_plain(self):
+        payload = {
+            "mimeType": "multipart/alternative",
+            "parts": [
+                {"mimeType": "text/html", "body": {"data": _b64("<p>html</p>")}},
+                {"mimeType": "text/plain", "body": {"data": _b64("plain")}},
+            ],
+        }
+        assert text_body(payload) == "plain"
+
+    def test_text_body_html_fallback(self):
+        payload = {"mimeType": "text/html", "body": {"data": _b64("<p>Hi &amp; bye</p><style>p{}</style><p>two</p>")}}
+        assert text_body(payload) == "Hi & bye\ntwo"
+
+    def test_text_body_empty(self):
+        assert text_body({"mimeType": "image/png", "body": {"attachmentId": "a"}}) == ""
+
+    def test_html_to_text_breaks(self):
+        assert html_to_text("a<br>b") == "a\nb"
+
+    def test_html_text_cached_by_message_and_part(self):
+        payload = {"mimeType": "text/html", "partId": "0", "body": {"data": _b64("<p>one</p>")}}
+        assert text_body(payload, "acct", "m1") == "one"
+        assert content_cache.get(("html_text", "acct", "m1", "0")) == "one"
+        payload["body"]["data"] = _b64("<p>changed</p>")  # message content never changes; proves the hit
+        assert text_body(payload, "acct", "m1") == "one"
+        assert text_body(payload) == "changed"
+
+    def test_attachments(self):
+        payload = {"mimeType": "multipart/mixed", "parts": [
+            {"mimeType": "text/plain", "filename": "", "body": {"data": _b64("x")}},
+            {"mimeType": "application/pdf", "filename": "a.pdf", "body": {"attachmentId": "att1", "size": 10}},
+        ]}
+        assert attachments(payload) == [{"filename": "a.pdf", "mimeType": "application/pdf", "size": 10, "attachmentId": "att1"}]
+
+    def test_header_map(self):
+        payload = {"headers": [{"name": "From", "value": "a@x"}, {"name": "from", "value": "b@x"}]}
+        assert header_map(payload) == {"from": "a@x"}
+
+
+
+class TestHtmlToText:
+    def test_drops_scripts_styles_and_hidden(self):
+        markup = (
+            "<html><head><title>t</title><style>p{color:red}</style></head><body>"
+            '<div style="display: none">preheader</div><script>track()</script><p>Body</p></body></html>'
+        )
+        assert html_to_text(markup) == "Body"
+
+    def test_unclosed_hidden_element_ends_with_its_parent(self):
+        markup = (
+            '<table><tr><td><div style="display:none">preheader<span>more</td></tr></table>'
+            "<p>Body</p><div>tail</div>"
+        )
+        assert html_to_text(markup) == "Body\ntail"
+        assert html_to_text("<html><head><title>t</title><body><p>Body</p></body></html>") == "Body"
+
+    def test_drops_tracking_pixels(self):
+        assert html_to_text('<p>Hi</p><img src="https://t.example.com/o.gif" width="1" height="1">') == "Hi"
+
+    def test_flattens_layout_tables(self):
+        markup = "<table><tr><td>Left</td><td>Right</td></tr><tr><td><table><tr><td>Nested</td></tr></table></td></tr></table>"
+        assert html_to_text(markup) == "Left Right\nNested"
+
+    def test_links_become_footnotes(self):
+        markup = (
+            '<p><a href="https://x.example.com/a?utm_source=mail&amp;id=3">Read</a> and '
+            '<a href="https://x.example.com/a?id=3&amp;utm_medium=email">again</a>, '
+            '<a href="https://y.example.com">https://y.example.com</a>, <a href="mailto:a@b">mail</a></p>'
+        )
+        assert html_to_text(markup) == (
+            "Read [1] and again [1], https://y.example.com, mail\n\nLinks:\n[1] https://x.example.com/a?id=3"
+        )
+
+    def test_image_link_uses_alt_text(self):
+        assert html_to_text('<a href="https://x.example.com"><img src="l.png" alt="Logo"></a>') == (
+            "Logo [1]\n\nLinks:\n[1] https://x.example.com"
+        )
+
+    def test_lists_and_entities(self):
+        assert html_to_text("<ul><li>one &amp; two</li><li>three</li></ul>") == "- one & two\n- three"
+
+
+class TestQuoteTracker:
+    def test_drops_repeated_quote_and_attribution(self):
+        tracker = QuoteTracker()
+        assert tracker.new_content(PARA_1) == (PARA_1, 0)
+        reply = f"{PARA_2}\n\nOn Mon, Jan 6, 2025 Alice wrote:\n> {PARA_1}"
+        text, dropped = tracker.new_content(reply)
+        assert text == PARA_2
+        assert dropped > len(PARA_1)
+
+    def test_keeps_unseen_quote(self):
+        tracker = QuoteTracker()
+        text, dropped = tracker.new_content(f"Agreed.\n\nOn Mon Bob wrote:\n> {PARA_1}")
+        assert PARA_1 in text and "wrote:" in text
+        assert dropped == 0
+
+    def test_rewrapped_nested_quote_is_repeat(self):
+        tracker = QuoteTracker()
+        tracker.new_content(PARA_1)
+        wrapped = PARA_1.replace(" the ", "\n> > the ", 1)
+        text, _ = tracker.new_content(f"New point.\n\n> > {wrapped}")
+        assert text == "New point."
+
+    def test_outlook_style_unquoted_repeat(self):
+        tracker = QuoteTracker()
+        tracker.new_content(PARA_1)
+        text, _ = tracker.new_content(f"Sure.\n\n-----Original Message-----\n\n{PARA_1}")
+        assert text == "Sure."
+
+    def test_short_unquoted_lines_kept(self):
+        tracker = QuoteTracker()
+        tracker.new_content("Thanks,\nBob")
+        assert tracker.new_content("Thanks,\nBob") == ("Thanks,\nBob", 0)
@@ -0,0 +1,116 @@
+"""Tests for response size budgets — truncation, cursors and gmail_continue."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from gmail_mcp.budget import apply_budget, continue_response
+
+
+def _messages(count, body_size=2_000):
+    return {"id": "t1", "messages": [{"id": f"m{i}", "snippet": "x" * body_size} for i in range(count)]}
+
+
+class TestApplyBudget:
+    def test_under_budget_unchanged(self):
+        data = _messages(2, 10)
+        assert apply_budget(data, 10_000) is data
+
+    def test_no_budget_unchanged(self):
+        data = _messages(50)
+        assert apply_budget(data, None) is data
+
+    def test_list_keeps_whole_items(self):
+        result = apply_budget(_messages(50), 20_000)
+        assert len(json.dumps(result, indent=2)) <= 20_000
+        info = result["truncated"]
+        assert info["field"] == "messages"
+        assert info["returned"] == len(result["messages"])
+        assert info["returned"] + info["omitted"] == 50
+        assert result["id"] == "t1"
+
+    def test_single_resource_cuts_largest_string(self):
+        data = {"id": "m1", "raw": "A" * 100_000, "labelIds": ["INBOX"]}
+        result = apply_budget(data, 10_000)
+        assert len(json.dumps(result, indent=2)) <= 10_000
+        assert result["labelIds"] == ["INBOX"]
+        assert result["truncated"]["cut_fields"] == ["raw"]
+        assert len(result["raw"]) + result["truncated"]["omitted_bytes"] == 100_000
+
+    def test_oversized_first_item_is_cut(self):
+        result = apply_budget(_messages(3, body_size=50_000), 10_000)
+        assert len(result["messages"]) == 1
+        assert result["truncated"]["cut_fields"] == ["messages[0].snippet"]
+        assert result["truncated"]["omitted"] == 2
+
+
+class TestContinueResponse:
+    def test_items_resume_in_order(self):
+        result = apply_budget(_messages(40), 15_000)
+        seen = [m["id"] for m in result["messages"]]
+        cursor = result["truncated"]["cursor"]
+        while cursor:
+            page = continue_response(cursor, 15_000)
+            seen += [m["id"] for m in page.get("messages", [])]
+            cursor = page.get("truncated", {}).get("cursor")
+        assert seen == [f"m{i}" for i in range(40)]
+
+    def test_leaf_chunks_reassemble(self):
+        original = "".join(chr(65 + i % 26) for i in range(60_000))
+        result = apply_budget({"id": "m1", "raw": original}, 8_000)
+        text, cursor = result["raw"], result["truncated"]["cursor"]
+        while cursor:
+            page = continue_response(cursor, 8_000)
+            for chunk in page.get("fields", []):
+                assert chunk["path"] == "raw"
+                assert chunk["offset"] == len(text)
+                text += chunk["data"]
+            cursor = page.get("truncated", {}).get("cursor")
+        assert text == original
+
+    def test_non_ascii_pieces_fit_the_budget(self):
+        original = "é✓😀" * 20_000
+        result = apply_budget({"id": "m1", "raw": original}, 8_000)
+        assert 4_000 < len(json.dumps(result, indent=2).encode()) <= 8_000
+        text, cursor = result["raw"], result["truncated"]["cursor"]
+        while cursor:
+            page = continue_response(cursor, 8_000)
+            assert len(json.dumps(page, indent=2).encode()) <= 8_000
+            text += "".join(chunk["data"] for chunk in page.get("fields", []))
+            cursor = page.get("truncated", {}).get("cursor")
+        assert text == original
+
+    def test_cursor_is_single_use(self):
+        cursor = apply_budget(_messages(40), 15_000)["truncated"]["cursor"]
+        continue_response(cursor, 15_000)
+        with pytest.raises(ValueError, match="Unknown or expired cursor"):
+            continue_response(cursor, 15_000)
+
+
+class TestTools:
+    def test_thread_get_with_budget(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        mock_client.get_thread.return_value = _messages(30)
+        result = json.loads(gmail_thread_get("t1", account="draneylucas", max_bytes=12_000))
+        assert result["truncated"]["omitted"] > 0
+        mock_client.get_thread.assert_called_once_with("t1", format_="full")
+
+    def test_continue_tool(self, mock_client):
+        from gmail_mcp.tools.continuation import gmail_continue
+        from gmail_mcp.tools.messages import gmail_message_get
+
+        mock_client.get_message.return_value = {"id": "m1", "snippet": "Q" * 30_000}
+        first = json.loads(gmail_message_get("m1", account="draneylucas", max_bytes=10_000))
+        page = json.loads(gmail_continue(first["truncated"]["cursor"], max_bytes=50_000))
+        assert "truncated" not in page
+        assert len(first["snippet"]) + len(page["fields"][0]["data"]) == 30_000
+        mock_client.get_message.assert_called_once()
+
+    def test_continue_tool_unknown_cursor(self):
+        from gmail_mcp.tools.continuation import gmail_continue
+
+        result = json.loads(gmail_continue("nope"))
+        assert result["error"] is True
@@ -0,0 +1,183 @@
+"""Tests for the content cache, label overlay and caching client."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import patch
+
+from gmail_mcp.cache import ContentCache, LabelCounts, LabelOverlay, label_overlay
+
+
+def _message(message_id, labels=("INBOX", "UNREAD")):
+    return {"id": message_id, "threadId": "t1", "labelIds": list(labels), "payload": {"body": {"data": "x" * 200}}}
+
+
+class TestContentCache:
+    def test_evicts_least_recently_used(self):
+        cache = ContentCache(max_bytes=250)
+        cache.put("a", "a", size=100)
+        cache.put("b", "b", size=100)
+        cache.get("a")
+        cache.put("c", "c", size=100)
+        assert cache.get("a") == "a"
+        assert cache.get("b") is None
+        assert cache.size == 200
+
+    def test_oversize_value_not_stored(self):
+        cache = ContentCache(max_bytes=10)
+        cache.put("a", "x" * 100)
+        assert len(cache) == 0
+
+    def test_replace_and_pop(self):
+        cache = ContentCache(max_bytes=1000)
+        cache.put("a", 1, size=10)
+        cache.put("a", 2, size=20)
+        assert cache.size == 20
+        assert cache.pop("a") == 2
+        assert cache.size == 0
+
+
+    def test_message_size_estimated_without_serializing(self):
+        from gmail_mcp.cache import estimate_size
+
+        message = {**_message("m1"), "snippet": "hello", "payload": {
+            "headers": [{"name": "Subject", "value": "s" * 100}],
+            "parts": [{"partId": "0", "body": {"data": "x" * 5000}}, {"partId": "1", "body": {"attachmentId": "a" * 300, "size": 9_000_000}}],
+        }}
+        encoded = len(json.dumps(message, separators=(",", ":")))
+        with patch("gmail_mcp.cache.json.dumps", side_effect=AssertionError("serialized")):
+            estimate = estimate_size(message)
+        assert encoded <= estimate <= 2 * encoded
+
+    def test_forget_message_and_thread(self):
+        from gmail_mcp.cache import message_key
+
+        cache = ContentCache(max_bytes=10_000)
+        cache.put(message_key("a", "m1", "full"), _message("m1"))
+        cache.put(message_key("a", "m1", "metadata", ["From"]), _message("m1"))
+        cache.put(("html_text", "a", "m1", "1"), "text", 4)
+        cache.put(message_key("a", "m2", "full"), {**_message("m2"), "threadId": "t2"})
+        cache.put(("thread", "a", "t2", "full", ()), True, size=64)
+        cache.put(message_key("b", "m1", "full"), _message("m1"))
+        cache.forget("a", ["m1"])
+        assert [key[:3] for key, _ in cache.items()] == [("message", "a", "m2"), ("thread", "a", "t2"), ("message", "b", "m1")]
+        cache.forget("a", thread_id="t2")
+        assert [key[:3] for key, _ in cache.items()] == [("message", "b", "m1")]
+        assert cache.size == sum(cache._entries[key][1] for key in cache._entries)
+
+
+class TestLabelOverlay:
+    def test_expires_after_ttl(self):
+        overlay = LabelOverlay(ttl=60)
+        overlay.set("acct", "m1", ["INBOX"])
+        assert overlay.get("acct", "m1") == ["INBOX"]
+        with patch("gmail_mcp.cache.time.monotonic", return_value=10**9):
+            assert overlay.get("acct", "m1") is None
+
+    def test_apply_delta_to_known_messages(self):
+        overlay = LabelOverlay(ttl=60)
+        overlay.set("acct", "m1", ["INBOX", "UNREAD"])
+        overlay.apply("acct", ["m1", "m2"], ["STARRED"], ["UNREAD"])
+        assert overlay.get("acct", "m1") == ["INBOX", "STARRED"]
+        assert overlay.get("acct", "m2") is None
+
+    def test_drop(self):
+        overlay = LabelOverlay(ttl=60)
+        overlay.set("acct", "m1", ["INBOX"])
+        overlay.drop("acct", ["m1"])
+        assert overlay.get("acct", "m1") is None
+
+
+class TestLabelCounts:
+    def test_fresh_then_stale(self):
+        counts = LabelCounts(ttl=60)
+        assert counts.get("a") is None
+        counts.put("a", [{"id": "INBOX"}], 10)
+        assert counts.get("a") == ([{"id": "INBOX"}], 10, True)
+        counts.mark_stale("a")
+        assert counts.get("a") == ([{"id": "INBOX"}], 10, False)
+        counts.drop("a")
+        assert counts.get("a") is None
+
+
+class TestCachingClient:
+    def test_reread_after_triage_costs_no_request(self, mock_client):
+        from gmail_mcp.tools.messages import gmail_message_archive, gmail_message_get
+
+        mock_client.get_message.return_value = _message("m1")
+        mock_client.archive.return_value = {"id": "m1", "threadId": "t1", "labelIds": ["UNREAD"]}
+        gmail_message_get("m1", account="draneylucas")
+        gmail_message_archive("m1", account="draneylucas")
+        result = json.loads(gmail_message_get("m1", account="draneylucas"))
+        mock_client.get_message.assert_called_once_with("m1", format_="full")
+        assert result["labelIds"] == ["UNREAD"]
+        assert result["payload"]["body"]["data"] == "x" * 200
+
+    def test_stale_labels_refreshed_with_minimal_get(self, mock_client):
+        from gmail_mcp.tools.messages import gmail_message_get
+
+        mock_client.get_message.side_effect = lambda mid, format_: (
+            {"id": mid, "labelIds": ["STARRED"]} if format_ == "minimal" else _message(mid)
+        )
+        gmail_message_get("m1", account="draneylucas")
+        label_overlay.clear()
+        result = json.loads(gmail_message_get("m1", account="draneylucas"))
+        assert [c.kwargs["format_"] for c in mock_client.get_message.call_args_list] == ["full", "minimal"]
+        assert result["labelIds"] == ["STARRED"]
+
+    def test_formats_cached_separately(self, mock_client):
+        from gmail_mcp.tools.messages import gmail_message_get
+
+        mock_client.get_message.return_value = _message("m1")
+        gmail_message_get("m1", account="draneylucas", response_format="metadata")
+        gmail_message_get("m1", account="draneylucas", response_format="full")
+        assert mock_client.get_message.call_count == 2
+
+    def test_batch_modify_updates_overlay(self, mock_client):
+        from gmail_mcp.tools.messages import gmail_message_get, gmail_messages_batch_modify
+
+        mock_client.get_message.return_value = _message("m1")
+        gmail_message_get("m1", account="draneylucas")
+        gmail_messages_batch_modify("m1,m2", account="draneylucas", remove_label_ids="UNREAD")
+        result = json.loads(gmail_message_get("m1", account="draneylucas"))
+        assert mock_client.get_message.call_count == 1
+        assert result["labelIds"] == ["INBOX"]
+
+    def test_thread_reread_uses_skeleton(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        full = {"id": "t1", "historyId": "5", "messages": [_message("m1"), _message("m2")]}
+        skeleton = {"id": "t1", "historyId": "6", "messages": [
+            {"id": "m1", "labelIds": ["INBOX"]},
+            {"id": "m2", "labelIds": ["INBOX"]},
+            {"id": "m3", "labelIds": ["INBOX", "UNREAD"]},
+        ]}
+        mock_client.get_thread.side_effect = lambda tid, format_: skeleton if format_ == "minimal" else full
+        mock_client.get_message.return_value = _message("m3")
+        gmail_thread_get("t1", account="draneylucas")
+        result = json.loads(gmail_thread_get("t1", account="draneylucas"))
+        assert [c.kwargs["format_"] for c in mock_client.get_thread.call_args_list] == ["full", "minimal"]
+        mock_client.get_message.assert_called_once_with("m3", format_="full")
+        assert result["historyId"] == "6"
+        assert [m["id"] for m in result["messages"]] == ["m1", "m2", "m3"]
+        assert result["messages"][0]["labelIds"] == ["INBOX"]
+
+    def test_delete_drops_labels_and_content(self, mock_client):
+        from gmail_mcp.cache import content_cache
+        from gmail_mcp.tools.messages import gmail_message_delete, gmail_message_get
+
+        mock_client.get_message.return_value = _message("m1")
+        gmail_message_get("m1", account="draneylucas")
+        gmail_message_delete("m1", account="draneylucas")
+        assert label_overlay.get(mock_client.account, "m1") is None
+        assert len(content_cache) == 0
+
+    def test_thread_delete_drops_content(self, mock_client):
+        from gmail_mcp.cache import content_cache
+        from gmail_mcp.tools.threads import gmail_thread_delete, gmail_thread_get
+
+        mock_client.get_thread.return_value = {"id": "t1", "messages": [_message("m1"), _message("m2")]}
+        gmail_thread_get("t1", account="draneylucas")
+        assert len(content_cache) == 3
+        gmail_thread_delete("t1", account="draneylucas")
+        assert len(content_cache) == 0
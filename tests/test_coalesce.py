@@ -0,0 +1,101 @@
+"""Tests for single-flight coalescing of concurrent identical reads."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from gmail_mcp.coalesce import CoalescingClient, SingleFlight
+
+
+def _run_together(count, fn):
+    with ThreadPoolExecutor(count) as pool:
+        return [f.result() for f in [pool.submit(fn) for _ in range(count)]]
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            release.wait(2)
+            return {"id": "m1"}
+
+        def call():
+            return flight.do("k", slow)
+
+        threading.Timer(0.1, release.set).start()
+        results = _run_together(4, call)
+        assert len(calls) == 1
+        assert all(r is results[0] for r in results)
+        assert flight.shared == 3
+
+    def test_error_reaches_every_waiter(self):
+        flight = SingleFlight()
+
+        def failing():
+            time.sleep(0.1)
+            raise RuntimeError("boom")
+
+        def call():
+            try:
+                flight.do("k", failing)
+            except RuntimeError as exc:
+                return str(exc)
+
+        assert _run_together(3, call) == ["boom"] * 3
+
+    def test_sequential_calls_are_not_cached(self):
+        flight = SingleFlight()
+        fn = MagicMock(return_value=1)
+        flight.do("k", fn)
+        flight.do("k", fn)
+        assert fn.call_count == 2
+
+
+class TestCoalescingClient:
+    def test_key_includes_arguments(self):
+        client = MagicMock(account="a")
+        client.get_message.side_effect = lambda mid, format_="full": (time.sleep(0.1), mid)[1]
+        proxy = CoalescingClient(client, SingleFlight())
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda mid: proxy.get_message(mid, format_="full"), ["m1", "m1", "m2", "m2"]))
+        assert results == ["m1", "m1", "m2", "m2"]
+        assert client.get_message.call_count == 2
+
+    def test_writes_pass_through(self):
+        client = MagicMock(account="a")
+        proxy = CoalescingClient(client, SingleFlight())
+        assert proxy.modify_message is client.modify_message
+        assert proxy.wrapped is client
+
+
+class TestToolCalls:
+    def test_parallel_tool_calls_share_request(self, mock_client):
+        from gmail_mcp.server import mcp, register_all_tools
+
+        register_all_tools()
+
+        def slow_get(message_id, format_="full", metadata_headers=None):
+            time.sleep(0.2)
+            return {"id": message_id}
+
+        mock_client.get_message.side_effect = slow_get
+        args = {"message_id": "m1", "account": "draneylucas"}
+        started = time.perf_counter()
+        async def fan_out():
+            return await asyncio.gather(*(mcp.call_tool("gmail_message_get", args) for _ in range(4)))
+
+        results = asyncio.run(fan_out())
+        elapsed = time.perf_counter() - started
+        assert mock_client.get_message.call_count == 1
+        assert elapsed < 0.6
+        for content, _ in results:
+            assert json.loads(content[0].text) == {"id": "m1"}
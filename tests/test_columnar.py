@@ -0,0 +1,50 @@
+"""Tests for columnar metadata export — Parquet and Arrow IPC files from the fake Gmail server."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+
+class TestExportMetadata:
+    def _export(self, path, **kwargs):
+        from gmail_mcp.tools.archive import gmail_export_metadata
+
+        return json.loads(gmail_export_metadata(str(path), account="draneylucas", **kwargs))
+
+    def test_parquet_row_groups(self, fake_gmail, tmp_path, monkeypatch):
+        import pyarrow.parquet as pq
+
+        from gmail_mcp import columnar
+
+        monkeypatch.setattr(columnar, "ROW_GROUP_SIZE", 3)
+        path = tmp_path / "mail.parquet"
+        result = self._export(path)
+        count = len(fake_gmail.mailbox.messages)
+        assert result["rows"] == count and result["complete"] is True
+        parquet = pq.ParquetFile(path)
+        assert parquet.metadata.num_row_groups == result["row_groups"] == -(-count // 3)
+        table = parquet.read()
+        assert table.column_names == columnar.schema(pa).names
+        row = table.to_pylist()[0]
+        message = fake_gmail.mailbox.messages[row["id"]]
+        assert row["label_ids"] == message["labelIds"]
+        assert row["from"] == fake_gmail.mailbox.header(message, "From")
+        assert row["size_estimate"] == message["sizeEstimate"]
+        assert "method:messages.get" in fake_gmail.stats
+
+    def test_arrow_ipc_with_query(self, fake_gmail, tmp_path):
+        path = tmp_path / "eve.arrow"
+        result = self._export(path, file_format="arrow", query="from:eve.black")
+        table = pa.ipc.open_file(str(path)).read_all()
+        assert result["rows"] == table.num_rows == 3
+
+    def test_max_messages(self, fake_gmail, tmp_path):
+        result = self._export(tmp_path / "few.parquet", max_messages=2)
+        assert result["rows"] == 2 and result["complete"] is False
+
+    def test_unknown_format(self, fake_gmail, tmp_path):
+        assert self._export(tmp_path / "x.csv", file_format="csv")["error"] is True
@@ -0,0 +1,112 @@
+"""Tests for the address-book prefix index and gmail_contacts_suggest."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+DAY_MS = 86_400_000
+
+
+def _message(sender, to="me@x.com", cc="", labels=("INBOX",), when_ms=1_704_067_200_000):
+    headers = [{"name": "From", "value": sender}, {"name": "To", "value": to}]
+    if cc:
+        headers.append({"name": "Cc", "value": cc})
+    return {"id": "m", "labelIds": list(labels), "internalDate": str(when_ms), "payload": {"headers": headers}}
+
+
+class TestContactIndex:
+    def _index(self):
+        from gmail_mcp.contacts import ContactIndex
+
+        index = ContactIndex(history_id=1, me="Me@x.com", limit=100)
+        index.add_message(_message("Alice Smith <alice.smith@example.com>", cc="Al Jones <al@corp.example.org>"))
+        index.add_message(_message("alice.smith@example.com"))
+        index.add_message(_message("me@x.com", to="Bob Brown <bob@example.com>", labels=("SENT",)))
+        return index
+
+    def test_prefix_terms(self):
+        index = self._index()
+        assert [c.address for c in index.search("smi")] == ["alice.smith@example.com"]
+        assert [c.address for c in index.search("alice.smith@exa")] == ["alice.smith@example.com"]
+        assert {c.address for c in index.search("al")} == {"alice.smith@example.com", "al@corp.example.org"}
+        assert [c.address for c in index.search("al jo")] == ["al@corp.example.org"]
+        assert [c.address for c in index.search("corp")] == ["al@corp.example.org"]
+        assert index.search("zed") == []
+
+    def test_excludes_me_and_automated(self):
+        index = self._index()
+        index.add_message(_message("No Reply <no-reply@shop.example>"))
+        index.add_message(_message("MAILER-DAEMON@mx.example"))
+        assert "me@x.com" not in index.contacts
+        assert index.search("no") == [] and index.search("mailer") == []
+
+    def test_ranked_by_sent_weight_and_recency(self):
+        index = self._index()
+        now = 1_704_067_200_000
+        assert [c.address for c in index.search("")] == ["bob@example.com", "alice.smith@example.com", "al@corp.example.org"]
+        assert [c.address for c in index.search("", limit=1)] == ["bob@example.com"]
+        # one recent message outranks two that are a year older
+        index.add_message(_message("Al Jones <al@corp.example.org>", when_ms=now + 365 * DAY_MS))
+        assert index.search("al")[0].address == "al@corp.example.org"
+        assert [c.address for c in index.search("")][0] == "al@corp.example.org"
+
+    def test_newer_display_name_replaces_terms(self):
+        index = self._index()
+        index.add_message(_message("Alice Walker <alice.smith@example.com>", when_ms=1_704_067_200_000 + DAY_MS))
+        assert index.contacts["alice.smith@example.com"].name == "Alice Walker"
+        assert [c.address for c in index.search("walk")] == ["alice.smith@example.com"]
+        assert [c.address for c in index.search("smi")] == ["alice.smith@example.com"]  # still in the address
+        index.add_message(_message("Alice Older <alice.smith@example.com>", when_ms=0))
+        assert index.contacts["alice.smith@example.com"].name == "Alice Walker"
+        assert index.search("older") == []
+
+    def test_state_round_trip(self):
+        from gmail_mcp.contacts import ContactIndex
+
+        index = self._index()
+        restored = ContactIndex.from_state(json.loads(json.dumps(index.to_state())))
+        assert restored.contacts == index.contacts
+        assert restored._terms == index._terms
+        assert restored.search("al jo")[0].address == "al@corp.example.org"
+
+
+class TestContactsSuggest:
+    @pytest.fixture(autouse=True)
+    def _contacts_dir(self, tmp_path, monkeypatch):
+        from gmail_mcp import contacts
+
+        monkeypatch.setattr(contacts, "CONTACTS_DIR", tmp_path)
+
+    def _suggest(self, query="", **kwargs):
+        from gmail_mcp.tools.contacts import gmail_contacts_suggest
+
+        return json.loads(gmail_contacts_suggest(query, account="draneylucas", **kwargs))
+
+    def test_builds_index_from_metadata(self, fake_gmail, tmp_path):
+        result = self._suggest("bob.jones@example.com")
+        assert result["indexed_messages"] == len(fake_gmail.mailbox.messages)
+        assert [c["address"] for c in result["contacts"]] == ["bob.jones@example.com"]
+        assert result["contacts"][0]["recipient"] == "Bob Jones <bob.jones@example.com>"
+        assert fake_gmail.stats["batches"] == 1
+        assert (tmp_path / "draneylucas.json").is_file()
+
+    def test_answers_from_memory_then_reloads_from_disk(self, fake_gmail):
+        from gmail_mcp.contacts import contact_index
+
+        first = self._suggest("eve")
+        fake_gmail.stats.clear()
+        assert self._suggest("eve") == first
+        assert fake_gmail.stats.get("requests", 0) == 0
+        contact_index.clear()  # as after a restart
+        assert self._suggest("eve")["contacts"] == first["contacts"]
+        assert "method:messages.list" not in fake_gmail.stats
+        assert fake_gmail.stats["method:history.list"] == 1
+
+    def test_refresh_adds_new_mail(self, fake_gmail):
+        assert "contacts" not in self._suggest("zed")
+        raw = b"From: Zed Zulu <zed@new.example>\r\nTo: loadtest@example.com\r\nSubject: hi\r\n\r\nhello\r\n"
+        fake_gmail.mailbox.import_message(raw, ["INBOX"])
+        result = self._suggest("zed", refresh=True)
+        assert [c["recipient"] for c in result["contacts"]] == ["Zed Zulu <zed@new.example>"]
@@ -0,0 +1,58 @@
+"""Tests for filter criteria — query translation and local matching."""
+
+from __future__ import annotations
+
+import pytest
+
+from gmail_mcp.criteria import has_attachment, locally_decidable, matches, to_query
+
+
+def _message(sender="Eve <eve@example.com>", to="dan@example.com", subject="Quarterly invoice", size=1000, parts=None):
+    headers = [{"name": "From", "value": sender}, {"name": "To", "value": to}, {"name": "Subject", "value": subject}]
+    payload = {"mimeType": "multipart/alternative", "headers": headers, "parts": parts or []}
+    return {"id": "m1", "sizeEstimate": size, "payload": payload}
+
+
+class TestToQuery:
+    def test_fields(self):
+        query = to_query({"from": "a@x.com", "subject": "big news", "negatedQuery": "unsubscribe", "size": 100, "sizeComparison": "larger"})
+        assert query == "from:a@x.com subject:(big news) -unsubscribe larger:100"
+
+    def test_attachment_and_query(self):
+        assert to_query({"query": "in:inbox", "hasAttachment": True}) == "in:inbox has:attachment"
+
+    def test_quoted_phrase_kept(self):
+        assert to_query({"subject": '"big news"'}) == 'subject:"big news"'
+
+    @pytest.mark.parametrize("criteria", [[], {}, {"sender": "x"}, {"size": 10}, {"excludeChats": True}])
+    def test_invalid(self, criteria):
+        with pytest.raises(ValueError):
+            to_query(criteria)
+
+
+class TestMatches:
+    def test_from_any_term(self):
+        assert matches({"from": "bob@x.com OR eve@example.com"}, _message())
+        assert not matches({"from": "bob@x.com"}, _message())
+
+    def test_to_includes_cc(self):
+        message = _message()
+        message["payload"]["headers"].append({"name": "Cc", "value": "carol@example.com"})
+        assert matches({"to": "carol@"}, message)
+
+    def test_subject_all_words(self):
+        assert matches({"subject": "invoice quarterly"}, _message())
+        assert not matches({"subject": "invoice overdue"}, _message())
+
+    def test_size(self):
+        assert matches({"size": 500, "sizeComparison": "larger"}, _message())
+        assert not matches({"size": 500, "sizeComparison": "smaller"}, _message())
+
+    def test_attachment(self):
+        attachment = {"filename": "a.pdf", "body": {"attachmentId": "att1"}}
+        assert has_attachment(_message(parts=[{"parts": [attachment]}]))
+        assert not has_attachment(_message(parts=[{"filename": "", "body": {"size": 3}}]))
+
+    def test_free_form_query_is_remote_only(self):
+        assert locally_decidable({"from": "a@x.com"})
+        assert not locally_decidable({"from": "a@x.com", "query": "is:unread"})
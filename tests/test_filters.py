@@ -86,3 +86,87 @@ class TestFilterDelete:
         assert result["action"] == "deleted"
         assert result["filter_id"] == "f1"
         mock_client.delete_filter.assert_called_once_with("f1")
+
+
+class TestFilterDryRun:
+    def _dry_run(self, criteria, **kwargs):
+        from gmail_mcp.tools.filters import gmail_filter_dry_run
+
+        return json.loads(gmail_filter_dry_run(json.dumps(criteria), account="draneylucas", **kwargs))
+
+    def test_counts_and_samples_without_full_fetch(self, fake_gmail):
+        result = self._dry_run({"from": "eve.black"})
+        assert result["query"] == "from:eve.black"
+        assert result["count"] == 3 and result["exact"] is True
+        assert len(result["samples"]) == 3
+        assert all("eve.black" in sample["from"] for sample in result["samples"])
+        assert fake_gmail.stats["batches"] == 1  # sample headers in one batch
+        assert fake_gmail.stats["method:messages.list"] == 1
+
+    def test_cached_samples_cost_nothing(self, fake_gmail):
+        self._dry_run({"from": "bob.jones"})
+        fake_gmail.stats.clear()
+        result = self._dry_run({"from": "bob.jones"})
+        assert len(result["samples"]) == 2
+        assert "batches" not in fake_gmail.stats
+
+    def test_count_cap(self, fake_gmail):
+        result = self._dry_run({"to": "example"}, max_count=2, max_samples=0)
+        assert result["count"] == 2
+        assert result["exact"] is False
+        assert result["estimate"] == len(fake_gmail.mailbox.messages)
+        assert "samples" not in result
+
+    def test_cached_scope_makes_no_requests(self, fake_gmail):
+        from gmail_mcp.server import get_client
+
+        client = get_client("draneylucas")
+        for message_id in fake_gmail.mailbox.messages:
+            client.get_message(message_id)
+        fake_gmail.stats.clear()
+        result = self._dry_run({"from": "eve.black", "subject": "launch"}, scope="cached")
+        assert result["scanned"] == len(fake_gmail.mailbox.messages)
+        assert result["count"] == 2
+        assert not fake_gmail.stats
+
+    def test_cached_scope_rejects_free_form_query(self, fake_gmail):
+        result = self._dry_run({"query": "is:unread"}, scope="cached")
+        assert result["error"] is True
+        assert "scope='mailbox'" in result["message"]
+
+    def test_partial_header_entries_only_match_what_they_cover(self, fake_gmail):
+        from gmail_mcp.tools.messages import gmail_inbox_triage
+
+        gmail_inbox_triage(account="draneylucas", query=None, max_results=8)  # From, Subject and Date only
+        fake_gmail.stats.clear()
+        assert self._dry_run({"from": "eve.black"}, scope="cached")["scanned"] == len(fake_gmail.mailbox.messages)
+        assert self._dry_run({"to": "example"}, scope="cached")["scanned"] == 0
+        assert not fake_gmail.stats
+
+    def test_auto_scope_is_local_when_the_mailbox_is_cached(self, fake_gmail):
+        from gmail_mcp.server import get_client
+
+        client = get_client("draneylucas")
+        for message_id in fake_gmail.mailbox.messages:
+            client.get_message(message_id)
+        fake_gmail.stats.clear()
+        result = self._dry_run({"from": "eve.black"})
+        assert result["scope"] == "cached" and result["count"] == 3
+        assert "method:messages.list" not in fake_gmail.stats and "batches" not in fake_gmail.stats
+
+    def test_auto_scope_falls_back_to_search(self, fake_gmail):
+        from gmail_mcp.server import get_client
+
+        get_client("draneylucas").get_message(next(iter(fake_gmail.mailbox.messages)))
+        result = self._dry_run({"from": "eve.black"})
+        assert result["scope"] == "mailbox" and result["count"] == 3
+        assert fake_gmail.stats["method:messages.list"] == 1
+
+    def test_sample_reads_are_paid_from_the_units_bucket(self, fake_gmail, monkeypatch):
+        from gmail_mcp import quota
+
+        charged = []
+        units = quota.bucket("draneylucas", "units", 1e6, 250)
+        monkeypatch.setattr(units, "acquire", lambda tokens=1.0: charged.append(tokens) or 0.0)
+        self._dry_run({"from": "eve.black"}, scope="mailbox")
+        assert charged == [5 * 3]
@@ -98,3 +98,47 @@ class TestLabelDelete:
         assert result["action"] == "deleted"
         assert result["label_id"] == "Label_1"
         mock_client.delete_label.assert_called_once_with("Label_1")
+
+
+class TestLabelsWithCounts:
+    def _list(self):
+        from gmail_mcp.tools.labels import gmail_labels_list
+
+        result = json.loads(gmail_labels_list(account="draneylucas", with_counts=True))
+        return {label["id"]: label for label in result["labels"]}
+
+    def test_counts_in_one_call(self, fake_gmail):
+        labels = self._list()
+        assert labels["INBOX"]["messagesTotal"] == fake_gmail.mailbox.get_label("INBOX")["messagesTotal"]
+        assert labels["Label_3"]["name"] == "Projects"
+        assert fake_gmail.stats["batches"] == 2  # profile + list, then every label's details
+        assert fake_gmail.stats["method:labels.get"] == len(labels)
+
+    def test_fresh_counts_cost_nothing(self, fake_gmail):
+        self._list()
+        requests = fake_gmail.stats["requests"]
+        self._list()
+        assert fake_gmail.stats["requests"] == requests
+
+    def test_label_write_refreshes_only_changed_labels(self, fake_gmail):
+        from gmail_mcp.tools.messages import gmail_message_modify
+
+        before = self._list()
+        message_id = next(m for m, msg in fake_gmail.mailbox.messages.items() if "STARRED" not in msg["labelIds"])
+        gmail_message_modify(message_id, account="draneylucas", add_label_ids="STARRED")
+        fake_gmail.stats.clear()
+        after = self._list()
+        assert after["STARRED"].get("messagesTotal", 0) == before["STARRED"].get("messagesTotal", 0) + 1
+        assert fake_gmail.stats["method:history.list"] == 1
+        assert 0 < fake_gmail.stats["method:labels.get"] < len(after)
+
+    def test_expired_counts_checked_against_history(self, fake_gmail, monkeypatch):
+        from gmail_mcp.cache import label_counts
+
+        self._list()
+        monkeypatch.setattr(label_counts, "ttl", -1)
+        fake_gmail.stats.clear()
+        self._list()
+        assert dict(fake_gmail.stats) == {
+            "requests": 1, "method:history.list": 1, "quota_units": 2,
+        }
@@ -0,0 +1,85 @@
+"""Tests for the load-test harness — fake Gmail API routes, batch endpoint, driver helpers."""
+
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from benchmarks.fake_gmail import FakeGmailApp, FakeGmailServer, FakeMailbox
+from benchmarks.loadtest import Workload, parse_mix, percentile
+
+
+@pytest.fixture(scope="module")
+def fake():
+    server = FakeGmailServer(FakeGmailApp(FakeMailbox(threads=4, messages_per_thread=3)))
+    server.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def api(fake):
+    with httpx.Client(base_url=f"{fake.url}/gmail/v1/users/me") as client:
+        yield client
+
+
+class TestFakeGmail:
+    def test_list_paginates(self, api):
+        first = api.get("/messages", params={"maxResults": 5}).json()
+        assert len(first["messages"]) == 5
+        second = api.get("/messages", params={"maxResults": 5, "pageToken": first["nextPageToken"]}).json()
+        assert not {m["id"] for m in first["messages"]} & {m["id"] for m in second["messages"]}
+
+    def test_get_formats(self, api):
+        mid = api.get("/messages", params={"maxResults": 1}).json()["messages"][0]["id"]
+        assert "payload" not in api.get(f"/messages/{mid}", params={"format": "minimal"}).json()
+        meta = api.get(f"/messages/{mid}", params={"format": "metadata", "metadataHeaders": "Subject"}).json()
+        assert [h["name"] for h in meta["payload"]["headers"]] == ["Subject"]
+        assert "raw" in api.get(f"/messages/{mid}", params={"format": "raw"}).json()
+
+    def test_modify_records_history(self, api):
+        start = api.get("/profile").json()["historyId"]
+        mid = api.get("/messages", params={"maxResults": 1}).json()["messages"][0]["id"]
+        api.post(f"/messages/{mid}/modify", json={"addLabelIds": ["Label_3"]})
+        history = api.get("/history", params={"startHistoryId": start}).json()["history"]
+        assert history[-1]["labelsAdded"][0]["labelIds"] == ["Label_3"]
+
+    def test_unknown_message_404(self, api):
+        assert api.get("/messages/nope").status_code == 404
+
+    def test_batch_endpoint(self, fake):
+        body = (
+            "--b\r\nContent-Type: application/http\r\nContent-ID: <a>\r\n\r\n"
+            "GET /gmail/v1/users/me/labels/INBOX HTTP/1.1\r\n\r\n"
+            "--b\r\nContent-Type: application/http\r\nContent-ID: <b>\r\n\r\n"
+            "GET /gmail/v1/users/me/messages/nope HTTP/1.1\r\n\r\n--b--\r\n"
+        )
+        resp = httpx.post(f"{fake.url}/batch/gmail/v1", content=body, headers={"Content-Type": "multipart/mixed; boundary=b"})
+        assert resp.headers["content-type"].startswith("multipart/mixed")
+        assert "Content-ID: <response-a>" in resp.text
+        assert "HTTP/1.1 200" in resp.text and "HTTP/1.1 404" in resp.text
+
+    def test_throttling(self):
+        app = FakeGmailApp(FakeMailbox(threads=1, messages_per_thread=1), error_rate=1.0)
+        status, payload = app.handle("GET", "/gmail/v1/users/me/profile", b"")
+        assert status == 429
+        assert app.stats["throttled"] == 1
+
+
+class TestDriverHelpers:
+    def test_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 95) == 0.0
+
+    def test_parse_mix(self):
+        assert parse_mix("gmail_thread_get=3,gmail_labels_list=1") == {"gmail_thread_get": 3.0, "gmail_labels_list": 1.0}
+        assert "gmail_thread_get" in parse_mix(None)
+
+    def test_workload_arguments(self):
+        workload = Workload({"gmail_message_get:metadata": 1}, "loadtest", ["m1", "m2"], ["t1"], "100")
+        label, tool, args = workload.next_call()
+        assert (label, tool) == ("gmail_message_get:metadata", "gmail_message_get")
+        assert args["response_format"] == "metadata"
+        assert args["message_id"] in ("m1", "m2")
@@ -0,0 +1,208 @@
+"""Tests for mbox export — mboxrd writing and checkpointed, resumable exports."""
+
+from __future__ import annotations
+
+import io
+import json
+import mailbox
+
+from gmail_mcp.mbox import label_name, write_message
+
+
+class TestWriteMessage:
+    def test_from_lines_quoted(self, tmp_path):
+        raw = b"Subject: hi\r\n\r\nFrom here on\r\n>From quoted\r\nbody\r\n"
+        out = io.BytesIO()
+        write_message(out, raw, 1_704_067_200_000, {"X-Gmail-Labels": "Inbox"})
+        text = out.getvalue()
+        assert text.startswith(b"From MAILER-DAEMON Mon Jan  1 00:00:00 2024\nX-Gmail-Labels: Inbox\nSubject: hi\n")
+        assert b"\n>From here on\n>>From quoted\n" in text
+        assert b"\r\n" not in text
+
+    def test_readable_by_mailbox(self, tmp_path):
+        path = tmp_path / "out.mbox"
+        with open(path, "wb") as out:
+            write_message(out, b"Subject: one\r\n\r\nfirst", 0)
+            write_message(out, b"Subject: two\r\n\r\nFrom me\r\n", 0)
+        subjects = [message["Subject"] for message in mailbox.mbox(path)]
+        assert subjects == ["one", "two"]
+
+    def test_label_names(self):
+        assert label_name("CATEGORY_UPDATES", {}) == "Category Updates"
+        assert label_name("INBOX", {}) == "Inbox"
+        assert label_name("Label_3", {"Label_3": "Projects"}) == "Projects"
+
+
+class TestExportMbox:
+    def _export(self, path, **kwargs):
+        from gmail_mcp.tools.archive import gmail_export_mbox
+
+        return json.loads(gmail_export_mbox(str(path), account="draneylucas", **kwargs))
+
+    def test_export_all(self, fake_gmail, tmp_path):
+        path = tmp_path / "all.mbox"
+        result = self._export(path)
+        assert result["complete"] is True
+        assert result["exported"] == len(fake_gmail.mailbox.messages)
+        assert not (tmp_path / "all.mbox.checkpoint").exists()
+        messages = list(mailbox.mbox(path))
+        assert len(messages) == len(fake_gmail.mailbox.messages)
+        assert all(message["X-Gmail-Labels"] for message in messages)
+        assert "method:messages.get" in fake_gmail.stats and fake_gmail.stats["batches"] == 1
+
+    def test_resume_after_interruption(self, fake_gmail, tmp_path):
+        path = tmp_path / "part.mbox"
+        first = self._export(path, max_messages=3)
+        assert first["complete"] is False and first["exported"] == 3
+        with open(path, "ab") as out:
+            out.write(b"From MAILER-DAEMON partial write")  # interrupted mid-page
+        second = self._export(path)
+        assert second["complete"] is True
+        assert second["this_call"] == len(fake_gmail.mailbox.messages) - 3
+        ids = [message["Message-ID"] for message in mailbox.mbox(path)]
+        assert len(ids) == len(set(ids)) == len(fake_gmail.mailbox.messages)
+
+    def test_failure_before_first_page_resumes(self, fake_gmail, tmp_path, monkeypatch):
+        from gmail_sdk import GmailAPIError, GmailClient
+
+        path = tmp_path / "early.mbox"
+        list_messages = GmailClient.list_messages
+
+        def unavailable(self, **kwargs):
+            raise GmailAPIError(503, "backend error")
+
+        monkeypatch.setattr(GmailClient, "list_messages", unavailable)
+        assert self._export(path)["error"] is True
+        assert (tmp_path / "early.mbox.checkpoint").exists()
+        monkeypatch.setattr(GmailClient, "list_messages", list_messages)
+        result = self._export(path)
+        assert result["complete"] is True and result["exported"] == len(fake_gmail.mailbox.messages)
+
+    def test_query_and_existing_file(self, fake_gmail, tmp_path):
+        path = tmp_path / "eve.mbox"
+        assert self._export(path, query="from:eve.black")["exported"] == 3
+        assert "already exists" in self._export(path)["message"]
+        assert self._export(path, overwrite=True)["exported"] == len(fake_gmail.mailbox.messages)
+
+
+def _mbox(path, messages):
+    with open(path, "wb") as out:
+        for index, (message_id, labels, body) in enumerate(messages):
+            raw = (
+                f"From: Old Archive <old@example.org>\r\nTo: me@example.com\r\nSubject: archived {index}\r\n"
+                f"Date: Tue, 2 Jan 2018 10:00:0{index % 10} +0000\r\nMessage-ID: <{message_id}>\r\n\r\n{body}\r\n"
+            ).encode("utf-8")
+            write_message(out, raw, 0, {"X-Gmail-Labels": labels} if labels else None)
+
+
+class TestIterMbox:
+    def test_round_trip(self, tmp_path):
+        from gmail_mcp.mbox import iter_mbox, split_takeout
+
+        path = tmp_path / "in.mbox"
+        _mbox(path, [("a@x", "Inbox,Starred", "From the top"), ("b@x", None, "plain")])
+        messages = list(iter_mbox(path))
+        assert [end for _, end, _ in messages][-1] == path.stat().st_size
+        raw, labels, message_id = split_takeout(messages[0][2])
+        assert labels == ["Inbox", "Starred"] and message_id == "<a@x>"
+        assert b"X-Gmail-Labels" not in raw
+        assert raw.endswith(b"\r\n\r\nFrom the top\r\n")
+        resumed = list(iter_mbox(path, messages[1][0]))
+        assert len(resumed) == 1 and resumed[0][2] == messages[1][2]
+
+
+class TestImportMbox:
+    def _import(self, path, **kwargs):
+        from gmail_mcp.tools.archive import gmail_import_mbox
+
+        return json.loads(gmail_import_mbox(str(path), account="draneylucas", **kwargs))
+
+    def _imported(self, fake_gmail):
+        return [m for m in fake_gmail.mailbox.messages.values() if fake_gmail.mailbox.header(m, "Subject").startswith("archived")]
+
+    def test_import_with_labels(self, fake_gmail, tmp_path):
+        path = tmp_path / "takeout.mbox"
+        _mbox(path, [("a@x", "Inbox,Unread,Opened", "one"), ("b@x", "Receipts,Category Updates", "two"), ("c@x", "Trips", "three")])
+        result = self._import(path, labels="Imported")
+        assert result["imported"] == 3 and result["complete"] is True
+        assert sorted(result["labels_created"]) == ["Imported", "Trips"]
+        labels = {fake_gmail.mailbox.header(m, "Message-ID"): m["labelIds"] for m in self._imported(fake_gmail)}
+        names = {v: k for k, v in fake_gmail.mailbox.user_labels.items()}
+        assert labels["<a@x>"] == ["INBOX", "UNREAD", names["Imported"]]
+        assert labels["<b@x>"] == ["Label_12", "CATEGORY_UPDATES", names["Imported"]]
+        assert fake_gmail.stats["method:messages.import"] == 3
+        assert not (tmp_path / "takeout.mbox.import-checkpoint").exists()
+
+    def test_dedupe_within_file_and_mailbox(self, fake_gmail, tmp_path):
+        path = tmp_path / "dupes.mbox"
+        _mbox(path, [("a@x", None, "one"), ("a@x", None, "again"), ("b@x", None, "two")])
+        assert self._import(path)["duplicates"] == 1
+        again = self._import(path)
+        assert again["imported"] == 0 and again["duplicates"] == 3
+        assert len(self._imported(fake_gmail)) == 2
+
+    def test_resume_from_checkpoint(self, fake_gmail, tmp_path):
+        path = tmp_path / "big.mbox"
+        _mbox(path, [(f"m{i}@x", "Inbox", f"body {i}") for i in range(5)])
+        first = self._import(path, max_messages=2)
+        assert first["complete"] is False and first["imported"] == 2
+        second = self._import(path, dedupe=False)
+        assert second["this_call"] == 3 and second["imported"] == 5 and second["complete"] is True
+        assert len(self._imported(fake_gmail)) == 5
+
+    def test_export_then_import(self, fake_gmail, tmp_path):
+        from gmail_mcp.tools.archive import gmail_export_mbox
+
+        path = tmp_path / "eve.mbox"
+        gmail_export_mbox(str(path), account="draneylucas", query="from:eve.black")
+        result = self._import(path)
+        assert result["duplicates"] == 3 and result["imported"] == 0
+
+    def test_missing_file(self, fake_gmail, tmp_path):
+        assert "not found" in self._import(tmp_path / "nope.mbox")["message"]
+
+    def test_transient_errors_are_retried(self, fake_gmail, tmp_path, monkeypatch):
+        import httpx
+        from gmail_sdk import GmailAPIError
+
+        from gmail_mcp import mbox
+
+        path = tmp_path / "flaky.mbox"
+        _mbox(path, [("a@x", None, "one"), ("b@x", None, "two")])
+        faults = [GmailAPIError(503, "backend error"), httpx.ConnectError("reset")]
+        upload = mbox.upload_content
+
+        def flaky(*args, **kwargs):
+            if faults:
+                raise faults.pop()
+            return upload(*args, **kwargs)
+
+        monkeypatch.setattr(mbox, "upload_content", flaky)
+        monkeypatch.setattr(mbox.time, "sleep", lambda seconds: None)
+        result = self._import(path)
+        assert result["imported"] == 2 and result["complete"] is True
+        assert result["failed"] == 0
+
+    def test_failed_messages_are_retried_on_resume(self, fake_gmail, tmp_path, monkeypatch):
+        from gmail_sdk import GmailAPIError
+
+        from gmail_mcp import mbox
+
+        path = tmp_path / "partial.mbox"
+        _mbox(path, [(f"m{i}@x", None, f"body {i}") for i in range(4)])
+        upload = mbox.upload_content
+
+        def reject_second(http, url, raw, *args):
+            if b"<m1@x>" in raw:
+                raise GmailAPIError(400, "Invalid message")
+            return upload(http, url, raw, *args)
+
+        monkeypatch.setattr(mbox, "upload_content", reject_second)
+        first = self._import(path)
+        assert first["imported"] == 3 and first["failed"] == 1 and first["complete"] is False
+        assert first["errors"][0]["message_id"] == "<m1@x>"
+        monkeypatch.setattr(mbox, "upload_content", upload)
+        second = self._import(path)
+        assert second["this_call"] == 1 and second["imported"] == 4 and second["complete"] is True
+        assert second["failed"] == 0
+        assert not (tmp_path / "partial.mbox.import-checkpoint").exists()
@@ -0,0 +1,79 @@
+"""Tests for mail merge rendering and quota-limited sending."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+from gmail_sdk import GmailAPIError
+
+from gmail_mcp import merge
+
+
+class TestRender:
+    def test_substitutes(self):
+        assert merge.render("Hi $name, you owe $$${amount}", {"name": "Ann", "amount": 12}) == "Hi Ann, you owe $12"
+
+    def test_missing_variable(self):
+        with pytest.raises(ValueError, match=r"missing variable \$name"):
+            merge.render("Hi $name", {})
+
+
+class TestPrepare:
+    def test_rows(self):
+        rows = merge.prepare("Hi $name", "Body for $name", [{"to": "a@x.com", "name": "Ann", "cc": "c@x.com"}])
+        assert rows == [{"index": 0, "to": "a@x.com", "cc": "c@x.com", "bcc": None, "subject": "Hi Ann", "body": "Body for Ann"}]
+
+    def test_errors_are_per_row(self):
+        rows = merge.prepare("Hi $name", "b", [{"to": "a@x.com", "name": "Ann"}, {"to": "b@x.com"}, {"name": "Bob"}])
+        assert "error" not in rows[0]
+        assert rows[1]["error"] == "missing variable $name"
+        assert "'to'" in rows[2]["error"]
+
+    def test_limits(self, monkeypatch):
+        with pytest.raises(ValueError, match="non-empty"):
+            merge.prepare("s", "b", [])
+        monkeypatch.setattr(merge, "MAX_RECIPIENTS", 2)
+        with pytest.raises(ValueError, match="At most 2"):
+            merge.prepare("s", "b", [{"to": "a@x.com"}] * 3)
+
+
+class TestSendAll:
+    def _messages(self, count):
+        return merge.prepare("s $n", "b", [{"to": f"u{i}@x.com", "n": i} for i in range(count)])
+
+    def test_sends_concurrently_in_order(self, mock_client, monkeypatch):
+        monkeypatch.setattr(merge, "SENDS_PER_MINUTE", 6000)
+        barrier = threading.Barrier(3, timeout=5)
+
+        def send(**kwargs):
+            barrier.wait()
+            return {"id": "id-" + kwargs["to"], "threadId": "t"}
+
+        mock_client.send_message.side_effect = send
+        rows = merge.send_all(mock_client, "acct", self._messages(3), max_parallel=3)
+        assert [row["id"] for row in rows] == ["id-u0@x.com", "id-u1@x.com", "id-u2@x.com"]
+        assert all(row["status"] == "sent" for row in rows)
+
+    def test_retries_rate_limit_then_reports_errors(self, mock_client, monkeypatch):
+        monkeypatch.setattr(merge, "SENDS_PER_MINUTE", 6000)
+        monkeypatch.setattr(merge.time, "sleep", lambda seconds: None)
+        mock_client.send_message.side_effect = [
+            GmailAPIError(429, "Rate Limit Exceeded"),
+            {"id": "m1", "threadId": "t1"},
+            GmailAPIError(400, "Invalid To header"),
+        ]
+        rows = merge.send_all(mock_client, "acct", self._messages(2), max_parallel=1)
+        assert rows[0]["status"] == "sent"
+        assert rows[1] == {"index": 1, "to": "u1@x.com", "status": "error", "error": "400: Invalid To header"}
+        assert mock_client.send_message.call_count == 3
+
+    def test_uses_account_send_buckets(self, mock_client, monkeypatch):
+        from gmail_mcp import quota
+
+        monkeypatch.setattr(merge, "SENDS_PER_MINUTE", 60)
+        mock_client.send_message.return_value = {"id": "m", "threadId": "t"}
+        merge.send_all(mock_client, "acct", self._messages(2))
+        sends = quota._buckets[("acct", "sends")]
+        assert (sends.rate, sends.capacity) == (1.0, 6)  # bursts of 6, then one per second
+        assert quota._buckets[("acct", "units")].rate == quota.USER_UNITS_PER_SECOND
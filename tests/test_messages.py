@@ -79,6 +79,33 @@ class TestMessageGet:
         assert result["id"] == "msg1"
         mock_client.get_message.assert_called_once_with("msg1", format_="full")
 
+    def test_get_text(self, mock_client):
+        import base64
+
+        from gmail_mcp.tools.messages import gmail_message_get
+
+        html = base64.urlsafe_b64encode(b'<p>Hello <a href="https://x.example.com/?utm_source=n">there</a></p>').decode()
+        mock_client.get_message.return_value = {
+            "id": "msg1",
+            "threadId": "t1",
+            "labelIds": ["INBOX"],
+            "payload": {
+                "mimeType": "multipart/mixed",
+                "headers": [{"name": "From", "value": "a@x.com"}, {"name": "Subject", "value": "Hi"}],
+                "parts": [
+                    {"partId": "0", "mimeType": "text/html", "body": {"data": html}},
+                    {"partId": "1", "mimeType": "application/pdf", "filename": "a.pdf", "body": {"attachmentId": "att1", "size": 9}},
+                ],
+            },
+        }
+        result = json.loads(gmail_message_get("msg1", account="draneylucas", response_format="text"))
+        assert result["from"] == "a@x.com"
+        assert result["subject"] == "Hi"
+        assert result["text"] == "Hello there [1]\n\nLinks:\n[1] https://x.example.com/"
+        assert result["attachments"] == [{"filename": "a.pdf", "mimeType": "application/pdf", "size": 9, "attachmentId": "att1"}]
+        assert "payload" not in result
+        mock_client.get_message.assert_called_once_with("msg1", format_="full")
+
 
 class TestMessageSend:
     def test_send_basic(self, mock_client):
@@ -242,3 +269,39 @@ class TestMessageDelete:
         assert result["success"] is True
         assert result["action"] == "permanently_deleted"
         mock_client.delete_message.assert_called_once_with("msg1")
+
+
+class TestMessagesSendBatch:
+    RECIPIENTS = '[{"to": "a@x.com", "name": "Ann"}, {"to": "b@x.com", "name": "Bob"}]'
+
+    def test_dry_run_renders_without_sending(self, mock_client):
+        from gmail_mcp.tools.messages import gmail_messages_send_batch
+
+        result = json.loads(gmail_messages_send_batch(
+            subject_template="Hi $name", body_template="Dear $name", recipients=self.RECIPIENTS,
+            account="draneylucas", dry_run=True,
+        ))
+        assert result["dry_run"] is True
+        assert [r["subject"] for r in result["results"]] == ["Hi Ann", "Hi Bob"]
+        mock_client.send_message.assert_not_called()
+
+    def test_sends_each_recipient(self, mock_client):
+        from gmail_mcp.tools.messages import gmail_messages_send_batch
+
+        mock_client.send_message.return_value = {"id": "m1", "threadId": "t1"}
+        result = json.loads(gmail_messages_send_batch(
+            subject_template="Hi $name", body_template="Dear $name", recipients=self.RECIPIENTS, account="draneylucas",
+        ))
+        assert (result["sent"], result["failed"]) == (2, 0)
+        assert [r["to"] for r in result["results"]] == ["a@x.com", "b@x.com"]
+        mock_client.send_message.assert_any_call(to="b@x.com", subject="Hi Bob", body="Dear Bob", cc=None, bcc=None)
+
+    def test_missing_variable_sends_nothing(self, mock_client):
+        from gmail_mcp.tools.messages import gmail_messages_send_batch
+
+        result = json.loads(gmail_messages_send_batch(
+            subject_template="Hi $name", body_template="$greeting", recipients=self.RECIPIENTS, account="draneylucas",
+        ))
+        assert result["failed"] == 2
+        assert result["results"][0]["error"] == "missing variable $greeting"
+        mock_client.send_message.assert_not_called()
@@ -0,0 +1,62 @@
+"""Tests for quota accounting — request to API method and unit mapping, token buckets."""
+
+from __future__ import annotations
+
+import time
+
+from gmail_mcp.quota import TokenBucket, api_method, bucket, quota_units
+
+
+class TestApiMethod:
+    def test_collection_vs_item(self):
+        assert api_method("GET", "/gmail/v1/users/me/messages") == "messages.list"
+        assert api_method("GET", "/gmail/v1/users/me/messages/abc") == "messages.get"
+
+    def test_sub_resources(self):
+        assert api_method("POST", "/gmail/v1/users/me/messages/abc/modify") == "messages.modify"
+        assert api_method("GET", "/gmail/v1/users/me/messages/abc/attachments/x") == "messages.attachments.get"
+        assert api_method("POST", "/gmail/v1/users/me/drafts/send") == "drafts.send"
+
+    def test_upload_path(self):
+        assert api_method("POST", "/upload/gmail/v1/users/me/messages/send") == "messages.send"
+
+    def test_unknown(self):
+        assert api_method("GET", "/somewhere/else") is None
+
+
+class TestQuotaUnits:
+    def test_known_costs(self):
+        assert quota_units("GET", "/gmail/v1/users/me/threads/t1") == 10
+        assert quota_units("POST", "/gmail/v1/users/me/messages/send") == 100
+        assert quota_units("GET", "/gmail/v1/users/me/labels/INBOX") == 1
+
+    def test_unknown_is_zero(self):
+        assert quota_units("GET", "/nope") == 0
+
+
+class TestTokenBucket:
+    def test_burst_then_waits(self):
+        tokens = TokenBucket(rate=100, capacity=2)
+        assert tokens.acquire() == 0
+        assert tokens.acquire() == 0
+        start = time.monotonic()
+        assert tokens.acquire() > 0
+        assert time.monotonic() - start >= 0.009
+
+    def test_oversized_request_is_charged_in_full(self):
+        tokens = TokenBucket(rate=1000, capacity=5)
+        assert tokens.acquire(50) == 0  # a full bucket lets it through at once...
+        start = time.monotonic()
+        tokens.acquire(5)  # ...and the next caller waits out the 45-token debt plus its own 5
+        assert time.monotonic() - start >= 0.045
+
+    def test_oversized_requests_hold_the_rate(self):
+        tokens = TokenBucket(rate=1000, capacity=50)
+        start = time.monotonic()
+        for _ in range(5):
+            tokens.acquire(100)
+        assert time.monotonic() - start >= 0.39  # each later call waits out the 100 tokens charged before it
+
+    def test_shared_per_account(self):
+        assert bucket("a", "sends", 1, 1) is bucket("a", "sends", 1, 1)
+        assert bucket("a", "sends", 1, 1) is not bucket("b", "sends", 1, 1)
@@ -0,0 +1,125 @@
+"""Tests for raw messages — streamed base64url decoding to files and lazy header parsing."""
+
+from __future__ import annotations
+
+import base64
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from gmail_mcp.raw import decode_stream
+
+
+def _pieces(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestDecodeStream:
+    @pytest.mark.parametrize("size", [1, 3, 7, 4096])
+    def test_any_chunking(self, size):
+        message = b"Subject: hi\r\n\r\n" + bytes(range(256)) * 40
+        body = json.dumps({
+            "id": "m1", "labelIds": ["INBOX"], "raw": base64.urlsafe_b64encode(message).decode().rstrip("="),
+            "sizeEstimate": len(message),
+        }, indent=2).encode()
+        out = io.BytesIO()
+        meta = decode_stream(_pieces(body, size), out)
+        assert out.getvalue() == message
+        assert meta == {"id": "m1", "labelIds": ["INBOX"], "raw": "", "sizeEstimate": len(message)}
+
+    def test_missing_raw(self):
+        from gmail_sdk import GmailAPIError
+
+        with pytest.raises(GmailAPIError):
+            decode_stream([b'{"id": "m1"}'], io.BytesIO())
+
+
+class TestRawMessageGet:
+    @pytest.fixture(autouse=True)
+    def raw_dir(self, tmp_path, monkeypatch):
+        from gmail_mcp import raw
+
+        monkeypatch.setattr(raw, "RAW_DIR", tmp_path)
+        return tmp_path
+
+    def _get(self, message_id):
+        from gmail_mcp.tools.messages import gmail_message_get
+
+        return json.loads(gmail_message_get(message_id, account="draneylucas", response_format="raw"))
+
+    def test_streams_to_file(self, fake_gmail, raw_dir):
+        message_id, message = next(iter(fake_gmail.mailbox.messages.items()))
+        result = self._get(message_id)
+        assert result["path"] == str(raw_dir / "draneylucas" / f"{message_id}.eml")
+        with open(result["path"], "rb") as source:
+            assert source.read() == fake_gmail.mailbox.rfc822(message)
+        headers = {h["name"]: h.get("value", "") for h in result["headers"]}
+        assert headers["Subject"] == fake_gmail.mailbox.header(message, "Subject")
+        assert result["labelIds"] == message["labelIds"]
+        assert "raw" not in result
+
+    def test_reuses_file(self, fake_gmail):
+        message_id = next(iter(fake_gmail.mailbox.messages))
+        first = self._get(message_id)
+        fake_gmail.stats.clear()
+        assert self._get(message_id)["path"] == first["path"]
+        assert "requests" not in fake_gmail.stats  # labels still fresh in the overlay
+
+    def test_large_message(self, fake_gmail):
+        from gmail_mcp.raw import RawMessage
+
+        raw = b"Subject: big\r\nMessage-ID: <big@x>\r\n\r\n" + b"x" * 76 + b"\r\n"
+        raw += b"y" * 3_000_000
+        message_id = fake_gmail.mailbox.import_message(raw, ["INBOX"])["id"]
+        result = self._get(message_id)
+        assert result["bytes"] >= 3_000_000
+        message = RawMessage(Path(result["path"]), {})
+        assert message.header_block().endswith(b"\n\n")
+        assert {"name": "Subject", "value": "big"} in message.headers
+        with message.mmap() as mapped:
+            assert len(mapped) == result["bytes"]
+            assert mapped.find(b"yyyy") > len(message.header_block())
+
+    def test_not_found(self, fake_gmail):
+        assert self._get("nope")["error"] is True
+
+    def test_rejects_unsafe_message_ids(self, fake_gmail):
+        result = self._get("../../etc/passwd")
+        assert result["error"] is True and "Invalid message ID" in result["message"]
+        assert "requests" not in fake_gmail.stats
+
+    def test_tightens_shared_directory(self, fake_gmail, raw_dir):
+        (raw_dir / "draneylucas").mkdir(mode=0o777)
+        (raw_dir / "draneylucas").chmod(0o777)
+        self._get(next(iter(fake_gmail.mailbox.messages)))
+        assert (raw_dir / "draneylucas").stat().st_mode & 0o777 == 0o700
+
+    def test_refuses_symlinked_directory(self, fake_gmail, raw_dir, tmp_path_factory):
+        (raw_dir / "draneylucas").symlink_to(tmp_path_factory.mktemp("elsewhere"))
+        result = self._get(next(iter(fake_gmail.mailbox.messages)))
+        assert result["error"] is True and "not a directory owned" in result["message"]
+
+    def test_evicts_least_recently_used(self, fake_gmail, raw_dir, monkeypatch):
+        import os
+
+        from gmail_mcp import raw
+
+        first, second, third = list(fake_gmail.mailbox.messages)[:3]
+        paths = {m: Path(self._get(m)["path"]) for m in (first, second)}
+        os.utime(paths[first], (1, 1))
+        monkeypatch.setattr(raw, "RAW_MAX_BYTES", paths[second].stat().st_size + 1)
+        third_path = Path(self._get(third)["path"])
+        assert not paths[first].exists() and not paths[first].with_suffix(".json").exists()
+        assert not paths[second].exists()  # with the new file it would exceed the bound
+        assert third_path.exists()
+
+    def test_evicts_files_past_max_age(self, fake_gmail, raw_dir):
+        import os
+
+        first, second = list(fake_gmail.mailbox.messages)[:2]
+        old = Path(self._get(first)["path"])
+        os.utime(old, (1, 1))
+        self._get(second)
+        assert not old.exists()
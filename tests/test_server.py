@@ -1,13 +1,17 @@
-"""Tests for server helpers — _parse_json and _error_response."""
+"""Tests for server helpers — _parse_json, _error_response, session limits and main()."""
 
 from __future__ import annotations
 
+import asyncio
 import json
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
 
 import pytest
 from gmail_sdk import GmailAPIError
 
-from gmail_mcp.server import _parse_json, _error_response
+from gmail_mcp.server import _parse_json, _error_response, main, mcp
 
 
 class TestParseJson:
@@ -64,3 +68,78 @@ class TestErrorResponse:
         result = json.loads(_error_response(exc))
         assert result["error"] is True
         assert result["message"] == "Bad input"
+
+
+class _Session:
+    """Stand-in for a ServerSession (weak-referenceable, hashed by identity)."""
+
+
+class TestSessionConcurrency:
+    def _fan_out(self, mock_client, sessions, limit):
+        from mcp.server.lowlevel.server import request_ctx
+
+        mock_client.get_label.side_effect = lambda label_id: (time.sleep(0.15), {"id": label_id})[1]
+
+        async def call(session, label_id):
+            request_ctx.set(SimpleNamespace(session=session))
+            return await mcp.call_tool("gmail_label_get", {"label_id": label_id, "account": "draneylucas"})
+
+        async def run():
+            return await asyncio.gather(*(call(session, f"L{i}") for i, session in enumerate(sessions)))
+
+        with patch.object(mcp, "session_concurrency", limit):
+            started = time.perf_counter()
+            asyncio.run(run())
+            return time.perf_counter() - started
+
+    def test_calls_in_one_session_are_limited(self, mock_client):
+        session = _Session()
+        assert self._fan_out(mock_client, [session] * 3, limit=1) >= 0.45
+
+    def test_sessions_limited_independently(self, mock_client):
+        sessions = [_Session() for _ in range(3)]
+        assert self._fan_out(mock_client, sessions, limit=1) < 0.4
+
+
+class TestGetClient:
+    def test_slow_client_build_blocks_only_its_account(self, mock_client):
+        import threading
+        from unittest.mock import MagicMock
+
+        from gmail_mcp.server import get_client
+
+        building = threading.Event()
+        release = threading.Event()
+
+        def build(account, secrets_dir):
+            if account == "lucastoddraney":
+                building.set()
+                release.wait(5)  # a slow token refresh
+            return MagicMock()
+
+        with patch("gmail_mcp.server.GmailClient", side_effect=build):
+            slow = threading.Thread(target=get_client, args=("lucastoddraney",))
+            slow.start()
+            assert building.wait(5)
+            started = time.perf_counter()
+            first = get_client("draneylucas")
+            assert time.perf_counter() - started < 1
+            release.set()
+            slow.join(5)
+            assert get_client("draneylucas") is first
+            assert get_client("lucastoddraney") is not first
+
+
+class TestMain:
+    def test_default_stdio(self):
+        with patch.object(mcp, "run") as run, patch.object(mcp, "session_concurrency", 8):
+            main([])
+        run.assert_called_once_with()
+
+    def test_http_transport(self):
+        with patch.object(mcp, "run") as run, patch.object(mcp, "settings") as settings, patch.object(mcp, "session_concurrency", 8):
+            main(["--transport", "http", "--port", "9001", "--session-concurrency", "4"])
+            assert mcp.session_concurrency == 4
+        run.assert_called_once_with(transport="streamable-http")
+        assert settings.port == 9001
+        assert settings.host == "127.0.0.1"
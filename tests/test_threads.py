@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import base64
 import json
 
 from gmail_sdk import GmailAPIError
@@ -60,6 +61,127 @@ class TestThreadGet:
         mock_client.get_thread.assert_called_once_with("t1", format_="metadata")
 
 
+def _skeleton(count):
+    return {
+        "id": "t1",
+        "historyId": "900",
+        "messages": [
+            {"id": f"m{i}", "threadId": "t1", "labelIds": ["INBOX"], "snippet": "...", "internalDate": str(1000 + i)}
+            for i in range(count)
+        ],
+    }
+
+
+def _full(message_id, format_="full"):
+    return {"id": message_id, "labelIds": ["STALE"], "payload": {"body": {"data": f"body of {message_id}"}}}
+
+
+class TestThreadGetWindow:
+    def test_last_n_fetches_only_window(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        mock_client.get_thread.return_value = _skeleton(10)
+        mock_client.get_message.side_effect = _full
+        result = json.loads(gmail_thread_get("t1", account="draneylucas", last_n=2))
+        mock_client.get_thread.assert_called_once_with("t1", format_="minimal")
+        assert [c.args[0] for c in mock_client.get_message.call_args_list] == ["m8", "m9"]
+        assert result["messageCount"] == 10
+        assert result["window"] == {"order": "oldest", "start": 8, "end": 10}
+        assert result["messages"][0] == {"id": "m0", "labelIds": ["INBOX"], "internalDate": "1000"}
+        assert result["messages"][9]["payload"]["body"]["data"] == "body of m9"
+        assert result["messages"][9]["labelIds"] == ["INBOX"]
+
+    def test_newest_first_with_offset_limit(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        mock_client.get_thread.return_value = _skeleton(10)
+        mock_client.get_message.side_effect = _full
+        result = json.loads(gmail_thread_get("t1", account="draneylucas", order="newest", offset=2, limit=3))
+        assert [m["id"] for m in result["messages"]][:5] == ["m9", "m8", "m7", "m6", "m5"]
+        assert "payload" not in result["messages"][1]
+        assert [m["id"] for m in result["messages"] if "payload" in m] == ["m7", "m6", "m5"]
+
+    def test_paging_reuses_cached_content(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        mock_client.get_thread.return_value = _skeleton(10)
+        mock_client.get_message.side_effect = _full
+        gmail_thread_get("t1", account="draneylucas", offset=0, limit=3)
+        gmail_thread_get("t1", account="draneylucas", offset=2, limit=3)
+        fetched = [c.args[0] for c in mock_client.get_message.call_args_list]
+        assert fetched == ["m0", "m1", "m2", "m3", "m4"]
+
+    def test_large_window_uses_one_thread_fetch(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        skeleton = _skeleton(4)
+        full = {"id": "t1", "messages": [_full(m["id"]) for m in skeleton["messages"]]}
+        mock_client.get_thread.side_effect = lambda tid, format_: skeleton if format_ == "minimal" else full
+        result = json.loads(gmail_thread_get("t1", account="draneylucas", last_n=3))
+        mock_client.get_message.assert_not_called()
+        assert [m["id"] for m in result["messages"] if "payload" in m] == ["m1", "m2", "m3"]
+
+    def test_invalid_order(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        result = json.loads(gmail_thread_get("t1", account="draneylucas", order="sideways"))
+        assert result["error"] is True
+        mock_client.get_thread.assert_not_called()
+
+    def test_last_n_with_limit_rejected(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        result = json.loads(gmail_thread_get("t1", account="draneylucas", last_n=2, limit=2))
+        assert result["error"] is True
+
+
+def _message(message_id, sender, text, ts):
+    data = base64.urlsafe_b64encode(text.encode()).decode()
+    return {
+        "id": message_id,
+        "internalDate": str(ts),
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [
+                {"name": "From", "value": sender},
+                {"name": "To", "value": "Alice <alice@example.com>, bob@example.com"},
+                {"name": "Subject", "value": "Offsite" if message_id == "m1" else "Re: Offsite"},
+            ],
+            "body": {"data": data},
+        },
+    }
+
+
+class TestThreadDigest:
+    def test_digest_dedupes_quotes(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_digest
+
+        first = "Shall we hold the offsite in the Lisbon office this spring?"
+        second = "Lisbon is fine, though May would be better than April for most."
+        mock_client.get_thread.return_value = {
+            "id": "t1",
+            "messages": [
+                _message("m1", "Alice <alice@example.com>", first, 1736157600000),
+                _message("m2", "bob@example.com", f"{second}\n\nOn Mon Alice wrote:\n> {first}", 1736161200000),
+            ],
+        }
+        result = json.loads(gmail_thread_digest("t1", account="draneylucas"))
+        mock_client.get_thread.assert_called_once_with("t1", format_="full")
+        assert result["subject"] == "Offsite"
+        assert result["participants"] == ["Alice <alice@example.com>", "bob@example.com"]
+        assert result["messages"][0] == {"id": "m1", "from": [0], "to": [0, 1], "date": "2025-01-06 10:00", "text": first}
+        assert result["messages"][1]["text"] == second
+        assert result["messages"][1]["quoted_chars_omitted"] > len(first)
+        assert "subject" not in result["messages"][1]
+
+    def test_digest_error(self, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_digest
+
+        mock_client.get_thread.side_effect = GmailAPIError(404, "Not found")
+        result = json.loads(gmail_thread_digest("t1", account="draneylucas"))
+        assert result["error"] is True
+
+
 class TestThreadModify:
     def test_modify_add_labels(self, mock_client):
         from gmail_mcp.tools.threads import gmail_thread_modify
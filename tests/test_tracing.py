@@ -0,0 +1,115 @@
+"""Tests for tracing — span export, nesting, and HTTP instrumentation."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from gmail_mcp import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    tracing.configure(path)
+    yield path
+    tracing.configure(None)
+
+
+def _read_spans(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestSpan:
+    def test_disabled_writes_nothing(self, tmp_path, mock_client):
+        import asyncio
+
+        from gmail_mcp.server import mcp
+
+        path = tmp_path / "spans.jsonl"
+        tracing.configure(path)
+        tracing.configure(None)
+        assert not tracing.enabled()
+        with tracing.span("noop", a=1) as attrs:
+            attrs["b"] = 2
+        mock_client.get_label.return_value = {"id": "INBOX"}
+        asyncio.run(mcp.call_tool("gmail_label_get", {"label_id": "INBOX", "account": "draneylucas"}))
+        assert path.read_text() == ""
+        assert list(tmp_path.iterdir()) == [path]
+
+    def test_exports_otlp_fields(self, trace_file):
+        with tracing.span("stage", account="draneylucas") as attrs:
+            attrs["bytes"] = 10
+        (record,) = _read_spans(trace_file)
+        assert record["name"] == "stage"
+        assert record["parentSpanId"] is None
+        assert len(record["traceId"]) == 32
+        assert record["attributes"] == {"account": "draneylucas", "bytes": 10}
+        assert record["endTimeUnixNano"] >= record["startTimeUnixNano"]
+        assert record["status"]["code"] == "OK"
+
+    def test_nested_spans_share_trace(self, trace_file):
+        with tracing.span("outer"):
+            with tracing.span("inner"):
+                pass
+        inner, outer = _read_spans(trace_file)
+        assert inner["traceId"] == outer["traceId"]
+        assert inner["parentSpanId"] == outer["spanId"]
+
+    def test_error_status(self, trace_file):
+        with pytest.raises(RuntimeError):
+            with tracing.span("failing"):
+                raise RuntimeError("boom")
+        (record,) = _read_spans(trace_file)
+        assert record["status"] == {"code": "ERROR", "message": "boom"}
+
+
+class TestInstrumentClient:
+    def test_http_span_attributes(self, trace_file):
+        def handler(request):
+            return httpx.Response(200, json={"id": "msg1", "threadId": "t1"})
+
+        client = MagicMock()
+        client._http = httpx.Client(
+            base_url="https://gmail.googleapis.com/gmail/v1",
+            transport=httpx.MockTransport(handler),
+        )
+        tracing.instrument_client(client)
+        client._http.get("/users/me/messages/msg1", params={"format": "full"})
+
+        (record,) = _read_spans(trace_file)
+        attrs = record["attributes"]
+        assert record["name"] == "http GET"
+        assert attrs["gmail.method"] == "messages.get"
+        assert attrs["gmail.quota_units"] == 5
+        assert attrs["http.status_code"] == 200
+        assert attrs["http.response.bytes"] > 0
+
+
+class TestToolSpans:
+    def test_tool_call_stages(self, trace_file, mock_client):
+        from gmail_mcp.tools.threads import gmail_thread_get
+
+        mock_client.get_thread.return_value = {"id": "t1", "messages": [{"id": "m1"}]}
+        gmail_thread_get("t1", account="draneylucas")
+
+        names = [record["name"] for record in _read_spans(trace_file)]
+        assert names == ["resolve_account", "token_refresh", "get_client", "slim_response", "serialize"]
+
+    def test_root_span_parents_stages(self, trace_file, mock_client):
+        import asyncio
+
+        from gmail_mcp.server import mcp
+
+        mock_client.get_label.return_value = {"id": "INBOX", "messagesTotal": 3}
+        asyncio.run(mcp.call_tool("gmail_label_get", {"label_id": "INBOX", "account": "draneylucas"}))
+
+        records = _read_spans(trace_file)
+        root = records[-1]
+        assert root["name"] == "tool gmail_label_get"
+        assert root["attributes"]["account"] == "draneylucas"
+        assert all(r["traceId"] == root["traceId"] for r in records)
+        assert {r["parentSpanId"] for r in records[:-1]} <= {root["spanId"]} | {r["spanId"] for r in records}
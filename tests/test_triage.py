@@ -0,0 +1,91 @@
+"""Tests for the compact triage table and gmail_inbox_triage."""
+
+from __future__ import annotations
+
+import json
+
+from gmail_mcp.triage import COLUMNS, render, row
+
+
+def _message(subject="Budget", snippet="It&#39;s due Friday"):
+    return {
+        "id": "m1",
+        "threadId": "t1",
+        "labelIds": ["INBOX", "UNREAD"],
+        "snippet": snippet,
+        "sizeEstimate": 2048,
+        "internalDate": "1704067200000",
+        "payload": {"headers": [
+            {"name": "From", "value": "Alice <alice@x.com>"},
+            {"name": "Subject", "value": subject},
+            {"name": "Date", "value": "Mon, 1 Jan 2024 00:00:00 +0000"},
+        ]},
+    }
+
+
+class TestRows:
+    def test_row(self):
+        assert row(_message(), 100) == [
+            "m1", "t1", "Alice <alice@x.com>", "Budget", "2024-01-01 00:00", "INBOX,UNREAD", 2048, "It's due Friday",
+        ]
+
+    def test_snippet_cut_and_dropped(self):
+        assert row(_message(), 4)[-1] == "It's…"
+        assert row(_message(), 0)[-1] == ""
+
+    def test_tsv_escapes_tabs_and_newlines(self):
+        text = render([row(_message(subject="a\tb\r\nc"), 100)], "tsv", "tok")
+        lines = text.split("\n")
+        assert lines[0] == "\t".join(COLUMNS)
+        assert lines[1].split("\t")[3] == "a b c"
+        assert lines[2] == "# nextPageToken\ttok"
+
+    def test_json_rows(self):
+        text = render([row(_message(), 100)] * 2, "json")
+        assert len(text.splitlines()) == 4  # columns, "rows":[, then one line per row
+        parsed = json.loads(text)
+        assert parsed["columns"] == COLUMNS and len(parsed["rows"]) == 2
+        assert "nextPageToken" not in parsed
+        assert json.loads(render([], "json"))["rows"] == []
+
+
+class TestInboxTriage:
+    def _triage(self, **kwargs):
+        from gmail_mcp.tools.messages import gmail_inbox_triage
+
+        return gmail_inbox_triage(account="draneylucas", query=None, **kwargs)
+
+    def test_tsv_from_one_batch(self, fake_gmail):
+        text = self._triage(max_results=8)
+        lines = text.split("\n")
+        assert len(lines) == 9
+        ids = [line.split("\t")[0] for line in lines[1:]]
+        assert set(ids) == set(fake_gmail.mailbox.messages)
+        assert fake_gmail.stats["batches"] == 1
+        assert fake_gmail.stats["method:messages.list"] == 1
+
+    def test_repeat_is_served_from_cache(self, fake_gmail):
+        first = self._triage(max_results=8, output_format="json")
+        fake_gmail.stats.clear()
+        assert self._triage(max_results=8, output_format="json") == first
+        assert "batches" not in fake_gmail.stats
+
+    def test_next_page_token(self, fake_gmail):
+        text = self._triage(max_results=3)
+        assert len(text.split("\n")) == 5
+        token = text.rsplit("\t", 1)[1]
+        rest = self._triage(max_results=10, page_token=token).split("\n")
+        assert len(rest) == 6 and not rest[-1].startswith("#")
+
+    def test_ten_times_smaller_than_list_then_get(self, fake_gmail):
+        from gmail_mcp.tools.messages import gmail_message_get, gmail_messages_list
+
+        listed = gmail_messages_list(account="draneylucas", max_results=8)
+        gets = [
+            gmail_message_get(m["id"], account="draneylucas", response_format="metadata")
+            for m in json.loads(listed)["messages"]
+        ]
+        assert len(listed) + sum(map(len, gets)) > 10 * len(self._triage(max_results=8))
+
+    def test_invalid_format(self, fake_gmail):
+        assert json.loads(self._triage(output_format="csv"))["error"] is True
@@ -0,0 +1,157 @@
+"""Tests for attachment sending through the upload endpoint."""
+
+from __future__ import annotations
+
+import email
+import io
+import json
+import os
+
+import httpx
+import pytest
+
+from gmail_mcp import uploads
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    from benchmarks.fake_gmail import FakeGmailApp, FakeGmailServer, FakeMailbox
+
+    monkeypatch.setattr(uploads.time, "sleep", lambda seconds: None)
+    app = FakeGmailApp(FakeMailbox(threads=2, messages_per_thread=1))
+    server = FakeGmailServer(app)
+    server.start()
+    with httpx.Client(timeout=10) as http:
+        yield app, server.url, http
+    server.shutdown()
+
+
+class _Client:
+    def __init__(self, http):
+        self._http = http
+
+
+def _attachment(tmp_path, name="report.pdf", size=300_000):
+    path = tmp_path / name
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+def _parts(raw):
+    message = email.message_from_bytes(raw)
+    return message, {p.get_filename(): p.get_payload(decode=True) for p in message.walk() if p.get_filename()}
+
+
+class TestWriteMime:
+    def test_round_trips(self, tmp_path):
+        pdf = _attachment(tmp_path)
+        out = io.BytesIO()
+        uploads.write_mime(out, to="a@example.com", subject="Ré: report", body="See attached.", attachments=[pdf], cc="c@example.com")
+        message, files = _parts(out.getvalue())
+        assert message["To"] == "a@example.com"
+        assert message["Cc"] == "c@example.com"
+        assert str(email.header.make_header(email.header.decode_header(message["Subject"]))) == "Ré: report"
+        assert message.get_payload()[0].get_payload(decode=True).decode().strip() == "See attached."
+        assert files == {"report.pdf": pdf.read_bytes()}
+        assert message.get_payload()[1].get_content_type() == "application/pdf"
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(ValueError, match="not found"):
+            uploads.resolve_paths(f"{tmp_path}/a.txt, {tmp_path}/b.txt")
+
+    def test_refuses_secrets(self, tmp_path, monkeypatch):
+        secrets_dir = tmp_path / "secrets"
+        secrets_dir.mkdir()
+        (secrets_dir / "gmail-draneylucas.json").write_text("{}")
+        (tmp_path / "innocent.txt").symlink_to(secrets_dir / "gmail-draneylucas.json")
+        monkeypatch.setattr(uploads, "SECRETS_DIR", secrets_dir)
+        for path in (secrets_dir / "gmail-draneylucas.json", tmp_path / "innocent.txt"):
+            with pytest.raises(ValueError, match="secrets directory"):
+                uploads.resolve_paths(str(path))
+
+    def test_attachments_root(self, tmp_path, monkeypatch):
+        root = tmp_path / "outbox"
+        root.mkdir()
+        inside = _attachment(root)
+        outside = _attachment(tmp_path, "other.pdf")
+        monkeypatch.setattr(uploads, "ATTACHMENTS_DIR", root)
+        assert uploads.resolve_paths("report.pdf") == [inside]
+        with pytest.raises(ValueError, match="outside GMAIL_MCP_ATTACHMENTS_DIR"):
+            uploads.resolve_paths(f"{inside}, {outside}")
+        with pytest.raises(ValueError, match="outside GMAIL_MCP_ATTACHMENTS_DIR"):
+            uploads.resolve_paths("../other.pdf")
+
+
+class TestUpload:
+    def test_small_message_uses_simple_upload(self, fake, tmp_path):
+        app, root, http = fake
+        pdf = _attachment(tmp_path)
+        result = uploads.send_with_attachments(_Client(http), root, to="a@example.com", subject="s", body="b", attachments=[pdf])
+        assert result["labelIds"] == ["SENT"]
+        assert _parts(app.received[result["id"]])[1] == {"report.pdf": pdf.read_bytes()}
+        assert app.stats["method:messages.send"] == 1
+        assert "upload_chunks" not in app.stats
+
+    def test_resumes_after_interrupted_chunk(self, fake, tmp_path, monkeypatch):
+        app, root, http = fake
+        app.upload_drop_every = 2
+        monkeypatch.setattr(uploads, "SIMPLE_UPLOAD_LIMIT", 0)
+        monkeypatch.setattr(uploads, "CHUNK_SIZE", 256 * 1024)
+        pdf = _attachment(tmp_path, size=1_000_000)
+        result = uploads.send_with_attachments(_Client(http), root, to="a@example.com", subject="s", body="b", attachments=[pdf])
+        raw = app.received[result["id"]]
+        assert _parts(raw)[1] == {"report.pdf": pdf.read_bytes()}
+        assert app.stats["upload_dropped"] >= 2
+        assert app.stats["upload_queries"] == app.stats["upload_dropped"]
+        # Each drop costs one extra chunk (the lost half), not a restart.
+        assert app.stats["upload_chunks"] <= -(-len(raw) // (256 * 1024)) + app.stats["upload_dropped"]
+
+    def test_draft_keeps_thread(self, fake, tmp_path):
+        app, root, http = fake
+        thread_id = next(iter(app.mailbox.threads))
+        result = uploads.send_with_attachments(
+            _Client(http), root, draft=True, thread_id=thread_id,
+            to="a@example.com", subject="s", body="b", attachments=[_attachment(tmp_path)],
+        )
+        assert result["id"].startswith("r")
+        assert result["message"]["threadId"] == thread_id
+        assert result["message"]["labelIds"] == ["DRAFT"]
+
+    def test_gives_up_after_retries(self, fake, tmp_path, monkeypatch):
+        from gmail_sdk import GmailAPIError
+
+        app, root, http = fake
+        app.upload_drop_every = 1
+        monkeypatch.setattr(uploads, "SIMPLE_UPLOAD_LIMIT", 0)
+        with pytest.raises(GmailAPIError) as info:
+            uploads.send_with_attachments(_Client(http), root, to="a@example.com", subject="s", body="b", attachments=[_attachment(tmp_path)])
+        assert info.value.status_code == 503
+
+    def test_too_large(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(uploads, "MAX_MESSAGE_SIZE", 1000)
+        with pytest.raises(ValueError, match="35 MB"):
+            uploads.send_with_attachments(_Client(None), "http://unused", to="a@example.com", subject="s", body="b", attachments=[_attachment(tmp_path)])
+
+
+class TestTools:
+    def test_send_with_attachments(self, fake, tmp_path, mock_client, monkeypatch):
+        from gmail_mcp.tools import messages
+
+        app, root, http = fake
+        mock_client._http = http
+        monkeypatch.setattr(messages, "GMAIL_API_ROOT", root)
+        pdf = _attachment(tmp_path)
+        result = json.loads(messages.gmail_message_send(
+            to="a@example.com", subject="s", body="b", account="draneylucas", attachments=f" {pdf} ",
+        ))
+        assert result["id"] in app.received
+        mock_client.send_message.assert_not_called()
+
+    def test_draft_missing_attachment(self, tmp_path, mock_client):
+        from gmail_mcp.tools.drafts import gmail_draft_create
+
+        result = json.loads(gmail_draft_create(
+            to="a@example.com", subject="s", body="b", account="draneylucas", attachments=str(tmp_path / "nope.pdf"),
+        ))
+        assert "not found" in result["message"]
+        mock_client.create_draft.assert_not_called()
@@ -0,0 +1,165 @@
+"""Tests for users.watch push notifications — receiver, history sync and session updates."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from gmail_mcp.cache import label_overlay
+from gmail_mcp.watch import PushReceiver, Watcher
+
+
+def _envelope(email="draneylucas@gmail.com", history_id=1010):
+    data = base64.b64encode(json.dumps({"emailAddress": email, "historyId": history_id}).encode()).decode()
+    return json.dumps({"message": {"data": data, "messageId": "1"}, "subscription": "s"}).encode()
+
+
+def _post(url, body):
+    request = urllib.request.Request(url, body, {"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+@pytest.fixture
+def watcher(monkeypatch, mock_client):
+    monkeypatch.setenv("GMAIL_MCP_PUSH_PORT", "0")
+    mock_client.account = "draneylucas"
+    mock_client._post.return_value = {"historyId": "1000", "expiration": "1999999999000"}
+    mock_client.get_profile.return_value = {"emailAddress": "DraneyLucas@gmail.com", "historyId": "1000"}
+    w = Watcher()
+    yield w
+    for watch in w._watches.values():
+        watch.timer.cancel()
+    if w.receiver is not None:
+        w.receiver.shutdown()
+
+
+class _Session:
+    def __init__(self):
+        self.updated = []
+
+    async def send_resource_updated(self, uri):
+        self.updated.append(str(uri))
+
+
+class TestReceiver:
+    def test_delivery_calls_handler(self):
+        received = []
+        receiver = PushReceiver(lambda email, hid: received.append((email, hid)), port=0)
+        receiver.start()
+        try:
+            assert _post(receiver.url, _envelope()) == 204
+            assert _post(receiver.url, b"not json") == 400
+        finally:
+            receiver.shutdown()
+        assert received == [("draneylucas@gmail.com", 1010)]
+
+    def test_token_required(self):
+        receiver = PushReceiver(lambda email, hid: None, port=0, token="s3cret")
+        receiver.start()
+        try:
+            assert _post(receiver.url, _envelope()) == 403
+            assert _post(receiver.url + "?token=s3cret", _envelope()) == 204
+        finally:
+            receiver.shutdown()
+
+
+class TestWatcher:
+    def test_start_calls_users_watch(self, watcher, mock_client):
+        result = watcher.start("draneylucas", "projects/p/topics/gmail", ["INBOX"])
+        mock_client._post.assert_called_once_with(
+            "/users/me/watch",
+            json={"topicName": "projects/p/topics/gmail", "labelIds": ["INBOX"], "labelFilterBehavior": "include"},
+        )
+        assert result["resource"] == "gmail://draneylucas/history"
+        assert result["historyId"] == "1000"
+        assert result["receiver"].startswith("http://127.0.0.1:")
+
+    def test_notification_fetches_history_and_notifies(self, watcher, mock_client):
+        watcher.start("draneylucas", "projects/p/topics/gmail")
+        record = {
+            "id": "1010",
+            "labelsRemoved": [{"message": {"id": "m1", "labelIds": ["INBOX"]}, "labelIds": ["UNREAD"]}],
+        }
+        mock_client.list_history.return_value = {"history": [record], "historyId": "1010"}
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        session = _Session()
+        watcher.listen("gmail://draneylucas/history", session, loop)
+        try:
+            assert _post(watcher.receiver.url, _envelope()) == 204
+            asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(2)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+        mock_client.list_history.assert_called_once_with(start_history_id="1000", max_results=500, page_token=None)
+        assert session.updated == ["gmail://draneylucas/history"]
+        assert label_overlay.get("draneylucas", "m1") == ["INBOX"]
+        changes = watcher.changes("draneylucas")
+        assert changes["historyId"] == "1010"
+        assert changes["history"] == [record]
+
+    def test_stale_notification_ignored(self, watcher, mock_client):
+        watcher.start("draneylucas", "projects/p/topics/gmail")
+        watcher.notify("draneylucas@gmail.com", 999)
+        mock_client.list_history.assert_not_called()
+
+    def test_expired_start_id_resets(self, watcher, mock_client):
+        from gmail_sdk import GmailAPIError
+
+        watcher.start("draneylucas", "projects/p/topics/gmail")
+        mock_client.list_history.side_effect = GmailAPIError(404, "Requested entity was not found.")
+        mock_client.get_profile.return_value = {"emailAddress": "draneylucas@gmail.com", "historyId": "5000"}
+        watcher.notify("draneylucas@gmail.com", 5000)
+        assert watcher.changes("draneylucas")["history"] == [{"id": "5000", "reset": True}]
+
+    def test_stop(self, watcher, mock_client):
+        watcher.start("draneylucas", "projects/p/topics/gmail")
+        assert watcher.stop("draneylucas")["action"] == "watch_stopped"
+        mock_client._post.assert_called_with("/users/me/stop")
+        assert watcher.changes("draneylucas") == {"account": "draneylucas", "watching": False}
+
+
+class TestTools:
+    def test_watch_start_error(self, mock_client):
+        from gmail_sdk import GmailAPIError
+
+        from gmail_mcp.tools.watch import gmail_watch_start
+
+        mock_client._post.side_effect = GmailAPIError(403, "Topic permission denied")
+        result = json.loads(asyncio.run(gmail_watch_start("projects/p/topics/gmail", account="draneylucas")))
+        assert result["error"] is True
+        assert result["status_code"] == 403
+
+    def test_history_resource_unwatched(self, mock_client):
+        from gmail_mcp.tools.watch import gmail_history_resource
+
+        assert json.loads(gmail_history_resource("lucastoddraney")) == {"account": "lucastoddraney", "watching": False}
+
+
+class TestFakePublisher:
+    def test_change_after_watch_is_pushed(self):
+        from benchmarks.fake_gmail import FakeGmailApp, FakeMailbox
+
+        received = threading.Event()
+        receiver = PushReceiver(lambda email, hid: received.set(), port=0)
+        receiver.start()
+        try:
+            mailbox = FakeMailbox(threads=2, messages_per_thread=1)
+            app = FakeGmailApp(mailbox, push_endpoint=receiver.url)
+            message_id = next(iter(mailbox.messages))
+            status, _ = app.handle("POST", "/gmail/v1/users/me/watch", b'{"topicName": "t"}')
+            assert status == 200
+            app.handle("POST", f"/gmail/v1/users/me/messages/{message_id}/modify", b'{"addLabelIds": ["Label_pushed"]}')
+            assert received.wait(5)
+        finally:
+            receiver.shutdown()
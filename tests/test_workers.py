@@ -0,0 +1,109 @@
+"""Tests for account-sharded worker processes."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from gmail_mcp import budget, workers
+from gmail_mcp.workers import Supervisor
+
+
+@pytest.fixture
+def router():
+    """A Supervisor with routing state only (no processes)."""
+    supervisor = Supervisor.__new__(Supervisor)
+    supervisor.count = 4
+    return supervisor
+
+
+class TestRouting:
+    def test_account_routes_are_stable(self, router):
+        first = router.shard_for("gmail_message_get", {"account": "draneylucas", "message_id": "m1"})
+        assert 0 <= first < 4
+        assert router.shard_for("gmail_thread_get", {"account": "draneylucas@gmail.com"}) == first
+
+    def test_continue_routes_by_cursor_prefix(self, router):
+        assert router.shard_for("gmail_continue", {"cursor": "w3.abc"}) == 3
+        assert router.shard_for("gmail_continue", {"cursor": "w9.abc"}) is None
+        assert router.shard_for("gmail_continue", {"cursor": "abc-def"}) is None
+
+    def test_no_account_param_runs_locally(self, router):
+        assert router.shard_for("gmail_something", {"x": 1}) is None
+
+
+class TestWorkerProcess:
+    def test_round_trip_through_worker(self):
+        supervisor = Supervisor(1, threads=2)
+        try:
+            result = asyncio.run(supervisor.call(0, "gmail_continue", {"cursor": "w0.missing", "max_bytes": 1000}))
+            assert "Unknown or expired cursor" in json.loads(result)["message"]
+            with pytest.raises(workers.WorkerError, match="Unknown tool: no_such_tool"):
+                asyncio.run(supervisor.call(0, "no_such_tool", {}))
+        finally:
+            supervisor.shutdown()
+
+    def test_worker_cursors_carry_prefix(self, monkeypatch):
+        monkeypatch.setattr(budget, "CURSOR_PREFIX", "w2.")
+        data = {"messages": [{"id": f"m{i}", "pad": "x" * 200} for i in range(50)]}
+        cursor = budget.apply_budget(data, 2000)["truncated"]["cursor"]
+        assert cursor.startswith("w2.")
+
+
+class TestFrontRouting:
+    def test_routed_call_uses_supervisor(self, mock_client, monkeypatch):
+        from gmail_mcp.server import mcp
+
+        calls = []
+
+        class _Stub:
+            def shard_for(self, name, arguments):
+                return 1
+
+            async def call(self, index, name, arguments):
+                calls.append((index, name, arguments))
+                return '{"routed": true}'
+
+        monkeypatch.setattr(workers, "supervisor", _Stub())
+        content, _ = asyncio.run(mcp.call_tool("gmail_label_get", {"label_id": "INBOX", "account": "draneylucas"}))
+        assert json.loads(content[0].text) == {"routed": True}
+        assert calls == [(1, "gmail_label_get", {"label_id": "INBOX", "account": "draneylucas"})]
+        mock_client.get_label.assert_not_called()
+
+    def test_watch_tools_stay_in_front(self, router, monkeypatch):
+        from gmail_mcp.watch import watcher
+
+        assert router.shard_for("gmail_watch_stop", {"account": "draneylucas"}) is None
+        assert router.shard_for("gmail_message_get", {"account": "draneylucas"}) is not None
+        monkeypatch.setitem(watcher._watches, "draneylucas", object())
+        assert router.shard_for("gmail_message_get", {"account": "draneylucas"}) is None
+
+
+class TestWatchWithWorkers:
+    def test_stop_cancels_the_front_renewal(self, mock_client, monkeypatch):
+        import threading
+
+        from gmail_mcp import watch
+        from gmail_mcp.server import mcp
+        from gmail_mcp.tools.watch import gmail_watch_start
+
+        monkeypatch.setenv("GMAIL_MCP_PUSH_PORT", "0")
+        monkeypatch.setattr(watch.threading, "Timer", lambda delay, fn, args: threading.Timer(0.2, fn, args))
+        mock_client._post.return_value = {"historyId": "1000", "expiration": "1999999999000"}
+        mock_client.get_profile.return_value = {"emailAddress": "draneylucas@gmail.com", "historyId": "1000"}
+        monkeypatch.setattr(workers, "supervisor", Supervisor(2, threads=2))
+        try:
+            json.loads(asyncio.run(gmail_watch_start("projects/p/topics/gmail", account="draneylucas")))
+            content, _ = asyncio.run(mcp.call_tool("gmail_watch_stop", {"account": "draneylucas"}))
+            assert json.loads(content[0].text)["action"] == "watch_stopped"
+            threading.Event().wait(0.4)
+        finally:
+            workers.supervisor.shutdown()
+            if watch.watcher.receiver is not None:
+                watch.watcher.receiver.shutdown()
+                watch.watcher.receiver = None
+        paths = [call.args[0] for call in mock_client._post.call_args_list]
+        assert paths == ["/users/me/watch", "/users/me/stop"]
+        assert not watch.watcher.watching("draneylucas")